@@ -2,28 +2,41 @@
 from pathlib import Path
 import os
 import time
+import threading
 from rapidfuzz import fuzz
 from dotenv import load_dotenv, find_dotenv
 
 from src.core.fast_exit import FastExit
 from src.core.states import BotState
 from src.core.logger import setup_logger
-from src.core.config import load_all
+from src.core.config import load_all, ROOT
 from src.audio.input import record_until_silence
 from src.audio.barge import BargeInListener
+from src.audio.echo_veto import EchoVeto, install_echo_veto
 from src.asr import make_asr
-from src.llm.engine import LLMLocal
+from src.llm.engine import LLMLocal, UNKNOWN_EN, UNKNOWN_RO
+from src.llm.unknown_detector import UnknownDetector
+from src.llm.speculative import SpeculativeTurn
 from src.tts.engine import TTSLocal
 from src.core.wake import WakeDetector
+from src.core.router import IntentRouter
 from src.utils.textnorm import normalize_text
 from src.audio.wake_porcupine import wait_for_wake as wait_for_wake_porcupine
 from src.llm.stream_shaper import shape_stream  # netezire stream LLM→TTS
+from src.llm.length_governor import govern_length
+from src.llm.faq_index import FaqIndex
+from src.tts.pacer import AdaptivePacer
+from src.utils.debug_store import DebugStore
+from src.utils.debug_speech import DebugSpeech
 
 from src.telemetry.metrics import (
     boot_metrics, round_trip, wake_triggers, sessions_started,
     sessions_ended, interactions, unknown_answer, errors_total,
-    tts_speak_calls
+    tts_speak_calls, routed_turns, routed_intents, routed_round_trip,
+    route_match_latency, observe_hist, faq_lookup_latency, faq_answers, faq_context_turns,
+    barge_reaction, metric_label,
 )
+from src.telemetry.tracing import tracer
 
 LANG_MAP = {"ro": "ro", "en": "en"}
 
@@ -67,11 +80,44 @@ def main():
     cfg = load_all()
     data_dir = Path(cfg["paths"]["data"])
     data_dir.mkdir(parents=True, exist_ok=True)
+    tracer.configure(data_dir / "traces")  # span-uri per tură -> data/traces/*.jsonl + waterfall în /vitals
+    debug_store = DebugStore.from_env(data_dir, logger)  # data/debug/debug.sqlite3 (python -m src.utils.debug_store)
 
     # Engines
     asr = make_asr(cfg["asr"], logger)
-    llm = LLMLocal(cfg["llm"], logger)
+    llm = LLMLocal(cfg["llm"], logger, data_dir=data_dir)
+    # modelul rămâne rezident cel puțin cât o sesiune inactivă + marjă
+    llm.set_keep_alive(int(cfg["audio"].get("session_idle_seconds", 12))
+                       + int(cfg["llm"].get("keep_alive_margin_s", 300)))
     tts = TTSLocal(cfg["tts"], logger)
+    pacer = AdaptivePacer.from_cfg(cfg["tts"], logger, backend=tts.backend)  # bucăți LLM→TTS adaptive (debit LLM + RTF TTS)
+    unknown_det = UnknownDetector({"en": UNKNOWN_EN, "ro": UNKNOWN_RO}) if llm.strict_facts else None
+    if unknown_det:
+        # răspunsul fix „nu știu” se redă din WAV pre-randat, fără Piper
+        threading.Thread(target=tts.prerender, args=([(UNKNOWN_EN, "en"), (UNKNOWN_RO, "ro")],
+                                                     data_dir / "cache" / "tts"), daemon=True).start()
+
+    # Veto anti-eco (mic vs. TTS redat recent), partajat între TTS, record și barge
+    echo_veto = EchoVeto.from_cfg(cfg["audio"])
+    install_echo_veto(echo_veto)
+    if echo_veto:
+        logger.info(f"🔇 Echo veto activ: thr={echo_veto.threshold}, max_lag={echo_veto.max_lag} samples")
+
+    # Fast-path determinist (configs/routing.yaml) — răspunde fără LLM
+    router = IntentRouter(cfg.get("route") or {}, logger)
+    faq = FaqIndex.from_cfg(cfg.get("faq") or {}, data_dir, ROOT, logger)
+
+    # LLM speculativ pe transcriptul de la prima pauză (opțional)
+    spec = None
+    if bool(cfg["llm"].get("speculative_enabled", False)):
+        spec = SpeculativeTurn(
+            asr, llm, logger,
+            wav_path=data_dir / "cache" / "spec_utt.wav",
+            sample_rate=int(cfg["audio"]["sample_rate"]),
+            max_distance=float(cfg["llm"].get("speculative_max_distance", 0.15)),
+            should_speculate=lambda t: not is_goodbye(t) and not router.route(t),
+        )
+        logger.info("🔮 LLM speculativ activ (pornește pe pauză, comite dacă transcriptul final coincide).")
 
     # Wake options
     wake = WakeDetector(cfg["wake"], logger)
@@ -186,9 +232,11 @@ def main():
                     continue
                 porcupine_failures = 0
                 matched = "wake-porcupine"
+                tracer.start("wake", engine="porcupine")
+                tracer.mark("wake")
                 heard_lang = "ro" if PORC_LANG.startswith("ro") else "en"
                 logger.info("🔔 Wake phrase detectată (porcupine)")
-                wake_triggers.inc()
+                wake_triggers.labels(engine="porcupine").inc()
             else:
                 # —— STANDBY: text-ASR + fuzzy match ——
                 standby_cfg = dict(cfg["audio"])
@@ -222,16 +270,22 @@ def main():
                     continue
 
                 logger.info(f"🔔 Wake phrase detectată: {matched}")
-                wake_triggers.inc()
+                tracer.start("wake", engine="standby-asr")
+                tracer.mark("wake")
+                wake_triggers.labels(engine="text").inc()
                 matched_norm = normalize_text(matched)
                 ro_phrases = [normalize_text(p) for p in cfg["wake"]["wake_phrases"]
                               if "robot" in p and any(x in p.lower() for x in ["salut", "hei", "bun"])]
                 heard_lang = "ro" if any(matched_norm == rp for rp in ro_phrases) else "en"
 
-            # —— Wake confirm ——
+            # —— Wake confirm (warm-up LLM în paralel cu confirmarea) ——
+            if bool(cfg["llm"].get("warmup_on_wake", True)):
+                llm.warmup("wake")
             ack = ack_ro if heard_lang == "ro" else ack_en
             tts_speak_calls.inc()
-            tts.say(ack, lang=heard_lang)
+            with tracer.span("ack"):
+                tts.say(ack, lang=heard_lang)
+            tracer.finish("ok", lang=heard_lang)
 
             # —— SESIUNE MULTI-TURN ——
             ask_cfg = dict(cfg["audio"])
@@ -250,14 +304,20 @@ def main():
             sessions_started.inc()
 
             fast_exit.reset()
+            llm.reset_conversation()
+            debug_session = debug_store.begin_session(matched) if debug_store else None
 
             # inițializări lipsă (FIX)
             session_idle_seconds = int(cfg["audio"].get("session_idle_seconds", 12))
             last_activity = time.time()
 
             while time.time() - last_activity < session_idle_seconds:
+                if spec:
+                    spec.discard()  # speculațiile rămase din tura trecută nu mai sunt valabile
+                tracer.start("turn")  # o tură ignorată (prea scurtă/eco) e abandonată la următorul start
                 user_wav = data_dir / "cache" / "user_utt.wav"
-                path_user, dur = record_until_silence(ask_cfg, user_wav, logger)
+                path_user, dur = record_until_silence(ask_cfg, user_wav, logger,
+                                                      on_pause=spec.on_pause if spec else None)
 
                 if dur < float(ask_cfg.get("min_valid_seconds", 0.35)):
                     continue
@@ -265,11 +325,16 @@ def main():
                 state = BotState.THINKING
 
                 # ——— ASR: strict RO/EN ———
+                tracer.begin("asr")
                 asr_res = None
                 user_text = ""
                 user_lang = "en"
                 try:
-                    if hasattr(asr, "transcribe_ro_en"):
+                    # dacă după pauză n-a mai venit voce, transcriptul speculativ e cel final
+                    asr_res = spec.reuse_transcript(int(round(dur * 1000))) if spec else None
+                    if asr_res is not None:
+                        logger.info("🔮 Refolosesc transcriptul speculativ (fără a doua trecere ASR).")
+                    elif hasattr(asr, "transcribe_ro_en"):
                         asr_res = asr.transcribe_ro_en(path_user)
                     else:
                         asr_res = asr.transcribe(path_user, language_override="en")
@@ -281,6 +346,8 @@ def main():
                     asr_res = {"text": "", "lang": "en"}
                     user_text = ""
                     user_lang = "en"
+                tracer.end("asr")
+                tracer.set(lang=user_lang)
 
                 logger.info(f"🧏 [{user_lang}] {user_text}")
 
@@ -309,18 +376,67 @@ def main():
                     state = BotState.SPEAKING
                     tts_speak_calls.inc()
                     tts.say("Bine, pa!" if user_lang == "ro" else "Okay, bye!", lang=user_lang)
+                    tracer.finish("goodbye", path="goodbye")
                     logger.info("🔴 Sesiune închisă de utilizator (ok bye).")
                     break
 
-                # ——— STREAMING: LLM → TTS ———
-                interactions.inc()
+                # ——— FAST-PATH: intent router (fără LLM) ———
                 rt_start = time.perf_counter()
+                with observe_hist(route_match_latency), tracer.span("route"):
+                    route = router.route(user_text)
+                if route:
+                    interactions.labels(lang=metric_label("lang", user_lang)).inc()
+                    routed_turns.inc()
+                    routed_intents.labels(intent=route.intent).inc()
+                    reply = router.handle(route, lang=user_lang, last_reply=last_bot_reply)
+                    logger.info(f"🧭 Intent '{route.intent}' ({route.method}, {route.score:.0f}) → {reply.text or '∅'}")
+                    routed_round_trip.observe(time.perf_counter() - rt_start)
+                    if reply.text:
+                        state = BotState.SPEAKING
+                        tts_speak_calls.inc()
+                        tts.say(reply.text, lang=user_lang)
+                        last_bot_reply = reply.text
+                    tracer.finish("ok", path="routed", intent=route.intent)
+                    if reply.end_session:
+                        break
+                    last_activity = time.time()
+                    continue
+
+                # ——— FAQ local: răspuns direct sau pasaje pentru prompt ———
+                faq_context = None
+                if faq:
+                    with observe_hist(faq_lookup_latency), tracer.span("faq"):
+                        hits = faq.search(user_text)
+                    best = faq.answer(hits)
+                    if best:
+                        interactions.labels(lang=metric_label("lang", user_lang)).inc()
+                        faq_answers.inc()
+                        if spec:
+                            spec.discard()
+                        text = best.text(user_lang)
+                        logger.info(f"📚 FAQ ({best.score:.2f}) '{best.question}' → {text}")
+                        routed_round_trip.observe(time.perf_counter() - rt_start)
+                        state = BotState.SPEAKING
+                        tts_speak_calls.inc()
+                        tts.say(text, lang=user_lang)
+                        last_bot_reply = text
+                        tracer.finish("ok", path="faq")
+                        last_activity = time.time()
+                        continue
+                    faq_context = faq.context(hits, user_lang) or None
+                    if faq_context:
+                        faq_context_turns.inc()
+                        if spec:
+                            spec.discard()  # speculația a pornit fără pasajele FAQ
+                        logger.info(f"📚 FAQ context: {len(faq_context)}c injectate în prompt")
 
-                # === Debug dir per sesiune ===
-                from datetime import datetime
-                from src.utils.debug_speech import DebugSpeech
-                session_dir = data_dir / "debug" / datetime.now().strftime("%Y%m%d_%H%M%S")
-                debugger = DebugSpeech(session_dir, user_lang, logger)
+                # ——— STREAMING: LLM → TTS ———
+                interactions.labels(lang=metric_label("lang", user_lang)).inc()
+
+                # === Debug per tură (în DebugStore, scris în fundal) ===
+                tr = tracer.current()
+                debugger = DebugSpeech(debug_store, user_lang, logger, session_id=debug_session,
+                                       trace_id=tr.trace_id if tr else None)
                 debugger.write_asr(user_text)
 
                 reply_buf = []
@@ -331,15 +447,45 @@ def main():
                         reply_buf.append(tok)
                         yield tok
 
-                token_iter_raw = llm.generate_stream(user_text, lang_hint=user_lang, mode="precise")
+                if pacer:
+                    pacer.start_turn(user_lang)
+                tracer.mark("llm_request")
+                token_iter_raw = spec.take(user_text, user_lang) if spec else None
+                tracer.set(path="llm", speculative=token_iter_raw is not None)
+                if token_iter_raw is None:
+                    token_iter_raw = llm.generate_stream(user_text, lang_hint=user_lang, mode="precise",
+                                                         context=faq_context)
+                # oprirea din „nu știu” / bugetul de lungime anulează DOAR stream-ul acestei ture
+                llm_stream = token_iter_raw
+                if unknown_det:
+                    token_iter_raw = unknown_det.wrap(
+                        token_iter_raw, on_detect=lambda lang: llm.cancel("unknown-reply", stream=llm_stream))
+                if bool(cfg["llm"].get("length_governor", True)):
+                    # buget de lungime vorbită: ce nu vom rosti nu se mai generează
+                    cps = float(cfg["llm"].get("speech_chars_per_s", 14.0))
+                    if pacer and pacer.speech_s_per_char:
+                        cps = 1.0 / pacer.speech_s_per_char  # viteza reală măsurată pe vocea Piper
+                    token_iter_raw = govern_length(
+                        token_iter_raw,
+                        max_sentences=int(cfg["llm"].get("spoken_max_sentences", 3)),
+                        max_speech_s=float(cfg["llm"].get("spoken_max_seconds", 12.0)),
+                        chars_per_s=cps,
+                        max_tokens=llm.max_tokens,
+                        on_stop=lambda reason: llm.cancel("length-budget", stream=llm_stream),
+                        logger=logger,
+                    )
 
                 # netezește streamul în fraze stabile:
                 shaped = shape_stream(
                     token_iter_raw,
-                    prebuffer_chars=120,
+                    prebuffer_chars=int(cfg["tts"].get("prebuffer_chars", 120)),
                     min_chunk_chars=int(cfg["tts"].get("min_chunk_chars", 60)),
-                    soft_max_chars=140,
-                    max_idle_ms=250,
+                    soft_max_chars=int(cfg["tts"].get("soft_max_chars", 140)),
+                    max_idle_ms=int(cfg["tts"].get("max_idle_ms", 250)),
+                    max_prebuffer_ms=int(cfg["tts"].get("max_prebuffer_ms", 700)),
+                    pacer=pacer,
+                    queue_max=int(cfg["tts"].get("token_queue_max", 512)),
+                    trace=tracer.capture(),
                 )
 
                 # Capture + gard de oprire
@@ -353,7 +499,7 @@ def main():
 
                 def _mark_tts_start():
                     # round-trip metric
-                    round_trip.observe(time.perf_counter() - rt_start)
+                    round_trip.labels(lang=metric_label("lang", user_lang)).observe(time.perf_counter() - rt_start)
                     # debug hook
                     debugger.on_tts_start()
 
@@ -364,6 +510,7 @@ def main():
                     lang=user_lang,
                     on_first_speak=_mark_tts_start,
                     min_chunk_chars=int(cfg["tts"].get("min_chunk_chars", 60)),
+                    pacer=pacer,
                 )
 
                 # BARGE-IN în timpul TTS (protejată anti-eco și cu arm-delay)
@@ -389,8 +536,16 @@ def main():
                                 break
                             need = int(cfg["audio"].get("barge_min_voice_ms", 650))
                             if barge.heard_speech(need_ms=need):
-                                logger.info("⛔ Barge-in detectat — opresc TTS și trec la listening.")
+                                logger.info("⛔ Barge-in detectat — opresc TTS + LLM și trec la listening.")
+                                tracer.mark("barge_in")
+                                t_barge = time.perf_counter()
                                 tts.stop()
+                                llm.cancel("barge-in")
+                                barge_reaction.labels(
+                                    backend=metric_label("backend", tts.backend),
+                                    detector="cobra" if barge.cobra_enabled else "vad",
+                                ).observe(time.perf_counter() - t_barge)
+                                tracer.mark("barge_stop")
                                 break
                             time.sleep(0.03)
                     finally:
@@ -398,6 +553,11 @@ def main():
 
                 # finalizează logurile
                 debugger.on_tts_end()
+                tracer.mark("tts_end")
+                tr = tracer.current()
+                tracer.finish("barge-in" if tr and tr.has("barge_in") else "ok")
+                if pacer:
+                    pacer.end_turn()
                 last_bot_reply = "".join(reply_buf)
                 debugger.finish()
                 if fast_exit.pending():
@@ -406,7 +566,12 @@ def main():
 
                 last_activity = time.time()
 
+            if spec:
+                spec.discard()
+
             # —— ieșire din sesiune => standby ——
+            if debug_session:
+                debug_store.end_session(debug_session)
             state = BotState.LISTENING
             logger.info("⏳ Revenire în standby (spune din nou wake-phrase pentru o nouă sesiune).")
             sessions_ended.inc()
@@ -416,6 +581,9 @@ def main():
     except Exception as e:
         errors_total.inc()
         logger.exception(f"Fatal error: {e}")
+    finally:
+        if debug_store:
+            debug_store.close()  # scrie ultimul batch
 
 
 if __name__ == "__main__":
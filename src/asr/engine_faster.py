@@ -1,10 +1,11 @@
 # src/asr/engine_faster.py
 from __future__ import annotations
 from pathlib import Path
+import time
 from typing import Dict, Any, Optional, Tuple, List
 from faster_whisper import WhisperModel
 
-from src.telemetry.metrics import observe_hist, asr_latency
+from src.telemetry.metrics import asr_latency, metric_label
 
 class ASREngine:
     def __init__(
@@ -62,32 +63,35 @@ class ASREngine:
     # ---- API standard (păstrat, dar robust la bug-ul cu max() pe colecție vidă)
     def transcribe(self, wav_path: str | Path, language_override: Optional[str] = None) -> Dict[str, Any]:
         lang = (language_override or self.force_language or None)
-        with observe_hist(asr_latency):
-            try:
-                text, out_lang, prob, _ = self._run_once(wav_path, lang, use_vad=True)
-            except ValueError as e:
-                if "max() iterable argument is empty" in str(e):
-                    fallback_lang = lang or "en"
-                    text, out_lang, prob, _ = self._run_once(wav_path, fallback_lang, use_vad=False)
-                else:
-                    raise
+        t0 = time.perf_counter()
+        try:
+            text, out_lang, prob, _ = self._run_once(wav_path, lang, use_vad=True)
+        except ValueError as e:
+            if "max() iterable argument is empty" in str(e):
+                fallback_lang = lang or "en"
+                text, out_lang, prob, _ = self._run_once(wav_path, fallback_lang, use_vad=False)
+            else:
+                raise
+        asr_latency.labels(backend="faster-whisper", lang=metric_label("lang", out_lang)).observe(time.perf_counter() - t0)
         return {"text": text, "lang": out_lang, "language_probability": prob}
 
     # ---- NOU: transcriere strict EN/RO -> alegem cea mai bună
     def transcribe_ro_en(self, wav_path: str | Path) -> Dict[str, Any]:
-        with observe_hist(asr_latency):
-            # rulăm EN & RO cu VAD intern; dacă dă eroare, retry fără VAD
-            def safe(lang):
-                try:
-                    return self._run_once(wav_path, lang, use_vad=True)
-                except ValueError as e:
-                    if "max() iterable argument is empty" in str(e):
-                        return self._run_once(wav_path, lang, use_vad=False)
-                    raise
-            en_text, _, _, en_score = safe("en")
-            ro_text, _, _, ro_score = safe("ro")
+        t0 = time.perf_counter()
+        # rulăm EN & RO cu VAD intern; dacă dă eroare, retry fără VAD
+        def safe(lang):
+            try:
+                return self._run_once(wav_path, lang, use_vad=True)
+            except ValueError as e:
+                if "max() iterable argument is empty" in str(e):
+                    return self._run_once(wav_path, lang, use_vad=False)
+                raise
+        en_text, _, _, en_score = safe("en")
+        ro_text, _, _, ro_score = safe("ro")
+        lang = "ro" if (ro_score > en_score) and ro_text else "en"
+        asr_latency.labels(backend="faster-whisper", lang=lang).observe(time.perf_counter() - t0)
 
-        if (ro_score > en_score) and ro_text:
+        if lang == "ro":
             return {"text": ro_text, "lang": "ro", "language_probability": 1.0}
         else:
             return {"text": en_text, "lang": "en", "language_probability": 1.0}
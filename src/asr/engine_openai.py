@@ -1,11 +1,12 @@
 # src/asr/engine_openai.py
 from __future__ import annotations
 from pathlib import Path
+import time
 from typing import Dict, Any, Optional
 import whisper
 
 # metrics
-from src.telemetry.metrics import observe_hist, asr_latency
+from src.telemetry.metrics import asr_latency, metric_label
 
 class ASREngine:
     def __init__(
@@ -24,16 +25,17 @@ class ASREngine:
 
     def transcribe(self, wav_path: str | Path, language_override: Optional[str] = None) -> Dict[str, Any]:
         lang = (language_override or self.force_language or None)
-        with observe_hist(asr_latency):
-            res = self.model.transcribe(
-                str(wav_path),
-                fp16=self.fp16,
-                language=lang,
-                temperature=0.0,
-                condition_on_previous_text=False,
-                no_speech_threshold=0.6,
-                logprob_threshold=-0.5,
-            )
+        t0 = time.perf_counter()
+        res = self.model.transcribe(
+            str(wav_path),
+            fp16=self.fp16,
+            language=lang,
+            temperature=0.0,
+            condition_on_previous_text=False,
+            no_speech_threshold=0.6,
+            logprob_threshold=-0.5,
+        )
         text = (res.get("text") or "").strip()
         out_lang = res.get("language") or (lang or "en")
+        asr_latency.labels(backend="openai-whisper", lang=metric_label("lang", out_lang)).observe(time.perf_counter() - t0)
         return {"text": text, "lang": out_lang, "language_probability": 0.0}
@@ -7,6 +7,8 @@ import queue, time, struct, math
 from typing import Optional
 from .vad import VAD
 from .devices import choose_input_device
+from .echo_veto import get_echo_veto
+from .health import StreamHealth
 
 try:
     import pvcobra  # type: ignore
@@ -160,7 +162,9 @@ class BargeInListener:
         )
         vad_aggr = int(cfg_audio.get("vad_aggressiveness", 3))  # folosim VAD strict (3)
         self.vad = VAD(self.sr, vad_aggr, self.block_ms)
-        self.q = queue.Queue()
+        self.q = queue.Queue(maxsize=StreamHealth.queue_size(self.block_ms, float(cfg_audio.get("input_queue_max_s", 2.0))))
+        self.health = StreamHealth("barge", self.block_ms / 1000.0, logger)
+        self.echo_veto = get_echo_veto()
         self._open_stream()
         self._voiced_ms = 0
         self._last_user_voice_ms: int = 0
@@ -175,10 +179,8 @@ class BargeInListener:
 
     def _open_stream(self):
         def cb(indata, frames, time_info, status):
-            try:
-                self.q.put_nowait(indata.copy())
-            except:
-                pass
+            t = self.health.on_callback(status)
+            self.health.put(self.q, (t, indata.copy()))
         self.stream = sd.InputStream(
             channels=1, samplerate=self.sr, blocksize=self.block,
             dtype="float32", callback=cb, device=self.dev_index
@@ -246,7 +248,7 @@ class BargeInListener:
         zcr_str = f" zcr={zcr:.2f}" if zcr is not None else ""
         status = "Y" if detected else "n"
         src = "C" if cobra_hit else "V"
-        self.log.info(f"[BARGE] |{bar}| {label}{zcr_str} det={status}/{src}")
+        self.log.info("[BARGE] |%s| %s%s det=%s/%s", bar, label, zcr_str, status, src)
 
     def _is_human_voice(self, pcm_i16: np.ndarray) -> bool:
         """
@@ -325,15 +327,17 @@ class BargeInListener:
         deadline = time.time() + 0.02
         while time.time() < deadline:
             try:
-                block = self.q.get_nowait()
+                t_block, block = self.q.get_nowait()
             except queue.Empty:
                 break
 
             pcm = np.clip(block[:, 0], -1, 1)
             pcm_i16 = (pcm * 32767.0).astype(np.int16)
 
-            # Verifică dacă e voce umană (nu zgomot/eco)
-            if self._is_human_voice(pcm_i16):
+            # Veto anti-eco înainte de RMS/VAD/Cobra; apoi verifică dacă e voce umană
+            if self.echo_veto is not None and self.echo_veto.is_echo(pcm_i16, t_end=t_block):
+                self._voiced_ms = max(0, self._voiced_ms - self.voice_drop_ms)
+            elif self._is_human_voice(pcm_i16):
                 self._voiced_ms = min(self._voiced_ms + self.block_ms, need_ms)
             else:
                 # Pierde progres gradual (nu reset instant) pentru drop-uri scurte
@@ -346,7 +350,7 @@ class BargeInListener:
                 if (now2 - self._last_trigger_ms) >= self.cooldown_ms:
                     self._last_trigger_ms = now2
                     self._voiced_ms = 0
-                    self.log.info(f"🎤 Barge-in: voce umană detectată ({need_ms}ms)")
+                    self.log.info("🎤 Barge-in: voce umană detectată (%dms)", need_ms)
                     return True
                 self._voiced_ms = 0
                 return False
@@ -0,0 +1,189 @@
+# src/audio/echo_veto.py - veto pe similaritatea mic ↔ TTS redat recent
+from __future__ import annotations
+import threading, time
+from collections import deque
+from typing import Deque, Optional, Tuple
+import numpy as np
+
+from src.telemetry.metrics import echo_frames_vetoed
+
+
+class EchoVeto:
+    """
+    Compară frame-urile de la microfon cu audio-ul TTS redat recent (far-end)
+    prin cross-corelație normalizată calculată cu FFT pe o fereastră scurtă de lag.
+
+    - TTS-ul împinge fiecare WAV redat cu `push_reference()` imediat după pornirea player-ului;
+      referința e plasată la `now + play_offset_ms` (latența de pornire player → difuzor),
+      iar căutarea lag-ului (0..max_lag) acoperă doar restul drumului difuzor → mic.
+    - Inputul (record/barge) întreabă `is_echo()` ÎNAINTE de VAD/Cobra/ASR.
+    - Dacă nu s-a redat nimic în fereastră -> ieșire imediată (cost ~0 în liniște).
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        max_lag_ms: int = 300,      # întârzierea maximă player → difuzor → mic
+        history_ms: int = 4000,     # cât păstrăm din referință după ce s-a terminat
+        threshold: float = 0.6,     # corelația normalizată peste care frame-ul e eco
+        min_ref_dbfs: float = -55.0,
+        play_offset_ms: float = 80.0,  # pornirea player-ului (paplay/aplay/PortAudio) până la primul sample
+    ):
+        self.sr = int(sample_rate)
+        self.max_lag = int(self.sr * max_lag_ms / 1000.0)
+        self.history_s = history_ms / 1000.0
+        self.threshold = float(threshold)
+        self._min_ref_energy = (10.0 ** (min_ref_dbfs / 20.0)) ** 2
+        self.play_offset_s = max(0.0, float(play_offset_ms) / 1000.0)
+
+        self._lock = threading.Lock()
+        # segmente (t_start_monotonic, samples float32 @ self.sr)
+        self._segments: Deque[Tuple[float, np.ndarray]] = deque()
+        self.last_similarity: float = 0.0
+
+    @classmethod
+    def from_cfg(cls, cfg_audio: dict) -> Optional["EchoVeto"]:
+        if not bool(cfg_audio.get("echo_veto_enabled", True)):
+            return None
+        return cls(
+            sample_rate=int(cfg_audio.get("sample_rate", 16000)),
+            max_lag_ms=int(cfg_audio.get("echo_veto_max_lag_ms", 300)),
+            history_ms=int(cfg_audio.get("echo_veto_history_ms", 4000)),
+            threshold=float(cfg_audio.get("echo_veto_threshold", 0.6)),
+            min_ref_dbfs=float(cfg_audio.get("echo_veto_min_ref_dbfs", -55.0)),
+            play_offset_ms=float(cfg_audio.get("echo_veto_play_offset_ms", 80.0)),
+        )
+
+    # ——— far-end ———
+    def push_reference(self, pcm: np.ndarray, sr: int, t_start: Optional[float] = None):
+        """
+        Înregistrează audio-ul trimis spre difuzor (int16 sau float32, mono).
+        `t_start=None` => chemat imediat după pornirea player-ului: now + play_offset.
+        """
+        if pcm is None or len(pcm) == 0:
+            return
+        x = np.asarray(pcm)
+        if x.ndim == 2:
+            x = x.mean(axis=1)
+        x = x.astype(np.float32)
+        if np.issubdtype(np.asarray(pcm).dtype, np.integer):
+            x /= 32768.0
+        if int(sr) != self.sr:
+            n_out = int(round(len(x) * self.sr / float(sr)))
+            x = np.interp(
+                np.linspace(0.0, len(x) - 1, n_out, dtype=np.float64),
+                np.arange(len(x), dtype=np.float64), x,
+            ).astype(np.float32)
+        t0 = time.monotonic() + self.play_offset_s if t_start is None else float(t_start)
+        with self._lock:
+            self._segments.append((t0, x))
+            self._prune(t0)
+
+    def clear(self):
+        with self._lock:
+            self._segments.clear()
+
+    def _prune(self, now: float):
+        while self._segments:
+            t0, x = self._segments[0]
+            if t0 + len(x) / self.sr + self.history_s < now:
+                self._segments.popleft()
+            else:
+                break
+
+    def _reference_window(self, t_begin: float, n: int) -> Optional[np.ndarray]:
+        """Referința redată în [t_begin, t_begin + n/sr], cu zero unde nu s-a redat nimic."""
+        with self._lock:
+            self._prune(t_begin)
+            if not self._segments:
+                return None
+            out = None
+            for t0, x in self._segments:
+                off = int(round((t_begin - t0) * self.sr))  # unde începe fereastra în segment
+                a = max(0, off)
+                b = min(len(x), off + n)
+                if b <= a:
+                    continue
+                if out is None:
+                    out = np.zeros(n, dtype=np.float32)
+                out[a - off:b - off] = x[a:b]
+            return out
+
+    # ——— near-end ———
+    def similarity(self, pcm_i16: np.ndarray, t_end: Optional[float] = None) -> float:
+        """
+        Maximul cross-corelației normalizate dintre frame-ul de mic și referință,
+        pe lag-uri 0..max_lag (micul aude TTS-ul cu întârziere).
+        """
+        m = np.asarray(pcm_i16, dtype=np.float32) / 32768.0
+        n = len(m)
+        if n == 0:
+            return 0.0
+        t_end = time.monotonic() if t_end is None else float(t_end)
+        L = n + self.max_lag
+        ref = self._reference_window(t_end - L / self.sr, L)
+        if ref is None:
+            return 0.0
+
+        m = m - m.mean()
+        m_energy = float(np.dot(m, m))
+        if m_energy <= 1e-9 or float(np.dot(ref, ref)) / L < self._min_ref_energy:
+            return 0.0
+
+        nfft = 1 << int(L + n - 1).bit_length()
+        # corr[k] = sum_i ref[k + i] * m[i], pentru k = 0..max_lag
+        corr = np.fft.irfft(np.fft.rfft(ref, nfft) * np.conj(np.fft.rfft(m, nfft)), nfft)[:L - n + 1]
+
+        # energia referinței pe fiecare fereastră de lungime n (sume cumulative)
+        c2 = np.concatenate(([0.0], np.cumsum(ref.astype(np.float64) ** 2)))
+        win_energy = c2[n:] - c2[:-n]
+        denom = np.sqrt(np.maximum(win_energy, 1e-12) * m_energy)
+        valid = win_energy > self._min_ref_energy * n
+        if not np.any(valid):
+            return 0.0
+        return float(np.max(np.abs(corr[valid]) / denom[valid]))
+
+    def is_echo(self, pcm_i16: np.ndarray, t_end: Optional[float] = None) -> bool:
+        sim = self.similarity(pcm_i16, t_end)
+        self.last_similarity = sim
+        if sim >= self.threshold:
+            echo_frames_vetoed.inc()
+            return True
+        return False
+
+
+# ——— instanță partajată: TTS scrie referința, inputul o citește ———
+_shared: Optional[EchoVeto] = None
+
+def install_echo_veto(veto: Optional[EchoVeto]):
+    global _shared
+    _shared = veto
+
+def get_echo_veto() -> Optional[EchoVeto]:
+    return _shared
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: cost CPU per frame (python -m src.audio.echo_veto)
+    sr, block_ms, frames = 16000, 20, 2000
+    n = sr * block_ms // 1000
+    rng = np.random.default_rng(0)
+    tts = (rng.standard_normal(sr * 3) * 0.2).astype(np.float32)
+    v = EchoVeto(sample_rate=sr)
+    t_play = 100.0
+    v.push_reference(tts, sr, t_start=t_play)
+
+    delay = int(0.08 * sr)
+    hits = 0
+    t0 = time.perf_counter()
+    for k in range(frames):
+        end = (k % 100 + 20) * n
+        mic = 0.5 * tts[end - n - delay:end - delay] + rng.standard_normal(n).astype(np.float32) * 0.02
+        hits += v.is_echo((mic * 32767).astype(np.int16), t_end=t_play + end / sr)
+    dt = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    for _ in range(frames):
+        v.is_echo(np.zeros(n, dtype=np.int16), t_end=t_play + 60.0)
+    dt_idle = time.perf_counter() - t1
+    print(f"echo frames: {dt / frames * 1e6:.1f} µs/frame (vetoed {hits}/{frames}) | "
+          f"idle: {dt_idle / frames * 1e6:.1f} µs/frame | max_lag={v.max_lag} samples")
@@ -0,0 +1,78 @@
+# src/audio/health.py - sănătatea stream-urilor de intrare: xrun-uri, cadre pierdute, coadă, jitter
+from __future__ import annotations
+import queue, time
+from typing import Dict, Optional
+
+from src.telemetry.metrics import (
+    audio_xruns, audio_frames_dropped, audio_queue_high_water, audio_callback_jitter,
+)
+
+_high_water: Dict[str, int] = {}  # maxim per stream de la pornire (instanțele sunt per înregistrare)
+
+
+class StreamHealth:
+    """
+    Instrumentează un callback sounddevice (`stream` ∈ record | barge | wake):
+      - flag-urile `status` (input_overflow / input_underflow…) -> audio_xruns_total{stream,kind}
+      - intervalul dintre callback-uri vs. perioada blocului -> audio_callback_jitter_seconds{stream}
+      - `put()` în coada mărginită: la coadă plină aruncă cel mai VECHI bloc (latență mărginită)
+        și numără audio_frames_dropped_total{stream}; adâncimea maximă -> audio_queue_high_water{stream}
+    Totul rulează pe thread-ul audio: doar contoare, fără I/O; logul e rar (o dată la `log_every_s`).
+    """
+
+    def __init__(self, stream: str, block_s: float, logger=None, log_every_s: float = 5.0):
+        self.stream = stream
+        self.block_s = float(block_s)
+        self.log = logger
+        self.log_every_s = float(log_every_s)
+        self._t_prev: Optional[float] = None
+        self._last_log = 0.0
+        self._over = audio_xruns.labels(stream=stream, kind="input_overflow")
+        self._under = audio_xruns.labels(stream=stream, kind="input_underflow")
+        self._other = audio_xruns.labels(stream=stream, kind="other")
+        self._dropped = audio_frames_dropped.labels(stream=stream)
+        self._hwm = audio_queue_high_water.labels(stream=stream)
+        self._jitter = audio_callback_jitter.labels(stream=stream)
+
+    def on_callback(self, status, t: Optional[float] = None) -> float:
+        """Apelat la începutul callback-ului; întoarce timestamp-ul monoton folosit."""
+        t = time.monotonic() if t is None else t
+        if self._t_prev is not None:
+            self._jitter.observe(abs((t - self._t_prev) - self.block_s))
+        self._t_prev = t
+        if status:
+            over = bool(getattr(status, "input_overflow", False))
+            under = bool(getattr(status, "input_underflow", False))
+            if over:
+                self._over.inc()
+            if under:
+                self._under.inc()
+            if not (over or under):
+                self._other.inc()
+            if self.log and t - self._last_log >= self.log_every_s:
+                self._last_log = t
+                self.log.warning(f"⚠️ Audio {self.stream}: status={status} (CPU încărcat / buffer prea mic?)")
+        return t
+
+    def put(self, q: "queue.Queue", item) -> None:
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            self._dropped.inc()
+            try:
+                q.put_nowait(item)
+            except queue.Full:
+                self._dropped.inc()
+        depth = q.qsize()
+        if depth > _high_water.get(self.stream, 0):
+            _high_water[self.stream] = depth
+            self._hwm.set(depth)
+
+    @staticmethod
+    def queue_size(block_ms: float, max_buffer_s: float = 2.0) -> int:
+        """Câte blocuri încap în `max_buffer_s` secunde de audio (minim 8)."""
+        return max(8, int(max_buffer_s * 1000.0 / max(1.0, float(block_ms))))
@@ -1,6 +1,7 @@
 # src/audio/input.py
 import queue, time, struct
 from pathlib import Path
+from typing import Callable, Optional
 import numpy as np
 import sounddevice as sd
 import soundfile as sf
@@ -8,6 +9,9 @@ import soundfile as sf
 from .devices import choose_input_device, list_input_devices
 from .vad import VAD
 from .processing import AudioEffects
+from .echo_veto import get_echo_veto
+from .health import StreamHealth
+from src.telemetry.tracing import tracer
 
 # Import opțional: nu crăpa dacă nu există webrtc AEC
 try:
@@ -21,13 +25,17 @@ def _float_to_int16(audio_f32: np.ndarray) -> np.ndarray:
     return (audio_f32 * 32767.0).astype(np.int16)
 
 
-def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger):
+def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger,
+                         on_pause: Optional[Callable[[np.ndarray, int], None]] = None):
     """
     Înregistrează mono 16kHz și se oprește după `silence_ms_to_end` ms de liniște
     (detectată de VAD) sau după `max_record_seconds` (fallback).
 
     Anti-spam: dacă vocea cumulată < `min_valid_seconds` -> NU salvează fișierul, întoarce voice_sec.
 
+    `on_pause(audio_i16, voiced_ms)` (opțional) e apelat o dată pe pauză, după `pause_ms_to_speculate`
+    ms de liniște care urmează vocii — înainte de endpoint (pentru transcript/LLM speculativ).
+
     Returnează: (path, voice_seconds)
     """
     sr = int(cfg_audio["sample_rate"])
@@ -35,6 +43,7 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger):
     silence_ms_to_end = int(cfg_audio["silence_ms_to_end"])
     max_secs = int(cfg_audio["max_record_seconds"])
     min_valid_seconds = float(cfg_audio.get("min_valid_seconds", 0.5))
+    pause_ms = int(cfg_audio.get("pause_ms_to_speculate", 200))
 
     assert block_ms in (10, 20, 30), "VAD frame must be 10/20/30 ms"
     block_size = int(sr * (block_ms / 1000.0))
@@ -67,19 +76,23 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger):
         logger=logger
     )
 
-    q = queue.Queue()
+    # coadă mărginită (~input_queue_max_s de audio): dacă bucla rămâne în urmă, pierdem blocuri vechi, numărate
+    q = queue.Queue(maxsize=StreamHealth.queue_size(block_ms, float(cfg_audio.get("input_queue_max_s", 2.0))))
+    health = StreamHealth("record", block_ms / 1000.0, logger)
     vad = VAD(sr, cfg_audio.get("vad_aggressiveness", 2), block_ms)
+    echo_veto = get_echo_veto()
 
     logger.info(f"🎤 Vorbește… (se oprește după {silence_ms_to_end}ms de liniște)")
     started = time.time()
     last_voice_ms = 0
     voiced_ms_total = 0       # — cumulăm DOAR timpul de voce detectată (anti-spam)
+    pause_fired = False
+    t_last_voice = None       # momentul (monoton) ultimului bloc cu voce — sfârșitul vorbirii
     collected = []
 
     def callback(indata, frames, time_info, status):
-        if status:
-            logger.debug(f"Audio status: {status}")
-        q.put(indata.copy())
+        t = health.on_callback(status)
+        health.put(q, (t, indata.copy()))
 
     with sd.InputStream(
         channels=1,
@@ -91,7 +104,7 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger):
     ):
         while True:
             try:
-                block = q.get(timeout=0.5)  # float32 [-1,1], mono
+                t_block, block = q.get(timeout=0.5)  # float32 [-1,1], mono
             except queue.Empty:
                 if time.time() - started > max_secs:
                     break
@@ -99,6 +112,14 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger):
 
             pcm_i16 = _float_to_int16(block[:, 0])
 
+            # Veto anti-eco: frame corelat cu TTS-ul redat recent -> liniște, fără VAD/ASR
+            if echo_veto is not None and echo_veto.is_echo(pcm_i16, t_end=t_block):
+                collected.append(np.zeros_like(pcm_i16))
+                last_voice_ms += block_ms
+                if last_voice_ms >= silence_ms_to_end or time.time() - started > max_secs:
+                    break
+                continue
+
             # AEC (opțional, dacă există)
             if aec:
                 try:
@@ -115,10 +136,21 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger):
             pcm_bytes = struct.pack("<%dh" % len(pcm_i16), *pcm_i16)
             if vad.is_speech(pcm_bytes):
                 last_voice_ms = 0
+                t_last_voice = t_block
                 voiced_ms_total += block_ms
+                pause_fired = False
             else:
                 last_voice_ms += block_ms
 
+            # pauză scurtă după voce (dar încă înainte de endpoint) -> hook speculativ
+            if (on_pause and not pause_fired and pause_ms <= last_voice_ms < silence_ms_to_end
+                    and voiced_ms_total >= min_valid_seconds * 1000):
+                pause_fired = True
+                try:
+                    on_pause(np.concatenate(collected, axis=0), voiced_ms_total)
+                except Exception as e:
+                    logger.debug(f"on_pause hook error: {e}")
+
             if last_voice_ms >= silence_ms_to_end:
                 break
             if time.time() - started > max_secs:
@@ -130,6 +162,11 @@ def record_until_silence(cfg_audio: dict, out_wav_path: Path, logger):
         except Exception:
             pass
 
+    # tracing: sfârșitul vorbirii vs. decizia de endpoint (diferența = așteptarea VAD)
+    if t_last_voice is not None:
+        tracer.mark("capture_end", t=t_last_voice)
+    tracer.mark("vad_endpoint")
+
     audio = np.concatenate(collected, axis=0) if collected else np.zeros(1, dtype=np.int16)
     voice_sec = voiced_ms_total / 1000.0
 
@@ -6,6 +6,7 @@ import numpy as np
 import sounddevice as sd
 
 from .devices import choose_input_device
+from .health import StreamHealth
 
 def wait_for_wake(
     cfg_audio: dict,
@@ -47,17 +48,12 @@ def wait_for_wake(
         if logger:
             logger.info(f"🎧 Standby (Porcupine) — sr={sr}, frame={frame_len}, sens={sensitivity}")
 
+        health = StreamHealth("wake", frame_len / float(sr), logger)
+
         def cb(indata, frames, time_info, status):
             # indata: int16 mono (dacă cerem dtype="int16")
-            if status and logger:
-                logger.debug(f"Porcupine input status: {status}")
-            try:
-                q.put_nowait(indata.copy())
-            except queue.Full:
-                try: q.get_nowait()
-                except Exception: pass
-                try: q.put_nowait(indata.copy())
-                except Exception: pass
+            health.on_callback(status)
+            health.put(q, indata.copy())
 
         stream = sd.InputStream(
             channels=1,
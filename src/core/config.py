@@ -36,6 +36,7 @@ def load_all() -> Dict[str, Any]:
         "tts":   load_yaml("tts.yaml"),
         "wake":  load_yaml("wake.yaml"),
         "route": load_yaml("routing.yaml"),
+        "faq":   load_yaml("faq.yaml") if (CFG / "faq.yaml").exists() else {},
         "paths": {
             "data": str((ROOT / "data").absolute()),
             "models": str((ROOT / "models").absolute()),
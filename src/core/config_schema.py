@@ -1,6 +1,6 @@
 # src/core/config_schema.py
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 class AudioCfg(BaseModel):
     model_config = ConfigDict(extra="allow", protected_namespaces=())
@@ -30,7 +30,7 @@ class ASRCfg(BaseModel):
     vad_min_silence_ms: int = Field(300, ge=100, le=1500)
 
 class LLMCfg(BaseModel):
-    provider: str = Field("ollama")
+    provider: str = Field("ollama")                  # ollama | openai | inprocess | rule
     host: str = Field("http://127.0.0.1:11434")
     model: str = Field("llama3.2")
     max_tokens: int = Field(120, ge=16, le=4096)
@@ -39,6 +39,50 @@ class LLMCfg(BaseModel):
     system_prompt: Optional[str] = ""
     default_mode: Optional[str] = Field("precise")
     strict_facts: Optional[bool] = Field(True)
+    timeout_s: float = Field(120.0, ge=1.0, le=600.0)
+    http_pool_maxsize: int = Field(4, ge=1, le=64)
+    preconnect: bool = Field(True)
+    warmup_on_start: bool = Field(True)
+    warmup_on_wake: bool = Field(True)
+    keep_alive_s: int = Field(300, ge=0, le=86400)
+    keep_alive_margin_s: int = Field(300, ge=0, le=86400)
+    cold_load_threshold_ms: float = Field(500.0, ge=0.0)
+    chat_history: bool = Field(True)
+    history_budget_tokens: int = Field(1024, ge=64, le=32768)
+    history_max_turns: int = Field(8, ge=1, le=100)
+    response_cache: bool = Field(True)
+    response_cache_max_entries: int = Field(256, ge=1, le=100000)
+    response_cache_ttl_s: float = Field(86400.0, ge=0.0)
+    response_cache_max_words: int = Field(8, ge=1, le=64)
+    speculative_enabled: bool = Field(False)
+    speculative_max_distance: float = Field(0.15, ge=0.0, le=1.0)
+    base_url: Optional[str] = None                 # provider openai: OpenAI / llama.cpp server / vLLM / LM Studio
+    api_key_env: str = Field("OPENAI_API_KEY")
+    openai_stream_usage: bool = Field(True)        # stream_options.include_usage (tokeni în metrici)
+    gguf_path: Optional[str] = None                # provider inprocess (llama-cpp-python)
+    model_path: Optional[str] = None               # alias pentru gguf_path
+    n_ctx: int = Field(2048, ge=256)
+    n_threads: int = Field(0, ge=0)                # 0 = jumătate din nuclee (decodare)
+    n_threads_batch: int = Field(0, ge=0)          # 0 = toate nucleele (evaluare prompt)
+    n_gpu_layers: int = Field(0)
+    use_mmap: bool = Field(True)
+    use_mlock: bool = Field(False)
+    length_governor: bool = Field(True)
+    spoken_max_sentences: int = Field(3, ge=1, le=20)
+    spoken_max_seconds: float = Field(12.0, gt=0.0)
+    speech_chars_per_s: float = Field(14.0, gt=0.0)   # estimare până când pacer-ul măsoară vocea reală
+    tiered_mode: Literal["off", "lead", "race"] = Field("off")
+    fast_model: Optional[str] = ""
+    lead_max_tokens: int = Field(16, ge=1, le=256)
+    lead_stop: Optional[List[str]] = None
+
+    @field_validator("tiered_mode", mode="before")
+    @classmethod
+    def check_tiered_mode(cls, v):
+        # YAML 1.1 citește `off` nequotat ca False
+        if v is None or v is False:
+            return "off"
+        return str(v).strip().lower()
 
 class PiperCfg(BaseModel):
     model_config = ConfigDict(protected_namespaces=(), extra="allow")
@@ -75,8 +119,20 @@ class WakeCfg(BaseModel):
     porcupine: Optional[PorcupineCfg] = None
 
 class RouteCfg(BaseModel):
+    enabled: bool = True
+    fuzzy_threshold: float = Field(90, ge=0, le=100)
+    fuzzy_max_words: int = Field(6, ge=1, le=50)
     rules: List[Dict[str, Any]] = []
 
+class FaqCfg(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    enabled: bool = False
+    source: Optional[str] = None                       # implicit configs/faq.yaml
+    answer_threshold: float = Field(0.55, ge=0.0, le=1.0)
+    context_threshold: float = Field(0.35, ge=0.0, le=1.0)
+    top_k: int = Field(2, ge=1, le=10)
+    entries: List[Dict[str, Any]] = []
+
 class PathsCfg(BaseModel):
     data: str
     models: str
@@ -88,6 +144,7 @@ class AppCfg(BaseModel):
     tts: TTSCfg
     wake: WakeCfg
     route: RouteCfg
+    faq: FaqCfg = FaqCfg()
     paths: PathsCfg
 
 def validate_all(raw: dict) -> dict:
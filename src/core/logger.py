@@ -1,5 +1,14 @@
-import logging, os, sys
-from logging.handlers import RotatingFileHandler
+import atexit, copy, json, logging, os, queue, sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Format JSON (LOG_FORMAT=json): python-json-logger dacă există, altfel un formatter minimal
+try:
+    from pythonjsonlogger.json import JsonFormatter as _JsonFormatter  # python-json-logger >= 3
+except ImportError:
+    try:
+        from pythonjsonlogger.jsonlogger import JsonFormatter as _JsonFormatter
+    except ImportError:
+        _JsonFormatter = None
 
 TRACE_LEVEL = 5
 logging.addLevelName(TRACE_LEVEL, "TRACE")
@@ -26,9 +35,71 @@ class ColorFormatter(logging.Formatter):
         level = record.levelname
         color = _Color.MAP.get(level, "")
         end = _Color.END if color else ""
+        # copie: același record ajunge și la handler-ul de fișier (fără culori)
+        record = copy.copy(record)
         record.levelname = f"{color}{level}{end}"
         return super().format(record)
 
+class _MiniJsonFormatter(logging.Formatter):
+    """Fallback când python-json-logger lipsește: un obiect JSON pe linie."""
+    def format(self, record: logging.LogRecord) -> str:
+        doc = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            doc["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(doc, ensure_ascii=False)
+
+def _json_formatter() -> logging.Formatter:
+    if _JsonFormatter is not None:
+        return _JsonFormatter("%(asctime)s %(levelname)s %(name)s %(threadName)s %(message)s",
+                              rename_fields={"asctime": "ts", "levelname": "level", "name": "logger"},
+                              json_ensure_ascii=False)
+    return _MiniJsonFormatter()
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Pune record-ul în coadă NEFORMATAT: `msg % args`, culorile, JSON-ul și I/O-ul se fac
+    pe thread-ul listener-ului, nu în bucla audio / TTS. Coada e mărginită: dacă writer-ul
+    rămâne în urmă, mesajele noi se pierd (numărate) în loc să blocheze apelantul.
+    """
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped:
+            n, self.dropped = self.dropped, 0
+            lost = logging.LogRecord(record.name, logging.WARNING, __file__, 0,
+                                     "⚠️ %d mesaje de log pierdute (coada logger plină)", (n,), None)
+            try:
+                self.queue.put_nowait(lost)
+            except queue.Full:
+                self.dropped += n
+
+_listeners = []
+
+def _stop_listeners():
+    for lst in _listeners:
+        try:
+            lst.stop()  # golește coada înainte de ieșire
+        except Exception:
+            pass
+
+atexit.register(_stop_listeners)
+
 def _parse_level(name: str) -> int:
     name = (name or "").upper().strip()
     return {
@@ -40,26 +111,45 @@ def setup_logger(name: str = "bot"):
     level = _parse_level(os.getenv("LOG_LEVEL", "INFO"))
 
     logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger  # deja configurat (evită handler-e/listener-e duplicate)
     logger.setLevel(level)
     logger.propagate = False
 
     fmt = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
     datefmt = "%H:%M:%S"
+    as_json = os.getenv("LOG_FORMAT", "text").strip().lower() == "json"
 
+    handlers = []
     # Console
     ch = logging.StreamHandler(sys.stdout)
     ch.setLevel(level)
-    ch.setFormatter(ColorFormatter(fmt=fmt, datefmt=datefmt))
-    logger.addHandler(ch)
+    ch.setFormatter(_json_formatter() if as_json else ColorFormatter(fmt=fmt, datefmt=datefmt))
+    handlers.append(ch)
 
     # File (rotativ), dacă vrei log pe disc
     log_dir = os.getenv("LOG_DIR", "").strip()
     if log_dir:
         os.makedirs(log_dir, exist_ok=True)
-        fh = RotatingFileHandler(os.path.join(log_dir, "app.log"), maxBytes=5_000_000, backupCount=3, encoding="utf-8")
+        fh = RotatingFileHandler(os.path.join(log_dir, "app.jsonl" if as_json else "app.log"),
+                                 maxBytes=5_000_000, backupCount=3, encoding="utf-8")
         fh.setLevel(level)
-        fh.setFormatter(logging.Formatter(fmt=fmt, datefmt=datefmt))
-        logger.addHandler(fh)
+        fh.setFormatter(_json_formatter() if as_json else logging.Formatter(fmt=fmt, datefmt=datefmt))
+        handlers.append(fh)
+
+    # LOG_ASYNC=0 => handler-e sincrone (depanare: ordinea exactă față de print-uri)
+    if os.getenv("LOG_ASYNC", "1") == "1":
+        q = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_MAX", "10000")))
+        listener = QueueListener(q, *handlers, respect_handler_level=True)
+        listener.start()
+        th = getattr(listener, "_thread", None)
+        if th is not None:
+            th.name = f"log-writer-{name}"  # vizibil în /debug/threads
+        _listeners.append(listener)
+        logger.addHandler(_LazyQueueHandler(q))
+    else:
+        for h in handlers:
+            logger.addHandler(h)
 
-    logger.debug("Logger ready (level=%s)", logging.getLevelName(level))
+    logger.debug("Logger ready (level=%s, format=%s)", logging.getLevelName(level), "json" if as_json else "text")
     return logger
@@ -0,0 +1,197 @@
+# src/core/router.py
+from __future__ import annotations
+import re, shutil, subprocess, time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from rapidfuzz import fuzz, process
+from src.utils.textnorm import normalize_text
+
+_RO_DAYS = ["luni", "marți", "miercuri", "joi", "vineri", "sâmbătă", "duminică"]
+_RO_MONTHS = ["ianuarie", "februarie", "martie", "aprilie", "mai", "iunie", "iulie",
+              "august", "septembrie", "octombrie", "noiembrie", "decembrie"]
+
+
+@dataclass
+class RouteMatch:
+    intent: str
+    method: str      # exact | contains | regex | fuzzy
+    score: float
+    rule: Dict[str, Any]
+
+
+@dataclass
+class RouteReply:
+    text: str = ""
+    end_session: bool = False
+
+
+# ——— handler-e locale (răspund în microsecunde, fără LLM) ———
+def _h_time(m: RouteMatch, lang: str, ctx: Dict[str, Any]) -> RouteReply:
+    now = datetime.now()
+    if lang == "ro":
+        return RouteReply(f"Este ora {now.hour}:{now.minute:02d}.")
+    return RouteReply(f"It's {now.strftime('%I:%M %p').lstrip('0')}.")
+
+def _h_date(m: RouteMatch, lang: str, ctx: Dict[str, Any]) -> RouteReply:
+    d = datetime.now()
+    if lang == "ro":
+        return RouteReply(f"Azi este {_RO_DAYS[d.weekday()]}, {d.day} {_RO_MONTHS[d.month - 1]} {d.year}.")
+    return RouteReply(f"Today is {d.strftime('%A, %B')} {d.day}, {d.year}.")
+
+def _h_repeat(m: RouteMatch, lang: str, ctx: Dict[str, Any]) -> RouteReply:
+    last = (ctx.get("last_reply") or "").strip()
+    if last:
+        return RouteReply(last)
+    return RouteReply("Nu am spus încă nimic." if lang == "ro" else "I haven't said anything yet.")
+
+def _h_volume(m: RouteMatch, lang: str, ctx: Dict[str, Any]) -> RouteReply:
+    step = str(m.rule.get("step", "+10%"))
+    pactl = shutil.which("pactl")
+    ok = False
+    if pactl:
+        try:
+            subprocess.run([pactl, "set-sink-volume", "@DEFAULT_SINK@", step], check=True, timeout=2,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            ok = True
+        except Exception:
+            ok = False
+    louder = not step.startswith("-")
+    if lang == "ro":
+        if not ok:
+            return RouteReply("Nu pot schimba volumul acum.")
+        return RouteReply("Am dat mai tare." if louder else "Am dat mai încet.")
+    if not ok:
+        return RouteReply("I can't change the volume right now.")
+    return RouteReply("Volume up." if louder else "Volume down.")
+
+def _h_stop(m: RouteMatch, lang: str, ctx: Dict[str, Any]) -> RouteReply:
+    # "taci"/"stop talking": nu răspundem nimic, rămânem în sesiune
+    return RouteReply("")
+
+def _h_say(m: RouteMatch, lang: str, ctx: Dict[str, Any]) -> RouteReply:
+    reply = m.rule.get("reply") or {}
+    if isinstance(reply, str):
+        return RouteReply(reply)
+    return RouteReply(reply.get(lang) or reply.get("en") or "")
+
+HANDLERS: Dict[str, Callable[[RouteMatch, str, Dict[str, Any]], RouteReply]] = {
+    "time": _h_time,
+    "date": _h_date,
+    "repeat": _h_repeat,
+    "volume": _h_volume,
+    "stop": _h_stop,
+    "say": _h_say,
+}
+
+
+class IntentRouter:
+    """
+    Fast-path determinist între ASR și LLM, compilat din configs/routing.yaml:
+      1) `phrases`  -> potrivire exactă pe textul normalizat (dict, O(1))
+      2) `contains` -> cuvinte-cheie cu graniță de cuvânt, toate într-un singur regex
+      3) `regex`    -> expresii proprii, precompilate
+      4) `phrases`  -> fuzzy (rapidfuzz) doar pentru fraze scurte
+    Regula fără handler dedicat dar cu `reply: {ro, en}` => răspuns static.
+    """
+
+    def __init__(self, cfg_route: Dict[str, Any], logger=None):
+        cfg_route = cfg_route or {}
+        self.log = logger
+        self.enabled = bool(cfg_route.get("enabled", True))
+        self.fuzzy_threshold = float(cfg_route.get("fuzzy_threshold", 90))
+        self.fuzzy_max_words = int(cfg_route.get("fuzzy_max_words", 6))
+        self.rules: List[Dict[str, Any]] = []
+
+        self._exact: Dict[str, int] = {}
+        self._fuzzy_choices: List[str] = []
+        self._fuzzy_rule: List[int] = []
+        self._regex: List[Tuple[re.Pattern, int]] = []
+        contains_alts: List[str] = []
+
+        for rule in cfg_route.get("rules") or []:
+            intent = str(rule.get("intent") or "").strip()
+            handler = rule.get("handler") or intent
+            if handler not in HANDLERS:
+                handler = "say" if rule.get("reply") else None
+            if not intent or handler is None:
+                if logger: logger.warning(f"Routing: regulă ignorată (intent/handler necunoscut): {rule}")
+                continue
+            idx = len(self.rules)
+            self.rules.append({**rule, "intent": intent, "handler": handler})
+            for p in rule.get("phrases") or []:
+                n = normalize_text(p)
+                if n:
+                    self._exact.setdefault(n, idx)
+                    self._fuzzy_choices.append(n)
+                    self._fuzzy_rule.append(idx)
+            kws = [normalize_text(k) for k in (rule.get("contains") or [])]
+            kws = [k for k in kws if k]
+            if kws:
+                alt = "|".join(re.escape(k) for k in sorted(kws, key=len, reverse=True))
+                contains_alts.append(f"(?P<r{idx}>\\b(?:{alt})\\b)")
+            for rx in rule.get("regex") or []:
+                try:
+                    self._regex.append((re.compile(rx, re.IGNORECASE), idx))
+                except re.error as e:
+                    if logger: logger.warning(f"Routing: regex invalid pentru '{intent}': {rx} ({e})")
+
+        self._contains = re.compile("|".join(contains_alts)) if contains_alts else None
+        if logger and self.enabled:
+            logger.info(f"🧭 Intent router: {len(self.rules)} reguli, {len(self._exact)} fraze, "
+                        f"{len(self._regex)} regex")
+
+    def __bool__(self) -> bool:
+        return self.enabled and bool(self.rules)
+
+    def route(self, text: str) -> Optional[RouteMatch]:
+        if not self:
+            return None
+        t = normalize_text(text)
+        if not t:
+            return None
+
+        idx = self._exact.get(t)
+        if idx is not None:
+            return RouteMatch(self.rules[idx]["intent"], "exact", 100.0, self.rules[idx])
+
+        if self._contains is not None:
+            m = self._contains.search(t)
+            if m:
+                idx = int(m.lastgroup[1:])
+                return RouteMatch(self.rules[idx]["intent"], "contains", 100.0, self.rules[idx])
+
+        for rx, idx in self._regex:
+            if rx.search(t):
+                return RouteMatch(self.rules[idx]["intent"], "regex", 100.0, self.rules[idx])
+
+        if self._fuzzy_choices and len(t.split()) <= self.fuzzy_max_words:
+            best = process.extractOne(t, self._fuzzy_choices, scorer=fuzz.ratio,
+                                      score_cutoff=self.fuzzy_threshold)
+            if best:
+                idx = self._fuzzy_rule[best[2]]
+                return RouteMatch(self.rules[idx]["intent"], "fuzzy", float(best[1]), self.rules[idx])
+        return None
+
+    def handle(self, match: RouteMatch, lang: str = "en", **ctx) -> RouteReply:
+        reply = HANDLERS[match.rule["handler"]](match, "ro" if str(lang).startswith("ro") else "en", ctx)
+        if match.rule.get("end_session"):
+            reply.end_session = True
+        return reply
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: python -m src.core.router
+    from src.core.config import load_yaml
+    r = IntentRouter(load_yaml("routing.yaml"))
+    samples = ["cât e ora", "what time is it please", "ce dată e azi", "louder",
+               "repetă te rog", "tell me about the history of Romania", "what is the capital of france"]
+    n = 20000
+    t0 = time.perf_counter()
+    for i in range(n):
+        r.route(samples[i % len(samples)])
+    dt = (time.perf_counter() - t0) / n
+    for s in samples:
+        m = r.route(s)
+        print(f"{s!r:45} -> {m.intent + ' (' + m.method + ')' if m else '— (LLM)'}")
+    print(f"route(): {dt * 1e6:.1f} µs/utterance over {n} calls")
@@ -0,0 +1,64 @@
+# src/llm/conversation.py
+from __future__ import annotations
+from typing import Dict, List
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimare ieftină (~4 caractere/token) — suficientă pentru buget, fără tokenizer."""
+    return max(1, (len(text or "") + 3) // 4)
+
+
+class Conversation:
+    """
+    Istoric de sesiune pentru /api/chat:
+      - mesajul `system` rămâne primul și identic între ture => Ollama refolosește
+        KV-cache-ul pentru prefixul stabil (system + ture vechi neschimbate)
+      - când istoricul depășește bugetul, taie cele mai vechi ture în BLOC
+        (jumătate din istoric), ca prefixul să se schimbe rar, nu la fiecare tură
+    """
+
+    def __init__(self, budget_tokens: int = 1024, max_turns: int = 8):
+        self.budget_tokens = int(budget_tokens)
+        self.max_turns = int(max_turns)
+        self._turns: List[Dict[str, str]] = []  # perechi user/assistant, aplatizate
+        self._tokens = 0
+        self.truncations = 0
+
+    def reset(self):
+        self._turns = []
+        self._tokens = 0
+
+    @property
+    def history_tokens(self) -> int:
+        return self._tokens
+
+    def __len__(self) -> int:
+        return len(self._turns) // 2
+
+    def messages(self, system: str, user_content: str) -> List[Dict[str, str]]:
+        msgs: List[Dict[str, str]] = []
+        if system:
+            msgs.append({"role": "system", "content": system})
+        msgs.extend(self._turns)
+        msgs.append({"role": "user", "content": user_content})
+        return msgs
+
+    def add(self, user_content: str, assistant_content: str):
+        assistant_content = (assistant_content or "").strip()
+        if not assistant_content:
+            return  # tură anulată înainte de primul token — nu o reținem
+        self._turns.append({"role": "user", "content": user_content})
+        self._turns.append({"role": "assistant", "content": assistant_content})
+        self._tokens += estimate_tokens(user_content) + estimate_tokens(assistant_content)
+        if self._tokens > self.budget_tokens or len(self) > self.max_turns:
+            self._truncate()
+
+    def _truncate(self):
+        # păstrează cel mult jumătate din ture (cele mai noi) și apoi cât încape în buget
+        keep = max(0, min(len(self) // 2, self.max_turns // 2))
+        turns = self._turns[len(self._turns) - 2 * keep:] if keep else []
+        while turns and sum(estimate_tokens(m["content"]) for m in turns) > self.budget_tokens // 2:
+            turns = turns[2:]
+        self._turns = turns
+        self._tokens = sum(estimate_tokens(m["content"]) for m in turns)
+        self.truncations += 1
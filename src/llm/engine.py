@@ -1,11 +1,163 @@
 # src/llm/engine.py
 from __future__ import annotations
-from typing import Dict, Optional
-import os, requests, json
-from src.telemetry.metrics import observe_hist, llm_latency, llm_first_token_latency, wrap_stream_for_first_token
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+import os, re, requests, json, threading, time, hashlib, queue, weakref
+from requests.adapters import HTTPAdapter
+from src.llm.conversation import Conversation
+from src.llm.response_cache import ResponseCache, cache_key
+from src.utils.textnorm import normalize_text
+from src.telemetry.metrics import (
+    observe_hist, llm_latency, llm_first_token_latency, wrap_stream_for_first_token,
+    llm_first_token_by_load, llm_cold_loads, llm_prompt_eval_latency, llm_prompt_tokens,
+    llm_tokens_saved, llm_cache_hits, llm_cache_misses, llm_tier_first_token, llm_tier_race_wins, metric_label,
+)
+
+try:
+    import orjson  # type: ignore
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+    _loads = json.loads
+
+UNKNOWN_EN = "That’s outside my current knowledge, but I’ll note it for improvement."
+UNKNOWN_RO = "Interesant, Nu am răspunsul încă, dar exact întrebări ca asta mă ajută să devin mai bun."
+
+
+def unknown_reply(lang_hint: str) -> str:
+    return UNKNOWN_RO if str(lang_hint).lower().startswith("ro") else UNKNOWN_EN
+
+
+def _iter_ndjson_tokens(resp, field=("response",), stats: Optional[dict] = None) -> Iterator[str]:
+    """
+    Decodează NDJSON direct din bytes (fără iter_lines/decode_unicode) și
+    coalesează tokenii care sosesc în aceeași citire de pe socket.
+    `field` = calea către text în fiecare obiect (/api/generate: response, /api/chat: message.content).
+    Dacă primește `stats`, copiază acolo obiectul final (`done: true`) cu timpii Ollama.
+    """
+    def _tok(obj) -> str:
+        for key in field:
+            obj = obj.get(key) if isinstance(obj, dict) else None
+        return obj or ""
+
+    rem = b""
+    for chunk in resp.iter_content(chunk_size=None):
+        if not chunk:
+            continue
+        data = rem + chunk if rem else chunk
+        lines = data.split(b"\n")
+        rem = lines.pop()
+        out = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                obj = _loads(line)
+            except ValueError:
+                continue
+            tok = _tok(obj)
+            if tok:
+                out.append(tok)
+                if stats is not None:
+                    stats["_tokens"] = stats.get("_tokens", 0) + 1
+            if stats is not None and obj.get("done"):
+                stats.update(obj)
+        if out:
+            yield "".join(out)
+    if rem.strip():
+        try:
+            tok = _tok(_loads(rem))
+        except ValueError:
+            tok = ""
+        if tok:
+            yield tok
+
+def _iter_sse_tokens(resp, field=None, stats: Optional[dict] = None) -> Iterator[str]:
+    """
+    Server-Sent Events de la endpoint-uri OpenAI-compatibile (/v1/chat/completions, stream=true):
+    linii `data: {...}` cu `choices[0].delta.content`, terminate de `data: [DONE]`.
+    Coalescează ca NDJSON; `usage` (dacă serverul îl trimite) ajunge în `stats`
+    sub numele Ollama (prompt_eval_count / eval_count) pentru aceleași metrici.
+    """
+    rem = b""
+    for chunk in resp.iter_content(chunk_size=None):
+        if not chunk:
+            continue
+        data = rem + chunk if rem else chunk
+        lines = data.split(b"\n")
+        rem = lines.pop()
+        out = []
+        for line in lines:
+            line = line.strip()
+            if not line.startswith(b"data:"):
+                continue
+            line = line[5:].strip()
+            if line == b"[DONE]":
+                continue  # citim până la capăt => conexiunea rămâne refolosibilă în pool
+            try:
+                obj = _loads(line)
+            except ValueError:
+                continue
+            for choice in obj.get("choices") or []:
+                tok = (choice.get("delta") or {}).get("content") or ""
+                if tok:
+                    out.append(tok)
+                    if stats is not None:
+                        stats["_tokens"] = stats.get("_tokens", 0) + 1
+            usage = obj.get("usage")
+            if stats is not None and usage:
+                stats["prompt_eval_count"] = usage.get("prompt_tokens") or 0
+                stats["eval_count"] = usage.get("completion_tokens") or 0
+        if out:
+            yield "".join(out)
+
+
+class _ActiveStream:
+    __slots__ = ("resp", "scope", "cancelled", "reason")
+
+    def __init__(self, resp, scope: "_CancelScope"):
+        self.resp = resp
+        self.scope = scope
+        self.cancelled = False
+        self.reason = ""
+
+
+class _CancelScope:
+    """Un singur generate_stream: toate cererile lui (lead/slow/race) se anulează împreună, ale altora nu."""
+    __slots__ = ("cancelled", "reason", "__weakref__")
+
+    def __init__(self):
+        self.cancelled = False
+        self.reason = ""
+
+
+class LLMStream:
+    """
+    Iteratorul întors de `generate_stream`: `cancel(motiv)` oprește DOAR acest stream
+    (speculația respinsă, bugetul de lungime sau „nu știu” nu ating alte cereri în zbor).
+    """
+
+    def __init__(self, gen: Iterator[str], cancel: Callable[[str], int]):
+        self._gen = gen
+        self._cancel = cancel
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        return next(self._gen)
+
+    def close(self):
+        close = getattr(self._gen, "close", None)
+        if close is not None:
+            close()
+
+    def cancel(self, reason: str = "cancel") -> int:
+        return self._cancel(reason)
+
 
 class LLMLocal:
-    def __init__(self, cfg: Dict, logger):
+    def __init__(self, cfg: Dict, logger, data_dir: Optional[Path] = None):
         self.cfg = cfg or {}
         self.log = logger
 
@@ -23,36 +175,255 @@ class LLMLocal:
         self.default_mode = (self.cfg.get("default_mode") or "precise").lower()
         self.strict_facts = bool(self.cfg.get("strict_facts", True))
 
+        # Sesiune HTTP persistentă (keep-alive + pool) — fără handshake TCP nou la fiecare tură
+        self.timeout = float(self.cfg.get("timeout_s", 120))
+        self._http = requests.Session()
+        pool = int(self.cfg.get("http_pool_maxsize", 4))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool, max_retries=0)
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        self._http.headers.update({"Connection": "keep-alive"})
+
+        # Model rezident: keep_alive trimis la fiecare cerere + warm-up la start/wake
+        self.keep_alive_s = int(self.cfg.get("keep_alive_s", 300))
+        self.cold_load_ms = float(self.cfg.get("cold_load_threshold_ms", 500))
+        self._warmup_lock = threading.Lock()
+        self._warm_until = 0.0  # monotonic: până când credem că modelul e încă încărcat
+
+        # Stream-uri active: cancel() global (barge-in / FastExit) sau per stream (LLMStream.cancel)
+        self._active_lock = threading.Lock()
+        self._active: set = set()
+        self._scopes: "weakref.WeakSet[_CancelScope]" = weakref.WeakSet()
+
+        # Conversație multi-turn pe /api/chat (istoric pe sesiune, cu buget de tokeni)
+        self.chat_history = bool(self.cfg.get("chat_history", True))
+        self.conversation = Conversation(
+            budget_tokens=int(self.cfg.get("history_budget_tokens", 1024)),
+            max_turns=int(self.cfg.get("history_max_turns", 8)),
+        )
+
+        # OpenAI-compatibil (OpenAI, llama.cpp server, vLLM, LM Studio): streaming SSE pe aceeași sesiune HTTP
+        self.openai_base = (self.cfg.get("base_url") or "https://api.openai.com/v1").rstrip("/")
+        api_key = os.getenv(self.cfg.get("api_key_env") or "OPENAI_API_KEY") or ""
+        self._openai_headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
         self._openai = None
         if self.provider == "openai":
             try:
                 from openai import OpenAI
-                self._openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+                self._openai = OpenAI(api_key=api_key or "none", base_url=self.openai_base)
             except Exception as e:
-                self.log.error(f"OpenAI client indisponibil: {e}. Revin pe 'rule'.")
+                # SDK-ul e opțional: generate() folosește atunci tot stream-ul HTTP
+                self.log.debug(f"OpenAI SDK indisponibil ({e}); folosesc doar HTTP.")
+
+        # llama.cpp în proces (GGUF încărcat o dată, fără HTTP)
+        self._inproc = None
+        if self.provider == "inprocess":
+            try:
+                from src.llm.inprocess import LlamaInProcess
+                self._inproc = LlamaInProcess(self.cfg, self.log)
+                if bool(self.cfg.get("warmup_on_start", True)):
+                    threading.Thread(target=self._inproc.prime, args=(self._chat_system(self.default_mode),),
+                                     daemon=True).start()
+            except Exception as e:
+                self.log.error(f"llama.cpp în proces indisponibil: {e}. Revin pe 'rule'.")
                 self.provider = "rule"
 
+        # Tiered: model mic (TTFT mic) + model mare (răspuns bun) — lead | race | off
+        self.tiered_mode = (self.cfg.get("tiered_mode") or "off").lower()
+        self.fast_model = (self.cfg.get("fast_model") or "").strip()
+        self.lead_max_tokens = int(self.cfg.get("lead_max_tokens", 16))
+        self.lead_stop = list(self.cfg.get("lead_stop") or [".", "!", "?", ",", ";", ":"])
+
+        # Cache de răspunsuri (doar mod precise => temperature 0, ieșire deterministă)
+        self.cache: Optional[ResponseCache] = None
+        if bool(self.cfg.get("response_cache", True)):
+            self.cache = ResponseCache(
+                max_entries=int(self.cfg.get("response_cache_max_entries", 256)),
+                ttl_s=float(self.cfg.get("response_cache_ttl_s", 86400)),
+                path=(Path(data_dir) / "cache" / "llm_responses.json") if data_dir else None,
+                logger=self.log,
+            )
+        self.cache_max_words = int(self.cfg.get("response_cache_max_words", 8))
+        fp = (f"{self.provider}|{self.model}|{self.max_tokens}|{self.system}|{self.chat_history}|"
+              f"{self.tiered_mode}|{self.fast_model}")
+        self._cache_fp = hashlib.sha1(fp.encode("utf-8")).hexdigest()[:16]
+
         self.log.info(f"LLM provider activ: {self.provider}")
 
+        if self.provider == "ollama":
+            if bool(self.cfg.get("warmup_on_start", True)):
+                self.warmup("startup")
+            elif bool(self.cfg.get("preconnect", True)):
+                threading.Thread(target=self._preconnect, daemon=True).start()
+        elif self.provider == "openai" and bool(self.cfg.get("preconnect", True)):
+            threading.Thread(target=self._preconnect, daemon=True).start()
+
+    def set_keep_alive(self, seconds: float):
+        """Cât timp ține Ollama modelul în memorie după ultima cerere."""
+        self.keep_alive_s = max(0, int(seconds))
+
+    def _keep_alive(self) -> str:
+        return f"{self.keep_alive_s}s"
+
+    def _mark_warm(self):
+        self._warm_until = time.monotonic() + self.keep_alive_s
+
+    def warmup(self, reason: str = "manual") -> bool:
+        """
+        Preîncarcă modelul în fundal (prompt gol => Ollama doar încarcă modelul)
+        și reîmprospătează keep_alive. Non-blocking; ignoră apelul dacă un warm-up e deja în curs.
+        """
+        if self.provider != "ollama":
+            return False
+        if not self._warmup_lock.acquire(blocking=False):
+            return False
+
+        def _run():
+            try:
+                if bool(self.cfg.get("preconnect", True)):
+                    self._preconnect()
+                t0 = time.perf_counter()
+                models = [self.model]
+                if self.tiered_mode in ("lead", "race") and self.fast_model:
+                    models.insert(0, self.fast_model)
+                load_s = 0.0
+                for model in models:
+                    r = self._http.post(f"{self.host.rstrip('/')}/api/generate", json={
+                        "model": model,
+                        "prompt": "",
+                        "stream": False,
+                        "keep_alive": self._keep_alive(),
+                    }, timeout=self.timeout)
+                    r.raise_for_status()
+                    load_s += float((r.json() or {}).get("load_duration") or 0) / 1e9
+                self._mark_warm()
+                self.log.info(f"🔥 LLM warm-up ({reason}) gata în {(time.perf_counter() - t0) * 1000:.0f} ms "
+                              f"(load={load_s * 1000:.0f} ms, keep_alive={self._keep_alive()})")
+            except Exception as e:
+                self.log.warning(f"LLM warm-up ({reason}) eșuat: {e}")
+            finally:
+                self._warmup_lock.release()
+
+        threading.Thread(target=_run, name="llm-warmup", daemon=True).start()
+        return True
+
+    def _preconnect(self):
+        """Deschide conexiunea din pool înainte de prima tură (cerere ieftină)."""
+        if self.provider == "openai":
+            url, headers = f"{self.openai_base}/models", self._openai_headers
+        else:
+            url, headers = f"{self.host.rstrip('/')}/api/version", None
+        try:
+            r = self._http.get(url, headers=headers, timeout=3)
+            r.close()
+            self.log.debug(f"LLM preconnect OK ({r.status_code})")
+        except Exception as e:
+            self.log.warning(f"LLM preconnect eșuat: {e}")
+
+    def reset_conversation(self):
+        """Sesiune nouă (după wake) => istoric gol."""
+        self.conversation.reset()
+
+    def remember(self, user_text: str, lang_hint: str, reply: str):
+        """Adaugă în istoric o tură generată cu `history=False` (ex. speculație comisă, după redare)."""
+        if self.chat_history and reply:
+            self.conversation.add(f"[lang={lang_hint}] {user_text}", reply)
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()  # ultimele inserări (salvarea e amânată de debounce)
+        try:
+            self._http.close()
+        except Exception:
+            pass
+
     def generate(self, user_text: str, lang_hint: str = "en", mode: Optional[str] = None) -> str:
         mode = (mode or self.default_mode).lower()
-        with observe_hist(llm_latency):
+        with observe_hist(llm_latency.labels(provider=metric_label("provider", self.provider),
+                                             mode=metric_label("mode", mode))):
             if self.provider == "rule":
                 return self._rule_based(user_text, lang_hint)
             if self.provider == "ollama":
                 return self._ollama_http(user_text, lang_hint, mode=mode)
-            if self.provider == "openai" and self._openai:
-                return self._openai_chat(user_text, lang_hint)
+            if self.provider == "inprocess":
+                return "".join(self._inprocess_stream(user_text, lang_hint, mode, history=False)).strip()
+            if self.provider == "openai":
+                if self._openai:
+                    return self._openai_chat(user_text, lang_hint)
+                try:
+                    return "".join(self._openai_stream(user_text, lang_hint, mode, history=False)).strip()
+                except Exception as e:
+                    self.log.error(f"OpenAI error: {e}")
+                    return self._rule_based(user_text, lang_hint)
             return "No LLM provider configured."
 
-    def generate_stream(self, user_text: str, lang_hint: str = "en", mode: Optional[str] = None):
+    def _cache_key_for(self, user_text: str, lang_hint: str, mode: str) -> Optional[str]:
+        """
+        Cheie de cache doar pentru întrebări scurte în mod precise (răspuns determinist), și doar
+        la început de conversație: cu istoric, „de ce?” / „spune-mi mai mult” depind de turele
+        anterioare, iar cheia nu le conține.
+        """
+        if self.cache is None or mode != "precise":
+            return None
+        if self.chat_history and len(self.conversation):
+            return None
+        norm = normalize_text(user_text)
+        if not norm or len(norm.split()) > self.cache_max_words:
+            return None
+        return cache_key(norm, str(lang_hint).lower()[:2], mode, self._cache_fp)
+
+    def _replay_cached(self, text: str, user_text: str, lang_hint: str, history: bool = True):
+        """Redă un răspuns din cache pe bucăți de cuvinte — shaper-ul/TTS nu văd diferența."""
+        try:
+            for tok in re.findall(r"\S+\s*", text):
+                yield tok
+        finally:
+            if history:
+                self.remember(user_text, lang_hint, text)
+
+    def _store_on_complete(self, gen, key: str, scope: _CancelScope):
+        """Salvează răspunsul în cache doar dacă stream-ul s-a terminat natural (fără cancel)."""
+        out = []
+        for tok in gen:
+            out.append(tok)
+            yield tok
+        if not scope.cancelled and self.cache is not None:
+            self.cache.put(key, "".join(out))
+
+    def generate_stream(self, user_text: str, lang_hint: str = "en", mode: Optional[str] = None,
+                        context: Optional[str] = None, history: bool = True):
+        """
+        `context`: pasaje relevante (ex. din FAQ) adăugate la mesajul utilizatorului.
+        `history=False`: tura NU intră în istoric din stream (speculația o adaugă cu `remember()`
+        doar dacă e comisă și cu transcriptul final).
+        Întoarce un `LLMStream`: `.cancel(motiv)` oprește doar cererile acestui stream.
+        """
         mode = (mode or self.default_mode).lower()
-        if self.provider == "ollama":
-            gen = self._ollama_stream(user_text, lang_hint, mode)
-            return wrap_stream_for_first_token(gen, llm_first_token_latency)
+        scope = self._new_scope()
+        cancel = lambda reason: self.cancel(reason, stream=scope)
+        key = self._cache_key_for(user_text, lang_hint, mode) if not context else None
+        if context:
+            user_text = f"{user_text}\n\nRelevant venue facts (use them if they answer the question):\n{context}"
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                llm_cache_hits.inc()
+                self.log.info(f"⚡ LLM cache hit ({len(cached)}c)")
+                return LLMStream(self._replay_cached(cached, user_text, lang_hint, history=history), cancel)
+            llm_cache_misses.inc()
+        if self.provider in ("ollama", "openai", "inprocess"):
+            if self.provider == "ollama" and self.tiered_mode in ("lead", "race") and self.fast_model:
+                gen = self._tiered_stream(user_text, lang_hint, mode, scope, history=history)
+            else:
+                gen = self._base_stream(user_text, lang_hint, mode, scope, history=history)
+            if key is not None:
+                gen = self._store_on_complete(gen, key, scope)
+            return LLMStream(wrap_stream_for_first_token(
+                gen, llm_first_token_latency.labels(provider=metric_label("provider", self.provider),
+                                                    mode=metric_label("mode", mode))), cancel)
         def _one():
             yield self.generate(user_text, lang_hint, mode)
-        return _one()
+        return LLMStream(_one(), cancel)
 
     def _rule_based(self, user_text: str, lang_hint: str) -> str:
         if not (user_text or "").strip():
@@ -60,9 +431,7 @@ class LLMLocal:
         return f"{'Am înțeles' if lang_hint.startswith('ro') else 'I heard'}: \"{user_text}\"."
 
     def _ollama_http(self, user_text: str, lang_hint: str, mode: str = "precise") -> str:
-        unknown_en = "That’s outside my current knowledge, but I’ll note it for improvement."
-        unknown_ro = "Interesant, Nu am răspunsul încă, dar exact întrebări ca asta mă ajută să devin mai bun."
-        unknown = unknown_ro if str(lang_hint).lower().startswith("ro") else unknown_en
+        unknown = unknown_reply(lang_hint)
 
         url = f"{self.host.rstrip('/')}/api/generate"
 
@@ -82,10 +451,11 @@ class LLMLocal:
         prompt = f"{preface}\nUser ({lang_hint}): {user_text}\nAssistant:"
 
         try:
-            resp = requests.post(url, json={
+            resp = self._http.post(url, json={
                 "model": self.model,
                 "prompt": prompt,
                 "stream": False,
+                "keep_alive": self._keep_alive(),
                 "options": {
                     "temperature": temperature,
                     "top_p": top_p,
@@ -93,9 +463,10 @@ class LLMLocal:
                     "repeat_penalty": 1.1,
                     "num_predict": self.max_tokens
                 }
-            }, timeout=120)
+            }, timeout=self.timeout)
             resp.raise_for_status()
             data = resp.json()
+            self._mark_warm()
             text = (data.get("response") or "").strip()
             if self.strict_facts and not text:
                 return unknown
@@ -104,10 +475,9 @@ class LLMLocal:
             self.log.error(f"Ollama HTTP error: {e}")
             return self._rule_based(user_text, lang_hint)
 
-    def _ollama_stream(self, user_text: str, lang_hint: str, mode: str = "precise"):
-        unknown_en = "That’s outside my current knowledge, but I’ll note it for improvement."
-        unknown_ro = "Interesant, Nu am răspunsul încă, dar exact întrebări ca asta mă ajută să devin mai bun."
-        unknown = unknown_ro if str(lang_hint).lower().startswith("ro") else unknown_en
+    def _ollama_stream(self, user_text: str, lang_hint: str, mode: str = "precise", scope: Optional[_CancelScope] = None,
+                       **tier_opts):
+        unknown = unknown_reply(lang_hint)
 
         url = f"{self.host.rstrip('/')}/api/generate"
 
@@ -123,12 +493,16 @@ class LLMLocal:
             temperature = self.temperature; top_p = 0.95; top_k = 50
 
         sys = (self.system or "").strip()
+        prefill = tier_opts.get("prefill") or ""
         prompt = f"{sys}\n{safety}\nUser ({lang_hint}): {user_text}\nAssistant:"
+        if prefill:
+            prompt += f" {prefill}"
 
-        with requests.post(url, json={
+        yield from self._stream_ndjson(url, self._apply_tier({
             "model": self.model,
             "prompt": prompt,
             "stream": True,
+            "keep_alive": self._keep_alive(),
             "options": {
                 "temperature": temperature,
                 "top_p": top_p,
@@ -136,18 +510,355 @@ class LLMLocal:
                 "repeat_penalty": 1.1,
                 "num_predict": self.max_tokens
             }
-        }, stream=True, timeout=120) as resp:
-            resp.raise_for_status()
-            for line in resp.iter_lines(decode_unicode=True):
-                if not line:
+        }, tier_opts), field=("response",), scope=scope,
+            tier=tier_opts.get("tier"), on_track=tier_opts.get("on_track"))
+
+    def _chat_system(self, mode: str) -> str:
+        """
+        Mesaj system STABIL (nu depinde de limba turei), ca prefixul să rămână
+        identic între ture și Ollama să refolosească prompt cache-ul.
+        """
+        sys = (self.system or "").strip()
+        if mode == "precise":
+            safety = (
+                "IMPORTANT: Answer only with verified facts. "
+                f"If uncertain or outdated, reply exactly with: '{UNKNOWN_EN}' "
+                f"(in Romanian: '{UNKNOWN_RO}') "
+                "Keep answers concise."
+            )
+        else:
+            safety = "Be helpful and friendly."
+        return f"{sys}\n{safety}".strip()
+
+    def _ollama_chat_stream(self, user_text: str, lang_hint: str, mode: str = "precise", scope: Optional[_CancelScope] = None,
+                            history: bool = True, **tier_opts):
+        url = f"{self.host.rstrip('/')}/api/chat"
+
+        if mode == "precise":
+            temperature = 0.0; top_p = 0.9; top_k = 40
+        else:
+            temperature = self.temperature; top_p = 0.95; top_k = 50
+
+        user_content = f"[lang={lang_hint}] {user_text}"
+        messages = self.conversation.messages(self._chat_system(mode), user_content)
+        prefill = tier_opts.get("prefill") or ""
+        if prefill:
+            # mesaj assistant final => Ollama continuă textul (prefill), nu începe unul nou
+            messages.append({"role": "assistant", "content": prefill})
+
+        reply = [prefill] if prefill else []
+        try:
+            for tok in self._stream_ndjson(url, self._apply_tier({
+                "model": self.model,
+                "messages": messages,
+                "stream": True,
+                "keep_alive": self._keep_alive(),
+                "options": {
+                    "temperature": temperature,
+                    "top_p": top_p,
+                    "top_k": top_k,
+                    "repeat_penalty": 1.1,
+                    "num_predict": self.max_tokens
+                }
+            }, tier_opts), field=("message", "content"), scope=scope,
+                    tier=tier_opts.get("tier"), on_track=tier_opts.get("on_track")):
+                reply.append(tok)
+                yield tok
+        finally:
+            # reținem și răspunsurile întrerupte: utilizatorul a auzit începutul lor
+            if history:
+                self.conversation.add(user_content, "".join(reply))
+
+    def _openai_stream(self, user_text: str, lang_hint: str, mode: str = "precise", scope: Optional[_CancelScope] = None,
+                       history: bool = True, **tier_opts):
+        """/v1/chat/completions cu stream=true: același tracking (TTFT, cancel, pool) ca la Ollama."""
+        user_content = f"[lang={lang_hint}] {user_text}"
+        if self.chat_history:
+            messages = self.conversation.messages(self._chat_system(mode), user_content)
+        else:
+            messages = [{"role": "system", "content": self._chat_system(mode) or "You are concise."},
+                        {"role": "user", "content": user_content}]
+        payload = {
+            "model": tier_opts.get("model") or self.model,
+            "messages": messages,
+            "stream": True,
+            "temperature": 0.0 if mode == "precise" else self.temperature,
+            "max_tokens": int(tier_opts.get("num_predict") or self.max_tokens),
+        }
+        if tier_opts.get("stop"):
+            payload["stop"] = list(tier_opts["stop"])[:4]  # limita OpenAI
+        if bool(self.cfg.get("openai_stream_usage", True)):
+            payload["stream_options"] = {"include_usage": True}
+
+        reply = []
+        try:
+            for tok in self._stream_ndjson(f"{self.openai_base}/chat/completions", payload, None,
+                                           scope=scope, tier=tier_opts.get("tier"),
+                                           on_track=tier_opts.get("on_track"),
+                                           parser=_iter_sse_tokens, headers=self._openai_headers):
+                reply.append(tok)
+                yield tok
+        finally:
+            if self.chat_history and history:
+                self.conversation.add(user_content, "".join(reply))
+
+    def _inprocess_stream(self, user_text: str, lang_hint: str, mode: str = "precise", scope: Optional[_CancelScope] = None,
+                          history: bool = True):
+        """llama.cpp în proces: aceleași mesaje ca /api/chat, anulare prin scope verificat la fiecare token."""
+        if scope is not None and scope.cancelled:
+            return
+        user_content = f"[lang={lang_hint}] {user_text}"
+        if self.chat_history:
+            messages = self.conversation.messages(self._chat_system(mode), user_content)
+        else:
+            messages = [{"role": "system", "content": self._chat_system(mode)},
+                        {"role": "user", "content": user_content}]
+        precise = mode == "precise"
+        stats: dict = {}
+        reply = []
+        t0 = time.perf_counter()
+        t_first = None
+        cancelled = lambda: scope is not None and scope.cancelled
+        try:
+            for tok in self._inproc.stream(
+                messages,
+                max_tokens=self.max_tokens,
+                temperature=0.0 if precise else self.temperature,
+                top_p=0.9 if precise else 0.95,
+                top_k=40 if precise else 50,
+                should_stop=cancelled,
+                stats=stats,
+            ):
+                if t_first is None:
+                    t_first = time.perf_counter() - t0
+                reply.append(tok)
+                yield tok
+        finally:
+            if cancelled():
+                generated = int(stats.get("eval_count") or len(reply))
+                saved = max(0, self.max_tokens - generated)
+                llm_tokens_saved.inc(saved)
+                self.log.info(f"✂️ LLM (în proces) oprit după {generated} tokeni — economisit ~{saved}")
+            self._observe_load(t_first, stats, was_warm=True)  # modelul e rezident din pornire
+            if self.chat_history and history:
+                self.conversation.add(user_content, "".join(reply))
+
+    @staticmethod
+    def _apply_tier(payload: dict, tier_opts: dict) -> dict:
+        """Suprascrie modelul / num_predict / stop pentru un tier (fast/slow)."""
+        if tier_opts.get("model"):
+            payload["model"] = tier_opts["model"]
+        if tier_opts.get("num_predict"):
+            payload["options"]["num_predict"] = int(tier_opts["num_predict"])
+        if tier_opts.get("stop"):
+            payload["options"]["stop"] = list(tier_opts["stop"])
+        return payload
+
+    def _base_stream(self, user_text: str, lang_hint: str, mode: str, scope: Optional[_CancelScope], **tier_opts):
+        if self.provider == "openai":
+            return self._openai_stream(user_text, lang_hint, mode, scope=scope, **tier_opts)
+        if self.provider == "inprocess":
+            return self._inprocess_stream(user_text, lang_hint, mode, scope=scope,
+                                          history=tier_opts.get("history", True))
+        if self.chat_history:
+            return self._ollama_chat_stream(user_text, lang_hint, mode, scope=scope, **tier_opts)
+        tier_opts.pop("history", None)
+        return self._ollama_stream(user_text, lang_hint, mode, scope=scope, **tier_opts)
+
+    # ——— Tiered: model mic pentru deschidere rapidă + model mare pentru conținut ———
+    def _tiered_stream(self, user_text: str, lang_hint: str, mode: str, scope: Optional[_CancelScope],
+                       history: bool = True):
+        if self.tiered_mode == "race":
+            yield from self._race_stream(user_text, lang_hint, mode, scope, history=history)
+            return
+
+        # lead: modelul mic scrie doar prima propoziție scurtă (oprită la prima punctuație),
+        # apoi modelul mare continuă EXACT din ea (prefill) cât timp TTS-ul o rostește deja
+        lead_parts = []
+        for tok in self._base_stream(user_text, lang_hint, mode, scope, history=False, tier="fast",
+                                     model=self.fast_model, num_predict=self.lead_max_tokens,
+                                     stop=self.lead_stop):
+            lead_parts.append(tok)
+            yield tok
+        if scope is not None and scope.cancelled:
+            return
+        lead = "".join(lead_parts).rstrip()
+        yield from self._base_stream(user_text, lang_hint, mode, scope, history=history, tier="slow", prefill=lead)
+
+    def _race_stream(self, user_text: str, lang_hint: str, mode: str, scope: Optional[_CancelScope],
+                     history: bool = True):
+        """Pornește ambele modele; primul stream cu text util câștigă, celălalt e închis."""
+        q: "queue.Queue" = queue.Queue()
+        handles: Dict[str, _ActiveStream] = {}
+        lost: Dict[str, bool] = {"fast": False, "slow": False}
+
+        def run(tier: str, model: str):
+            try:
+                for tok in self._base_stream(user_text, lang_hint, mode, scope, history=False, tier=tier,
+                                             model=model, on_track=lambda h, t=tier: handles.__setitem__(t, h)):
+                    if lost[tier]:
+                        break
+                    q.put((tier, tok))
+            except Exception as e:
+                self.log.debug(f"LLM race [{tier}] error: {e}")
+            finally:
+                q.put((tier, None))
+
+        for tier, model in (("fast", self.fast_model), ("slow", self.model)):
+            threading.Thread(target=run, args=(tier, model), name=f"llm-race-{tier}", daemon=True).start()
+
+        winner = None
+        finished = set()
+        pending: Dict[str, list] = {"fast": [], "slow": []}
+        reply = []
+        try:
+            while True:
+                tier, tok = q.get()
+                if tok is None:
+                    finished.add(tier)
+                    if winner == tier or len(finished) == 2:
+                        break
                     continue
-                try:
-                    data = json.loads(line)
-                    tok = (data.get("response") or "")
-                    if tok:
-                        yield tok
-                except Exception:
+                if winner is None:
+                    pending[tier].append(tok)
+                    if not "".join(pending[tier]).strip():
+                        continue
+                    winner = tier
+                    loser = "slow" if tier == "fast" else "fast"
+                    lost[loser] = True
+                    h = handles.get(loser)
+                    if h is not None:
+                        h.cancelled, h.reason = True, f"race lost to {tier}"
+                        self._abort(h)
+                    llm_tier_race_wins.labels(tier=tier).inc()
+                    tok = "".join(pending[tier])
+                elif tier != winner:
                     continue
+                reply.append(tok)
+                yield tok
+        finally:
+            if history:
+                self.remember(user_text, lang_hint, "".join(reply))
+
+    def _stream_ndjson(self, url: str, payload: dict, field, scope: Optional[_CancelScope] = None,
+                       tier: Optional[str] = None, on_track: Optional[Callable] = None,
+                       parser: Callable = _iter_ndjson_tokens, headers: Optional[dict] = None):
+        """
+        POST streaming comun (/api/generate, /api/chat, /v1/chat/completions cu `parser=_iter_sse_tokens`):
+        urmărește răspunsul activ ca să poată fi anulat din alt thread (barge-in / FastExit)
+        și măsoară TTFT cold/warm.
+        """
+        if scope is None:
+            scope = self._new_scope()
+        elif scope.cancelled:
+            return  # anulat înainte să pornească cererea
+        t0 = time.perf_counter()
+        was_warm = time.monotonic() < self._warm_until
+        stats: dict = {}
+        t_first = None
+        with self._http.post(url, json=payload, headers=headers, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            h = self._track(resp, scope)
+            if on_track is not None:
+                on_track(h)
+            if scope.cancelled:
+                # cancel() a venit cât așteptam header-ele (prefill): nu era încă în _active
+                h.cancelled, h.reason = True, "cancel în prefill"
+                self._untrack(h, stats)
+                self._abort(h)
+                return
+            try:
+                for tok in parser(resp, field=field, stats=stats):
+                    if t_first is None:
+                        t_first = time.perf_counter() - t0
+                        if tier:
+                            llm_tier_first_token.labels(tier=tier).observe(t_first)
+                    yield tok
+            except Exception:
+                if not h.cancelled:
+                    raise
+            finally:
+                self._untrack(h, stats)
+                self._observe_load(t_first, stats, was_warm)
+
+    def _new_scope(self) -> _CancelScope:
+        scope = _CancelScope()
+        with self._active_lock:
+            self._scopes.add(scope)
+        return scope
+
+    def _track(self, resp, scope: _CancelScope) -> "_ActiveStream":
+        h = _ActiveStream(resp, scope)
+        with self._active_lock:
+            self._active.add(h)
+        return h
+
+    def _untrack(self, h: "_ActiveStream", stats: dict):
+        with self._active_lock:
+            self._active.discard(h)
+        if h.cancelled:
+            generated = int(stats.get("eval_count") or stats.get("_tokens") or 0)
+            saved = max(0, self.max_tokens - generated)
+            llm_tokens_saved.inc(saved)
+            self.log.info(f"✂️ LLM stream anulat ({h.reason}) după {generated} tokeni — economisit ~{saved}")
+
+    def cancel(self, reason: str = "cancel", stream=None) -> int:
+        """
+        Oprește stream-urile: închide răspunsul HTTP (Ollama oprește generarea când clientul
+        se deconectează) și invalidează cererile create dar încă nepornite.
+        `stream=None` => toate (barge-in / FastExit); altfel doar acel `LLMStream` (sau scope).
+        Returnează numărul de stream-uri HTTP închise.
+        """
+        if isinstance(stream, LLMStream):
+            return stream.cancel(reason)
+        if stream is not None and not isinstance(stream, _CancelScope):
+            return 0  # iterator fără cereri proprii (ex. răspuns din cache): nimic de anulat
+        with self._active_lock:
+            scopes = list(self._scopes) if stream is None else [stream]
+            for sc in scopes:
+                sc.cancelled, sc.reason = True, reason
+            active = [h for h in self._active if stream is None or h.scope is stream]
+        for h in active:
+            h.cancelled = True
+            h.reason = reason
+            self._abort(h)
+        return len(active)
+
+    @staticmethod
+    def _abort(h: "_ActiveStream"):
+        """
+        Deconectare imediată: `HTTPResponse.shutdown()` (urllib3 >= 2.3) deblochează read-ul din
+        thread-ul cititor chiar și în prefill; close() eliberează conexiunea (FIN => Ollama oprește
+        generarea) și rulează în fundal — apelantul (barge-in, on_pause) nu stă după read-ul în curs.
+        """
+        try:
+            h.resp.raw.shutdown()
+        except (AttributeError, ValueError, RuntimeError):
+            pass  # urllib3 mai vechi / conexiune deja eliberată: rămâne doar close()
+
+        def _close():
+            try:
+                h.resp.close()
+            except Exception:
+                pass
+        threading.Thread(target=_close, name="llm-close", daemon=True).start()
+
+    def _observe_load(self, t_first: Optional[float], stats: dict, was_warm: bool):
+        """TTFT separat pe cold/warm: `load_duration` din Ollama, altfel estimarea locală."""
+        if t_first is None:
+            return
+        if "load_duration" in stats:
+            cold = float(stats.get("load_duration") or 0) / 1e6 >= self.cold_load_ms
+        else:
+            cold = not was_warm
+        if cold:
+            llm_cold_loads.inc()
+        llm_first_token_by_load.labels(load="cold" if cold else "warm").observe(t_first)
+        self._mark_warm()
+        if "prompt_eval_duration" in stats:
+            llm_prompt_eval_latency.observe(float(stats.get("prompt_eval_duration") or 0) / 1e9)
+        if "prompt_eval_count" in stats:
+            llm_prompt_tokens.observe(float(stats.get("prompt_eval_count") or 0))
 
     def _openai_chat(self, user_text: str, lang_hint: str) -> str:
         try:
@@ -156,7 +867,7 @@ class LLMLocal:
                 {"role": "user", "content": f"[lang={lang_hint}] {user_text}"},
             ]
             r = self._openai.chat.completions.create(
-                model=self.cfg.get("model", "gpt-4o-mini"),
+                model=self.model,
                 messages=msg,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens
@@ -0,0 +1,244 @@
+# src/llm/faq_index.py - index TF-IDF local (NumPy, memory-mapped) pentru întrebări frecvente
+from __future__ import annotations
+import json, math, time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import yaml
+
+from src.utils.textnorm import normalize_text
+
+
+def _features(norm: str) -> Counter:
+    """Cuvinte + bigrame + 4-grame de caractere (robuste la greșelile ASR de o literă)."""
+    words = norm.split()
+    feats: Counter = Counter()
+    for w in words:
+        feats["w:" + w] += 1
+        p = f"#{w}#"
+        for i in range(max(1, len(p) - 3)):
+            feats["c:" + p[i:i + 4]] += 1
+    for a, b in zip(words, words[1:]):
+        feats[f"b:{a}_{b}"] += 1
+    return feats
+
+
+def _answer_text(answer: Any, lang: str) -> str:
+    if isinstance(answer, dict):
+        return answer.get(lang) or answer.get("en") or next(iter(answer.values()), "")
+    return str(answer or "")
+
+
+@dataclass
+class FaqHit:
+    entry: int
+    score: float
+    question: str
+    answer: Any
+
+    def text(self, lang: str) -> str:
+        return _answer_text(self.answer, lang)
+
+
+class FaqIndex:
+    """
+    Retrieval local în fața LLM-ului, construit OFFLINE din configs/faq.yaml:
+      - vocab.json  : termen -> (coloană, idf)
+      - matrix.npy  : TF-IDF normalizat L2, stocat termen-major (V x N), citit cu mmap
+      - meta.json   : rând -> intrare FAQ (întrebare canonică + răspunsuri ro/en)
+    Căutarea: vectorul întrebării are câțiva termeni => adunăm doar rândurile lor din matrice
+    (cosinus fără înmulțire completă) — sub o milisecundă pentru un FAQ de sute de intrări.
+    """
+
+    FILES = ("vocab.json", "matrix.npy", "meta.json")
+
+    def __init__(self, index_dir: Path, answer_threshold: float = 0.55, context_threshold: float = 0.35,
+                 top_k: int = 2, logger=None):
+        self.dir = Path(index_dir)
+        self.answer_threshold = float(answer_threshold)
+        self.context_threshold = float(context_threshold)
+        self.top_k = int(top_k)
+        self.log = logger
+        with open(self.dir / "vocab.json", "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        self._col = {t: int(c) for t, (c, _) in vocab.items()}
+        self._idf = np.array([idf for _, (c, idf) in sorted(vocab.items(), key=lambda kv: kv[1][0])],
+                             dtype=np.float32)
+        self._idf_max = float(self._idf.max()) if len(self._idf) else 1.0
+        self._m = np.load(self.dir / "matrix.npy", mmap_mode="r")  # (V, N)
+        with open(self.dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._row_entry: List[int] = meta["rows"]
+        self._entries: List[Dict[str, Any]] = meta["entries"]
+        if logger:
+            logger.info(f"📚 FAQ index: {len(self._entries)} intrări, {len(self._row_entry)} întrebări, "
+                        f"{len(self._col)} termeni (mmap {self.dir})")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ——— construire offline ———
+    @classmethod
+    def build(cls, faq_path: Path, index_dir: Path, logger=None) -> Path:
+        with open(faq_path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        entries, rows, docs = [], [], []
+        for e in data.get("entries") or []:
+            qs = [q for q in (e.get("q") or []) if normalize_text(q)]
+            if not qs or not e.get("a"):
+                continue
+            entries.append({"q": qs[0], "a": e["a"]})
+            for q in qs:
+                rows.append(len(entries) - 1)
+                docs.append(_features(normalize_text(q)))
+
+        df: Counter = Counter()
+        for d in docs:
+            df.update(d.keys())
+        n = max(1, len(docs))
+        terms = sorted(df)
+        vocab = {t: (i, math.log((1 + n) / (1 + df[t])) + 1.0) for i, t in enumerate(terms)}
+
+        m = np.zeros((len(terms), len(docs)), dtype=np.float32)
+        for j, d in enumerate(docs):
+            for t, tf in d.items():
+                i, idf = vocab[t]
+                m[i, j] = (1.0 + math.log(tf)) * idf
+        norms = np.linalg.norm(m, axis=0)
+        m /= np.maximum(norms, 1e-9)
+
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / "matrix.npy", m)
+        with open(index_dir / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        with open(index_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "entries": entries, "source": str(faq_path),
+                       "built_at": time.time()}, f, ensure_ascii=False)
+        if logger:
+            logger.info(f"📚 FAQ index construit: {len(entries)} intrări, {len(docs)} întrebări, "
+                        f"{len(terms)} termeni -> {index_dir}")
+        return index_dir
+
+    @classmethod
+    def from_cfg(cls, cfg_faq: Dict[str, Any], data_dir: Path, root: Path, logger=None) -> Optional["FaqIndex"]:
+        cfg_faq = cfg_faq or {}
+        if not bool(cfg_faq.get("enabled", False)):
+            return None
+        index_dir = Path(data_dir) / "faq_index"
+        faq_path = root / (cfg_faq.get("source") or "configs/faq.yaml")
+        missing = not all((index_dir / f).exists() for f in cls.FILES)
+        stale = (not missing and faq_path.exists()
+                 and faq_path.stat().st_mtime > (index_dir / "meta.json").stat().st_mtime)
+        try:
+            if missing or stale:
+                if not faq_path.exists():
+                    if logger: logger.warning(f"FAQ: lipsesc și indexul și sursa ({faq_path}) — dezactivat.")
+                    return None
+                if logger:
+                    logger.warning("FAQ: index " + ("lipsă" if missing else "mai vechi decât sursa") +
+                                   " — îl construiesc acum (offline: python -m src.llm.faq_index build)")
+                cls.build(faq_path, index_dir, logger)
+            return cls(index_dir,
+                       answer_threshold=float(cfg_faq.get("answer_threshold", 0.55)),
+                       context_threshold=float(cfg_faq.get("context_threshold", 0.35)),
+                       top_k=int(cfg_faq.get("top_k", 2)),
+                       logger=logger)
+        except Exception as e:
+            if logger: logger.error(f"FAQ index indisponibil: {e}")
+            return None
+
+    # ——— căutare ———
+    def search(self, text: str, k: Optional[int] = None) -> List[FaqHit]:
+        feats = _features(normalize_text(text))
+        cols, weights = [], []
+        for t, tf in feats.items():
+            c = self._col.get(t)
+            if c is not None:
+                cols.append(c)
+                weights.append(1.0 + math.log(tf))
+        if not cols:
+            return []
+        idx = np.asarray(cols, dtype=np.int64)
+        w = np.asarray(weights, dtype=np.float32) * self._idf[idx]
+        # norma include și termenii necunoscuți (cu idf maxim), altfel o întrebare lungă
+        # ar „potrivi” prea ușor pe baza câtorva cuvinte comune
+        unk = self._idf_max * np.asarray([1.0 + math.log(tf) for t, tf in feats.items() if t not in self._col],
+                                         dtype=np.float32)
+        w /= max(float(np.sqrt(np.dot(w, w) + np.dot(unk, unk))), 1e-9)
+        scores = w @ self._m[idx]  # (N,)
+
+        best: Dict[int, float] = {}
+        k = k or self.top_k
+        for r in np.argsort(-scores)[: k * 4]:
+            e = self._row_entry[int(r)]
+            if e not in best:
+                best[e] = float(scores[r])
+            if len(best) >= k:
+                break
+        return [FaqHit(e, s, self._entries[e]["q"], self._entries[e]["a"]) for e, s in best.items()]
+
+    def answer(self, hits: List[FaqHit]) -> Optional[FaqHit]:
+        return hits[0] if hits and hits[0].score >= self.answer_threshold else None
+
+    def context(self, hits: List[FaqHit], lang: str) -> str:
+        """Pasajele relevante, formatate pentru a fi injectate în prompt."""
+        return "\n".join(f"- Q: {h.question}\n  A: {h.text(lang)}"
+                         for h in hits if h.score >= self.context_threshold)
+
+
+def routing_conflicts(faq_path: Path, cfg_route: Dict[str, Any]) -> List[str]:
+    """
+    Întrebările FAQ pe care le-ar prinde routerul de intenții: routerul rulează înaintea FAQ-ului,
+    deci răspunsul din FAQ n-ar ajunge niciodată la utilizator.
+    """
+    from src.core.router import IntentRouter
+    with open(faq_path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    router = IntentRouter(cfg_route)
+    out = []
+    for e in data.get("entries") or []:
+        for q in e.get("q") or []:
+            m = router.route(q)
+            if m is not None:
+                out.append(f"{q!r} -> intent '{m.intent}' ({m.method})")
+    return out
+
+
+if __name__ == "__main__":
+    # Construire offline + test:
+    #   python -m src.llm.faq_index build [configs/faq.yaml] [data/faq_index]
+    #   python -m src.llm.faq_index query "unde e toaleta"
+    #   python -m src.llm.faq_index check [configs/faq.yaml] [configs/routing.yaml]
+    import sys
+    root = Path(__file__).resolve().parents[2]
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "query"
+    out_dir = root / "data" / "faq_index"
+    if cmd == "check":
+        src = Path(sys.argv[2]) if len(sys.argv) > 2 else root / "configs" / "faq.yaml"
+        route_path = Path(sys.argv[3]) if len(sys.argv) > 3 else root / "configs" / "routing.yaml"
+        with open(route_path, "r", encoding="utf-8") as f:
+            conflicts = routing_conflicts(src, yaml.safe_load(f) or {})
+        for c in conflicts:
+            print(f"FAQ umbrit de router: {c}")
+        print(f"{len(conflicts)} conflicte FAQ/routing")
+        sys.exit(1 if conflicts else 0)
+    if cmd == "build":
+        src = Path(sys.argv[2]) if len(sys.argv) > 2 else root / "configs" / "faq.yaml"
+        out = Path(sys.argv[3]) if len(sys.argv) > 3 else out_dir
+        FaqIndex.build(src, out)
+        print(f"index -> {out}")
+    else:
+        idx = FaqIndex(out_dir)
+        q = " ".join(sys.argv[2:]) or "what are the opening hours"
+        n = 2000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            hits = idx.search(q)
+        dt = (time.perf_counter() - t0) / n
+        for h in hits:
+            print(f"{h.score:.3f}  {h.question!r} -> {h.text('en')!r}")
+        print(f"search(): {dt * 1e6:.0f} µs/query over {n} calls")
@@ -0,0 +1,138 @@
+# src/llm/inprocess.py - llama.cpp în proces (llama-cpp-python), fără HTTP
+from __future__ import annotations
+import os, queue, threading, time
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    from llama_cpp import Llama  # type: ignore
+except ImportError:  # pragma: no cover - dependință opțională
+    Llama = None
+
+
+class LlamaInProcess:
+    """
+    Model GGUF încărcat O SINGURĂ DATĂ în procesul aplicației:
+      - tokenii vin direct ca str Python (fără loopback HTTP + JSON per token)
+      - llama.cpp refolosește KV-cache-ul pentru cel mai lung prefix comun cu cererea
+        anterioară => mesajul system stabil (+ istoricul neschimbat) nu se re-evaluează;
+        `prime(system)` îl evaluează o dată la pornire
+      - un singur context => generările sunt serializate cu un lock, ținut DOAR de thread-ul
+        worker care decodează (nu peste `yield`): un generator abandonat nu blochează turele următoare
+    """
+
+    def __init__(self, cfg: Dict, logger):
+        if Llama is None:
+            raise RuntimeError("llama-cpp-python nu este instalat (pip install llama-cpp-python)")
+        path = cfg.get("gguf_path") or cfg.get("model_path")
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Model GGUF inexistent: {path}")
+        self.log = logger
+        self.path = path
+        n_threads = int(cfg.get("n_threads") or 0) or max(1, (os.cpu_count() or 2) // 2)
+        n_threads_batch = int(cfg.get("n_threads_batch") or 0) or (os.cpu_count() or n_threads)
+
+        t0 = time.perf_counter()
+        self.llm = Llama(
+            model_path=path,
+            n_ctx=int(cfg.get("n_ctx", 2048)),
+            n_threads=n_threads,                 # decodare (token cu token) — de obicei nr. de nuclee fizice
+            n_threads_batch=n_threads_batch,     # evaluarea promptului (paralelizează bine)
+            n_gpu_layers=int(cfg.get("n_gpu_layers", 0)),
+            use_mmap=bool(cfg.get("use_mmap", True)),
+            use_mlock=bool(cfg.get("use_mlock", False)),
+            verbose=False,
+        )
+        self.load_s = time.perf_counter() - t0
+        self._lock = threading.Lock()
+        self.log.info(f"🦙 llama.cpp în proces: {os.path.basename(path)} încărcat în {self.load_s * 1000:.0f} ms "
+                      f"(threads={n_threads}/{n_threads_batch}, n_ctx={self.llm.n_ctx()})")
+
+    def prime(self, system: str):
+        """Evaluează mesajul system o dată, ca primul răspuns să găsească prefixul deja în KV-cache."""
+        if not system:
+            return
+        t0 = time.perf_counter()
+        for _ in self.stream([{"role": "system", "content": system}, {"role": "user", "content": "hi"}],
+                             max_tokens=1):
+            pass
+        self.log.info(f"🦙 Prefix system în KV-cache ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 120,
+        temperature: float = 0.0,
+        top_p: float = 0.9,
+        top_k: int = 40,
+        stop: Optional[List[str]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        stats: Optional[dict] = None,
+    ) -> Iterator[str]:
+        """
+        Generează tokeni ca str. `should_stop()` e verificat după fiecare token (barge-in):
+        închiderea generatorului oprește decodarea la următorul token. `stats["eval_count"]` = tokeni generați.
+        Decodarea rulează sub lock într-un thread worker; tokenii trec printr-o coadă, deci un
+        consumator care nu închide generatorul lasă worker-ul să termine (max_tokens) și să elibereze lock-ul.
+        """
+        q: "queue.Queue" = queue.Queue()
+        abandon = threading.Event()
+        done = object()
+
+        def work():
+            n = 0
+            try:
+                with self._lock:
+                    gen = self.llm.create_chat_completion(
+                        messages=messages,
+                        max_tokens=int(max_tokens),
+                        temperature=float(temperature),
+                        top_p=float(top_p),
+                        top_k=int(top_k),
+                        repeat_penalty=1.1,
+                        stop=stop or None,
+                        stream=True,
+                    )
+                    try:
+                        for chunk in gen:
+                            if abandon.is_set() or (should_stop is not None and should_stop()):
+                                break
+                            tok = ((chunk.get("choices") or [{}])[0].get("delta") or {}).get("content") or ""
+                            if tok:
+                                n += 1
+                                q.put(tok)
+                    finally:
+                        gen.close()
+            except Exception as e:
+                q.put(e)
+            finally:
+                if stats is not None:
+                    stats["eval_count"] = n
+                q.put(done)
+
+        th = threading.Thread(target=work, name="llama-decode", daemon=True)
+        th.start()
+        try:
+            while True:
+                item = q.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            abandon.set()
+            th.join(timeout=5.0)  # worker-ul se oprește la următorul token => stats complete
+
+if __name__ == "__main__":
+    # Smoke test / micro-benchmark: python -m src.llm.inprocess /cale/model-mic.gguf
+    import logging, sys
+    logging.basicConfig(level=logging.INFO)
+    m = LlamaInProcess({"gguf_path": sys.argv[1], "n_ctx": 512}, logging.getLogger("inprocess"))
+    system = "You are a concise assistant."
+    m.prime(system)
+    for q in ("Say hello.", "Name a color."):
+        t0 = time.perf_counter(); first = None; out = []
+        for tok in m.stream([{"role": "system", "content": system}, {"role": "user", "content": q}], max_tokens=16):
+            first = first if first is not None else time.perf_counter() - t0
+            out.append(tok)
+        print(f"{q!r}: TTFT={(first or 0) * 1000:.0f} ms total={(time.perf_counter() - t0) * 1000:.0f} ms -> {''.join(out)!r}")
@@ -0,0 +1,73 @@
+# src/llm/length_governor.py - buget de lungime vorbită pentru răspunsul LLM
+from __future__ import annotations
+import re
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.telemetry.metrics import governor_stops, governor_tokens_saved, governor_seconds_saved
+
+# sfârșit de propoziție: .!?… urmat de spațiu (nu „3.5”, nu „e.g” în mijlocul cuvântului)
+_SENT_END = re.compile(r"[.!?…]+[\"')\]]*(?=\s)")
+_CHARS_PER_TOKEN = 4.0
+
+
+def govern_length(
+    token_iter: Iterable[str],
+    max_sentences: int = 3,
+    max_speech_s: float = 12.0,
+    chars_per_s: float = 14.0,        # viteza de vorbire estimată (caractere/secundă)
+    max_tokens: int = 120,            # num_predict — pentru estimarea a cât am economisit
+    on_stop: Optional[Callable[[str], None]] = None,
+    logger=None,
+) -> Iterator[str]:
+    """
+    Lasă să treacă tokenii până când răspunsul atinge `max_sentences` propoziții sau
+    ~`max_speech_s` secunde de vorbire; atunci închide CURAT la granița de propoziție,
+    cheamă `on_stop(motiv)` (=> llm.cancel: Ollama nu mai generează ce nu vom rosti) și se oprește.
+    Dacă o propoziție lungă depășește bugetul cu 50% fără punct, taie la ultimul cuvânt.
+    """
+    cps = max(1.0, float(chars_per_s))
+    text = ""        # tot ce am primit
+    sent = 0         # text deja livrat (index în `text`)
+    n_sentences = 0
+    scan = 0         # de unde căutăm următorul sfârșit de propoziție
+    reason = None
+
+    for tok in token_iter:
+        text += tok
+        cut = None
+        for m in _SENT_END.finditer(text, scan):
+            scan = m.end()
+            n_sentences += 1
+            if n_sentences >= max_sentences:
+                cut, reason = m.end(), "sentences"
+                break
+            if m.end() / cps >= max_speech_s:
+                cut, reason = m.end(), "seconds"
+                break
+        if cut is None and len(text) / cps >= max_speech_s * 1.5:
+            sp = text.rfind(" ", sent)
+            cut, reason = (sp if sp > sent else len(text)), "hard"
+        if cut is not None:
+            out = text[sent:cut]
+            if out:
+                yield out
+            break
+        # livrăm tot ce am; textul de după ultima graniță rămâne oricum „în zbor” spre TTS
+        yield text[sent:]
+        sent = len(text)
+    else:
+        return  # stream terminat natural, în buget
+
+    # bucățile din stream nu sunt tokeni (TokenPump/race le coalesc; eval_count vine abia la final,
+    # iar stream-ul e anulat) => tokenii generați se estimează din caractere
+    n_tok = int(round(len(text) / _CHARS_PER_TOKEN))
+    rest_tokens = max(0, int(max_tokens) - n_tok)
+    saved_s = rest_tokens * _CHARS_PER_TOKEN / cps
+    governor_stops.labels(reason=reason).inc()
+    governor_tokens_saved.inc(rest_tokens)
+    governor_seconds_saved.inc(saved_s)
+    if logger:
+        logger.info(f"📏 Buget vorbire atins ({reason}: {n_sentences} propoziții, ~{len(text[:cut]) / cps:.1f}s) "
+                    f"— opresc LLM (economisit ≤{rest_tokens} tokeni, ~{saved_s:.0f}s)")
+    if on_stop is not None:
+        on_stop(reason)
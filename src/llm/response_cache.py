@@ -0,0 +1,133 @@
+# src/llm/response_cache.py
+from __future__ import annotations
+import atexit, hashlib, json, os, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+def cache_key(norm_text: str, lang: str, mode: str, fingerprint: str) -> str:
+    raw = f"{norm_text}|{lang}|{mode}|{fingerprint}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache LRU + TTL pentru răspunsuri LLM deterministe (mod precise, temperature 0).
+    - cheie: hash(normalize_text(întrebare), limbă, mod, amprentă model+prompt)
+    - persistat într-un JSON mic (scriere atomică tmp + os.replace), reîncărcat la pornire
+    - scrierea NU e pe calea de tokeni: put() doar marchează „dirty”, un thread de fundal salvează
+      cel mult o dată la `save_delay_s` (debounce); flush() la ieșire (atexit)
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_s: float = 86400.0,
+                 path: Optional[Path] = None, logger=None, save_delay_s: float = 2.0):
+        self.max_entries = int(max_entries)
+        self.ttl_s = float(ttl_s)
+        self.path = Path(path) if path else None
+        self.log = logger
+        self._lock = threading.Lock()
+        # key -> (timestamp wall-clock, text); wall-clock ca TTL-ul să supraviețuiască restartului
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._load()
+
+        self.save_delay_s = max(0.0, float(save_delay_s))
+        self._dirty = False
+        self._save_lock = threading.Lock()  # un singur writer (thread-ul de fundal sau flush)
+        self._wake = threading.Event()
+        self._closed = False
+        self._th: Optional[threading.Thread] = None
+        if self.path:
+            self._th = threading.Thread(target=self._saver, name="llm-cache-save", daemon=True)
+            self._th.start()
+            atexit.register(self.close)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            ts, text = item
+            if time.time() - ts > self.ttl_s:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str):
+        text = (text or "").strip()
+        if not text:
+            return
+        with self._lock:
+            self._data[key] = (time.time(), text)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            self._dirty = True
+        self._wake.set()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._dirty = True
+        self._wake.set()
+
+    def flush(self):
+        """Scrie acum pe disc, dacă s-a schimbat ceva de la ultima salvare."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                snapshot = list(self._data.items())
+            self._save(snapshot)
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._th is not None and self._th is not threading.current_thread():
+            self._th.join(timeout=2.0)
+        self.flush()
+
+    def _saver(self):
+        while not self._closed:
+            self._wake.wait()
+            if self._closed:
+                break
+            time.sleep(self.save_delay_s)  # inserările din fereastra asta => o singură scriere
+            self._wake.clear()
+            self.flush()
+
+    # ——— persistență ———
+    def _load(self):
+        if not (self.path and self.path.exists()):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+            now = time.time()
+            for key, ts, text in rows[-self.max_entries:]:
+                if now - float(ts) <= self.ttl_s:
+                    self._data[key] = (float(ts), text)
+            if self.log:
+                self.log.info(f"💾 LLM response cache: {len(self._data)} intrări încărcate din {self.path}")
+        except Exception as e:
+            if self.log:
+                self.log.warning(f"LLM response cache ilizibil ({e}) — pornesc gol.")
+            self._data.clear()
+
+    def _save(self, snapshot):
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump([[k, ts, text] for k, (ts, text) in snapshot], f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            if self.log:
+                self.log.warning(f"LLM response cache: nu pot salva ({e})")
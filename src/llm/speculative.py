@@ -0,0 +1,191 @@
+# src/llm/speculative.py
+from __future__ import annotations
+import threading
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+import numpy as np
+import soundfile as sf
+from rapidfuzz.distance import Levenshtein
+
+from src.llm.engine import LLMStream
+from src.utils.textnorm import normalize_text
+from src.telemetry.metrics import llm_speculative
+
+
+class _Spec:
+    """Starea unei singure speculații (o pauză = o speculație)."""
+
+    def __init__(self, voiced_ms: int):
+        self.voiced_ms = int(voiced_ms)
+        self.asr_done = threading.Event()
+        self.asr_res: Optional[dict] = None
+        self.text = ""
+        self.lang = "en"
+        self.tokens: List[str] = []
+        self.stream = None  # LLMStream-ul speculației: discard() anulează doar cererea ei
+        self.cond = threading.Condition()
+        self.stream_done = False
+        self.started = False
+        self.committed = False
+        self.dead = False
+
+
+class SpeculativeTurn:
+    """
+    Generare LLM speculativă pe transcriptul de la prima pauză (înainte de endpoint):
+      - `on_pause()` e hook-ul pentru record_until_silence: rulează ASR pe audio-ul de până acum
+        într-un thread și, dacă textul e „bun de LLM”, pornește `llm.generate_stream`
+      - tokenii se strâng într-un buffer (NU se vorbesc) și NU intră în istoricul conversației
+      - `take(final_text)`: dacă transcriptul final e la distanță normalizată <= prag,
+        buffer-ul e comis (redat + continuat live), iar la final tura (final_text, răspuns)
+        intră în istoric; altfel se anulează cererea și istoricul rămâne neatins
+      - `reuse_transcript(voiced_ms)`: dacă după pauză n-a mai venit voce, transcriptul
+        speculativ E cel final => sărim peste a doua trecere ASR
+    """
+
+    def __init__(
+        self,
+        asr,
+        llm,
+        logger,
+        wav_path: Path,
+        sample_rate: int = 16000,
+        max_distance: float = 0.15,
+        should_speculate: Optional[Callable[[str], bool]] = None,
+        mode: str = "precise",
+    ):
+        self.asr = asr
+        self.llm = llm
+        self.log = logger
+        self.wav_path = Path(wav_path)
+        self.sr = int(sample_rate)
+        self.max_distance = float(max_distance)
+        self.should_speculate = should_speculate
+        self.mode = mode
+
+        self._lock = threading.Lock()
+        self._cur: Optional[_Spec] = None
+
+    # ——— hook din record_until_silence (thread-ul de captură: trebuie să fie rapid) ———
+    def on_pause(self, audio_i16: np.ndarray, voiced_ms: int):
+        self.discard()  # o pauză nouă înlocuiește speculația anterioară
+        spec = _Spec(voiced_ms)
+        with self._lock:
+            self._cur = spec
+        threading.Thread(target=self._run, args=(spec, audio_i16.copy()), name="spec-asr", daemon=True).start()
+
+    def _run(self, spec: _Spec, audio_i16: np.ndarray):
+        try:
+            self.wav_path.parent.mkdir(parents=True, exist_ok=True)
+            sf.write(str(self.wav_path), audio_i16, self.sr, subtype="PCM_16")
+            if hasattr(self.asr, "transcribe_ro_en"):
+                res = self.asr.transcribe_ro_en(str(self.wav_path))
+            else:
+                res = self.asr.transcribe(str(self.wav_path), language_override="en")
+        except Exception as e:
+            self.log.debug(f"Speculative ASR error: {e}")
+            spec.asr_done.set()
+            return
+
+        with self._lock:
+            spec.asr_res = res
+            spec.text = (res.get("text") or "").strip()
+            spec.lang = res.get("lang") if res.get("lang") in ("ro", "en") else "en"
+            ok = (not spec.dead and bool(spec.text)
+                  and (self.should_speculate is None or self.should_speculate(spec.text)))
+            spec.started = ok
+        spec.asr_done.set()
+        if not ok:
+            return
+
+        self.log.info(f"🔮 LLM speculativ pornit pe: [{spec.lang}] {spec.text}")
+        try:
+            spec.stream = self.llm.generate_stream(spec.text, lang_hint=spec.lang, mode=self.mode, history=False)
+            if spec.dead:
+                spec.stream.cancel("speculation")
+            for tok in spec.stream:
+                with spec.cond:
+                    if spec.dead:
+                        break
+                    spec.tokens.append(tok)
+                    spec.cond.notify_all()
+        except Exception as e:
+            self.log.debug(f"Speculative LLM error: {e}")
+        finally:
+            with spec.cond:
+                spec.stream_done = True
+                spec.cond.notify_all()
+
+    # ——— după endpoint ———
+    def reuse_transcript(self, voiced_ms: int, wait_s: float = 5.0) -> Optional[dict]:
+        """Transcriptul speculativ, dacă acoperă TOATĂ vocea înregistrată (altfel None)."""
+        with self._lock:
+            spec = self._cur
+        if spec is None or spec.voiced_ms != int(voiced_ms):
+            return None
+        if not spec.asr_done.wait(wait_s):
+            return None
+        return dict(spec.asr_res) if spec.asr_res else None
+
+    def take(self, final_text: str, lang: str) -> Optional[Iterator[str]]:
+        """Comite speculația dacă transcriptul final se potrivește; altfel o anulează și întoarce None."""
+        with self._lock:
+            spec = self._cur
+        if spec is None or not spec.started or spec.dead:
+            self.discard()
+            return None
+        dist = Levenshtein.normalized_distance(normalize_text(final_text), normalize_text(spec.text))
+        if spec.lang != lang or dist > self.max_distance:
+            self.log.info(f"🔮 Speculație respinsă (dist={dist:.2f}, lang {spec.lang}/{lang})")
+            self.discard()
+            return None
+        with self._lock:
+            spec.committed = True
+            self._cur = None
+        llm_speculative.labels(outcome="committed").inc()
+        self.log.info(f"🔮 Speculație comisă (dist={dist:.2f}, {len(spec.tokens)} bucăți deja în buffer)")
+        gen = self._commit(spec, final_text, lang)
+        # cancel() pe stream-ul comis (bugetul de lungime / „nu știu”) oprește cererea speculației
+        return LLMStream(gen, spec.stream.cancel) if spec.stream is not None else gen
+
+    def _commit(self, spec: _Spec, final_text: str, lang: str) -> Iterator[str]:
+        """Redă speculația; tura intră în istoric cu transcriptul FINAL, după redare (sau barge-in)."""
+        reply: List[str] = []
+        try:
+            for chunk in self._replay(spec):
+                reply.append(chunk)
+                yield chunk
+        finally:
+            remember = getattr(self.llm, "remember", None)
+            if remember is not None:
+                remember(final_text, lang, "".join(reply))
+
+    @staticmethod
+    def _replay(spec: _Spec) -> Iterator[str]:
+        i = 0
+        while True:
+            with spec.cond:
+                while i >= len(spec.tokens) and not spec.stream_done:
+                    spec.cond.wait(0.1)
+                if i >= len(spec.tokens):
+                    return
+                batch = spec.tokens[i:]
+                i = len(spec.tokens)
+            yield "".join(batch)
+
+    def discard(self):
+        """Renunță la speculația curentă necomisă: invalidează buffer-ul și anulează cererea LLM (istoricul rămâne neatins)."""
+        with self._lock:
+            spec, self._cur = self._cur, None
+        if spec is None or spec.committed:
+            return
+        with spec.cond:
+            spec.dead = True
+            spec.cond.notify_all()
+        if spec.started:
+            llm_speculative.labels(outcome="discarded").inc()
+            if spec.stream is not None:
+                try:
+                    spec.stream.cancel("speculation")
+                except Exception:
+                    pass
@@ -1,12 +1,18 @@
 # src/llm/stream_shaper.py
 from __future__ import annotations
-import time
-from typing import Iterable, Iterator
+import queue, time
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.llm.token_pump import TokenPump
+from src.telemetry.metrics import shaper_flushes, shaper_first_emit, shaper_first_emit_after_token
+from src.telemetry.tracing import tracer
 
 _BOUNDARY = ".!?…:;"
+_CLAUSE = ".!?…:;,"
+
 
-def _has_boundary(s: str) -> bool:
-    return any(ch in s for ch in _BOUNDARY)
+def _has_boundary(s: str, chars: str = _BOUNDARY) -> bool:
+    return any(ch in s for ch in chars)
 
 def _cut_soft(s: str, soft_max_chars: int) -> tuple[str, str]:
     if len(s) <= soft_max_chars:
@@ -23,59 +29,141 @@ def shape_stream(
     min_chunk_chars: int = 60,    # nu livra bucăți prea mici
     soft_max_chars: int = 140,    # forțează flush dacă devine prea lung fără punctuație
     max_idle_ms: int = 250,       # dacă nu vin tokeni o fracțiune de secundă, flushează ce ai
+    max_prebuffer_ms: Optional[int] = 700,  # limită de timp pentru prebuffer (None = fără limită)
+    on_emit: Optional[Callable[[str, str, float], None]] = None,  # (text, motiv, secunde de la start)
+    on_first_emit: Optional[Callable[[float, float], None]] = None,  # (s de la start, s de la primul token)
+    pacer=None,                   # AdaptivePacer: prima bucată = prima frază, apoi bucăți tot mai mari
+    queue_max: int = 512,         # coada mărginită dintre reader-ul LLM și shaper (backpressure)
+    trace=None,                   # trace-ul turei (tracer.capture() la apel); implicit: la prima iterație
 ) -> Iterator[str]:
     """
     Strânge tokenii în fraze stabile:
-      - pornește vorbirea doar după ~prebuffer_chars
+      - pornește vorbirea doar după ~prebuffer_chars (sau după max_prebuffer_ms de la PRIMUL token:
+        un prefill lung nu consumă bugetul de prebuffer)
       - apoi livrează când găsește punctuație sau depășește soft_max_chars
-      - dacă nu mai vin tokeni o clipă, flushează ce ai (max_idle_ms)
+      - dacă nu mai vin tokeni max_idle_ms, flushează ce ai — pe TIMER, nu la următorul token:
+        tokenii sunt citiți de TokenPump (thread propriu, coadă mărginită), iar aici așteptăm cu deadline
+    Cu `pacer`, prebuffer/min_chunk fixe sunt înlocuite de ținte adaptive (debit LLM + RTF TTS).
     """
-    buf = []
-    buf_chars = 0
-
-    # 1) prebuffer inițial — evită startul în mijloc de propoziție
-    t_last = time.monotonic()
-    for tok in token_iter:
-        buf.append(tok)
-        buf_chars += len(tok)
-        t_last = time.monotonic()
-        if buf_chars >= prebuffer_chars:
-            break
-
-    if buf_chars:
-        yield "".join(buf)
-        buf = []
-        buf_chars = 0
-
-    # 2) rulare normală — preferă propoziții complete, dar fără pauze lungi
-    carry = ""
-    t_last = time.monotonic()
-    for tok in token_iter:
-        carry += tok
+    tr = trace if trace is not None else tracer.capture()
+    pump = token_iter if isinstance(token_iter, TokenPump) else TokenPump(token_iter, maxsize=queue_max, trace=tr)
+
+    t0 = time.monotonic()
+    idle_s = max(1, int(max_idle_ms)) / 1000.0
+    pre_s = max_prebuffer_ms / 1000.0 if max_prebuffer_ms else None
+    pre_deadline: Optional[float] = None  # pornește la primul token
+    t_first_tok: Optional[float] = None
+    first = True
+    n_emit = 0
+
+    def emit(text: str, reason: str) -> str:
+        nonlocal first, n_emit
+        n_emit += 1
         now = time.monotonic()
-        # avem propoziție completă?
-        if _has_boundary(carry) and len(carry) >= min_chunk_chars:
-            out = carry
-            carry = ""
-            yield out
-            t_last = now
-            continue
-
-        # prea lung fără punctuație? taie blând
-        if len(carry) >= soft_max_chars:
-            head, tail = _cut_soft(carry, soft_max_chars)
-            if head:
-                yield head
-                t_last = now
-            carry = tail
-            continue
-
-        # idle flush (dacă nu mai vin tokeni)
-        if (now - t_last) * 1000 >= max_idle_ms and carry:
-            yield carry
-            carry = ""
-            t_last = now
-
-    # 3) finalizează restul
-    if carry.strip():
-        yield carry
+        dt = now - t0
+        shaper_flushes.labels(reason=reason).inc()
+        if first:
+            after_tok = now - (t_first_tok if t_first_tok is not None else t0)
+            shaper_first_emit.observe(dt)
+            shaper_first_emit_after_token.observe(after_tok)
+            tr.mark("first_chunk", reason=reason, chars=len(text),
+                        after_first_token_ms=round(after_tok * 1000.0, 1))
+            if on_first_emit is not None:
+                on_first_emit(dt, after_tok)
+            first = False
+        if on_emit is not None:
+            on_emit(text, reason, dt)
+        return text
+
+    carry = ""
+    prebuffering = True   # 1) prebuffer inițial — evită startul în mijloc de propoziție
+    t_last = t0           # sosirea ultimului token
+    try:
+        while True:
+            timeout = None
+            if carry:
+                deadline = t_last + idle_s
+                if prebuffering and pre_deadline is not None:
+                    deadline = min(deadline, pre_deadline)
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = pump.get(timeout=timeout)
+            except queue.Empty:
+                # idle flush (nu mai vin tokeni) / prebuffer prea lung
+                now = time.monotonic()
+                late_pre = prebuffering and pre_deadline is not None and now >= pre_deadline
+                yield emit(carry, "prebuffer_timeout" if late_pre else "idle")
+                carry = ""
+                prebuffering = False
+                continue
+
+            if item is None:
+                break
+            carry += item
+            t_last = time.monotonic()
+            if t_first_tok is None:
+                t_first_tok = t_last
+                if pre_s is not None:
+                    pre_deadline = t_last + pre_s
+            if pacer is not None:
+                pacer.on_tokens(len(item))
+
+            if prebuffering:
+                if len(carry) >= prebuffer_chars:
+                    yield emit(carry, "prebuffer")
+                    carry = ""
+                    prebuffering = False
+                elif (pacer is not None and len(carry) >= pacer.first_chunk_chars
+                      and _has_boundary(item, _CLAUSE)):
+                    # prima frază/virgulă => primul sunet cât mai devreme
+                    yield emit(carry, "first_clause")
+                    carry = ""
+                    prebuffering = False
+                continue
+
+            # 2) rulare normală — preferă propoziții complete, dar fără pauze lungi
+            min_chars, soft_chars = min_chunk_chars, soft_max_chars
+            if pacer is not None:
+                min_chars = pacer.next_chunk_chars(n_emit)
+                soft_chars = max(soft_max_chars, int(min_chars * 1.25))
+            if _has_boundary(carry) and len(carry) >= min_chars:
+                out, carry = carry, ""
+                yield emit(out, "boundary")
+                continue
+
+            # prea lung fără punctuație? taie blând
+            if len(carry) >= soft_chars:
+                head, tail = _cut_soft(carry, soft_chars)
+                carry = tail
+                if head:
+                    yield emit(head, "soft_max")
+
+        # 3) finalizează restul
+        if carry.strip():
+            yield emit(carry, "final")
+    finally:
+        pump.close()
+
+
+if __name__ == "__main__":
+    # Demo: model care se oprește la mijlocul propoziției (python -m src.llm.stream_shaper)
+    def stalling():
+        for i, tok in enumerate("Sigur, iată răspunsul meu pe scurt despre ce ai întrebat".split()):
+            time.sleep(0.9 if i == 4 else 0.03)
+            yield tok + " "
+
+    def slow_prefill():
+        time.sleep(1.2)  # primul token după 1.2 s (> max_prebuffer_ms)
+        for tok in "Bucharest is the capital of Romania, and its largest city.".split():
+            time.sleep(0.03)
+            yield tok + " "
+
+    def show(text, reason, dt):
+        print(f"{dt * 1000:7.1f} ms  {reason:17} {text!r}")
+
+    def show_first(dt, after_tok):
+        print(f"   primul emit: {dt * 1000:.0f} ms de la start, {after_tok * 1000:.0f} ms de la primul token")
+
+    for gen in (stalling(), slow_prefill()):
+        for _ in shape_stream(gen, prebuffer_chars=120, max_idle_ms=250, on_emit=show, on_first_emit=show_first):
+            pass
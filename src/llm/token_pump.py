@@ -0,0 +1,102 @@
+# src/llm/token_pump.py - citirea stream-ului LLM pe thread propriu, cu coadă mărginită
+from __future__ import annotations
+import queue, threading, time
+from typing import Iterable, Optional
+
+from src.telemetry.metrics import stage_latency, token_queue_full
+from src.telemetry.tracing import tracer
+
+_END = object()
+
+
+class _Failure:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class TokenPump:
+    """
+    Consumă generatorul LLM pe un thread dedicat, într-o coadă MĂRGINITĂ:
+      - socket-ul Ollama e citit continuu, indiferent cât durează sinteza Piper în aval
+        => TTFT / durata LLM se măsoară aici, nedistorsionat de TTS
+      - dacă aval-ul rămâne în urmă și coada se umple, thread-ul se blochează (backpressure
+        explicit: nu mai citim socket-ul => TCP frânează serverul), iar timpul blocat e măsurat
+      - `close()` oprește citirea (ex. consumatorul a renunțat / barge-in)
+    Metrici: stage_latency{stage="llm_stream"} și {stage="llm_backpressure"}, token_queue_full_total.
+    """
+
+    def __init__(self, token_iter: Iterable[str], maxsize: int = 512, name: str = "llm-reader", trace=None):
+        self.q: "queue.Queue" = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._trace = trace if trace is not None else tracer.capture()  # tura care a pornit citirea
+        self._src = token_iter
+        self._stop = threading.Event()
+        self.t_start = time.monotonic()
+        self.t_first: Optional[float] = None
+        self.t_end: Optional[float] = None
+        self.n_tokens = 0
+        self.blocked_s = 0.0
+        self._th = threading.Thread(target=self._run, name=name, daemon=True)
+        self._th.start()
+
+    def _run(self):
+        try:
+            for tok in self._src:
+                if self._stop.is_set():
+                    break
+                if not tok:
+                    continue
+                if self.t_first is None:
+                    self.t_first = time.monotonic()
+                    self._trace.mark("llm_first_token", t=self.t_first, once=True)
+                self.n_tokens += 1
+                self._put(tok)
+        except BaseException as e:  # eroarea ajunge la consumator, ca la iterarea directă
+            self._put(_Failure(e))
+        finally:
+            self.t_end = time.monotonic()
+            self._put(_END)
+            if not self._stop.is_set():
+                stage_latency.labels(stage="llm_stream").observe(self.t_end - self.t_start)
+            stage_latency.labels(stage="llm_backpressure").observe(self.blocked_s)
+
+    def _put(self, item):
+        try:
+            self.q.put_nowait(item)
+            return
+        except queue.Full:
+            token_queue_full.inc()
+        t0 = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.q.put(item, timeout=0.05)
+                break
+            except queue.Full:
+                continue
+        self.blocked_s += time.monotonic() - t0
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Următorul token; None la final; ridică queue.Empty la timeout și eroarea din amonte."""
+        item = self.q.get(timeout=timeout)
+        if item is _END:
+            return None
+        if isinstance(item, _Failure):
+            raise item.exc
+        return item
+
+    def __iter__(self):
+        while True:
+            tok = self.get()
+            if tok is None:
+                return
+            yield tok
+
+    def close(self):
+        self._stop.set()
+        # golește coada ca un reader blocat în put() să vadă stop-ul imediat
+        try:
+            while True:
+                self.q.get_nowait()
+        except queue.Empty:
+            pass
@@ -0,0 +1,52 @@
+# src/llm/unknown_detector.py - recunoaște devreme răspunsul fix „nu știu”
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from src.utils.textnorm import normalize_text
+from src.telemetry.metrics import unknown_answer
+
+
+class UnknownDetector:
+    """
+    Matcher de prefix pe stream-ul LLM pentru propozițiile fixe de tip „nu știu” (RO/EN).
+    Cât timp începutul răspunsului poate fi încă una dintre ele, tokenii sunt ținuți în buffer;
+    după `min_match_chars` caractere normalizate identice => e răspunsul fix:
+      - `on_detect(lang)` (anulează restul generării)
+      - se livrează propoziția canonică dintr-o bucată (TTS o găsește pre-randată în cache)
+    La prima divergență, buffer-ul e eliberat și stream-ul trece neatins.
+    """
+
+    def __init__(self, phrases: Dict[str, str], min_match_chars: int = 24):
+        self.phrases = dict(phrases)  # lang -> propoziția exactă
+        self._norm = {lang: normalize_text(p) for lang, p in self.phrases.items()}
+        self.min_match_chars = int(min_match_chars)
+
+    def _candidates(self, norm: str):
+        return [lang for lang, p in self._norm.items() if p.startswith(norm)]
+
+    def wrap(self, token_iter: Iterable[str], on_detect: Optional[Callable[[str], None]] = None) -> Iterator[str]:
+        buf = []
+        it = iter(token_iter)
+        for tok in it:
+            buf.append(tok)
+            norm = normalize_text("".join(buf))
+            if not norm:
+                continue
+            cands = self._candidates(norm)
+            if not cands:
+                break  # divergent => răspuns normal
+            if len(norm) >= min(self.min_match_chars, len(self._norm[cands[0]])):
+                lang = cands[0]
+                unknown_answer.inc()
+                if on_detect is not None:
+                    on_detect(lang)
+                yield self.phrases[lang]
+                return
+        else:
+            # stream terminat cât încă era prefix (răspuns foarte scurt) — îl dăm mai departe
+            if buf:
+                yield "".join(buf)
+            return
+
+        yield "".join(buf)
+        yield from it
@@ -0,0 +1,67 @@
+# python -m src.replay rec/*.wav [--out DIR] [--first-token-ms 300 --tps 20] [--max-first-play-ms 1500]
+from __future__ import annotations
+import json, sys, time
+from pathlib import Path
+from typing import List
+
+from src.core.config import ROOT
+from src.replay.fake_ollama import DEFAULT_REPLY
+from src.replay.harness import format_table, run_replay
+
+
+def _cli(argv: List[str]) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(
+        prog="python -m src.replay",
+        description="Replay offline: WAV-uri înregistrate prin bucla reală din app.py, latențe per etapă. "
+                    "Transcript opțional lângă fiecare WAV (<nume>.txt) => ASR sărit (CI fără modele).")
+    ap.add_argument("recordings", nargs="+", help="fișiere .wav sau directoare (în ordine alfabetică)")
+    ap.add_argument("--out", help="director rezultat (implicit data/replay/<timestamp>)")
+    ap.add_argument("--asr", choices=("auto", "transcript", "real"), default="auto")
+    ap.add_argument("--asr-ms", type=float, default=0.0, help="latență simulată pentru ASR-ul din transcript")
+    ap.add_argument("--tts", choices=("auto", "piper", "synthetic"), default="auto")
+    ap.add_argument("--tts-rtf", type=float, default=0.15, help="RTF simulat pentru --tts synthetic")
+    ap.add_argument("--lang", default="en", help="limba implicită a transcriptelor")
+    ap.add_argument("--wake-wav", help="audio pentru wake (implicit: prima înregistrare)")
+    ap.add_argument("--llm-url", help="Ollama real în loc de serverul fals")
+    ap.add_argument("--first-token-ms", type=float, default=250.0)
+    ap.add_argument("--tps", type=float, default=25.0, help="tokeni/s după primul token")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--cold-load-ms", type=float, default=0.0)
+    ap.add_argument("--reply", default=DEFAULT_REPLY)
+    ap.add_argument("--replies", help="JSON {subșir întrebare: răspuns}")
+    ap.add_argument("--timeout-s", type=float, help="oprire forțată (implicit după durata estimată)")
+    ap.add_argument("--max-first-play-ms", type=float,
+                    help="cod de ieșire 1 dacă vreo înregistrare depășește pragul (sau n-a produs tură)")
+    args = ap.parse_args(argv)
+
+    recs: List[Path] = []
+    for r in args.recordings:
+        p = Path(r)
+        recs.extend(sorted(p.glob("*.wav")) if p.is_dir() else [p])
+    out = Path(args.out) if args.out else ROOT / "data" / "replay" / time.strftime("%Y%m%d-%H%M%S")
+    replies = json.loads(Path(args.replies).read_text(encoding="utf-8")) if args.replies else None
+    server_opts = {"first_token_ms": args.first_token_ms, "tokens_per_s": args.tps,
+                   "jitter_ms": args.jitter_ms, "cold_load_ms": args.cold_load_ms,
+                   "replies": replies, "default_reply": args.reply}
+
+    report = run_replay(recs, out, asr=args.asr, tts=args.tts, lang=args.lang, wake_wav=args.wake_wav,
+                        llm_url=args.llm_url, server_opts=server_opts, asr_ms=args.asr_ms,
+                        tts_rtf=args.tts_rtf, timeout_s=args.timeout_s)
+    print(format_table(report))
+    print(f"asr={report['asr']} tts={report['tts']} llm={report['llm_url']}  ->  {out / 'report.json'}")
+    if report["timed_out"]:
+        print("⚠️ replay oprit de timeout")
+        return 1
+    if args.max_first_play_ms is not None:
+        bad = [r["recording"] for r in report["recordings"]
+               if r["stages"].get("first_play", float("inf")) > args.max_first_play_ms
+               and r.get("path") in ("llm", None)]
+        if bad:
+            print(f"❌ first_play > {args.max_first_play_ms:g} ms: {', '.join(bad)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_cli(sys.argv[1:]))
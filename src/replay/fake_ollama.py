@@ -0,0 +1,201 @@
+# src/replay/fake_ollama.py - server Ollama fals pentru replay/CI: tokeni „la conservă”, latențe configurabile
+from __future__ import annotations
+import json, random, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+DEFAULT_REPLY = "Sure. This is a canned answer from the replay server, streamed token by token."
+_TOKEN = re.compile(r"\s*\S+")
+
+
+def split_tokens(text: str) -> List[str]:
+    """„Tokeni” la nivel de cuvânt, cu spațiul din față păstrat (ca la Ollama)."""
+    return _TOKEN.findall(text or "")
+
+
+class FakeOllama:
+    """
+    Imită suprafața Ollama folosită de LLMLocal: /api/version, /api/tags, /api/ps,
+    /api/generate și /api/chat (NDJSON, stream sau nu), inclusiv statisticile din mesajul final
+    (load_duration, prompt_eval_*, eval_*), ca metricile de TTFT/cold-load să aibă ce măsura.
+      - first_token_ms: întârzierea până la primul token (evaluarea promptului)
+      - tokens_per_s:   debitul de decodare după primul token
+      - jitter_ms:      zgomot uniform ±jitter pe fiecare token (seed fix => rulări reproductibile)
+      - cold_load_ms:   plătit o singură dată per model, la prima cerere (simulează încărcarea)
+      - model_first_token_ms: suprascrieri per model (ex. modelul mic din tiered_mode)
+    Răspunsul: prima cheie din `replies` conținută în întrebare (lowercase), altfel `default_reply`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, first_token_ms: float = 250.0,
+                 tokens_per_s: float = 25.0, jitter_ms: float = 0.0, cold_load_ms: float = 0.0,
+                 replies: Optional[Dict[str, str]] = None, default_reply: str = DEFAULT_REPLY,
+                 model_first_token_ms: Optional[Dict[str, float]] = None, seed: int = 0):
+        self.first_token_ms = float(first_token_ms)
+        self.tokens_per_s = max(0.1, float(tokens_per_s))
+        self.jitter_ms = float(jitter_ms)
+        self.cold_load_ms = float(cold_load_ms)
+        self.replies = {k.lower(): v for k, v in (replies or {}).items()}
+        self.default_reply = default_reply
+        self.model_first_token_ms = dict(model_first_token_ms or {})
+        self.requests: List[Dict] = []  # (path, model, prompt) — pentru raport/depanare
+        self._loaded: set = set()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._httpd = ThreadingHTTPServer((host, int(port)), self._handler())
+        self._httpd.daemon_threads = True
+        self._th: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._th = threading.Thread(target=self._httpd.serve_forever, name="fake-ollama", daemon=True)
+        self._th.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # ---------- logica răspunsului ----------
+    def reply_for(self, question: str) -> str:
+        q = (question or "").lower()
+        for key, reply in self.replies.items():
+            if key in q:
+                return reply
+        return self.default_reply
+
+    def _load_delay_s(self, model: str) -> float:
+        """Prima cerere pentru un model plătește cold_load_ms (o singură dată)."""
+        with self._lock:
+            if model in self._loaded:
+                return 0.0
+            self._loaded.add(model)
+        return self.cold_load_ms / 1000.0
+
+    def _token_gap_s(self) -> float:
+        gap = 1.0 / self.tokens_per_s
+        if self.jitter_ms:
+            with self._lock:
+                gap += self._rng.uniform(-self.jitter_ms, self.jitter_ms) / 1000.0
+        return max(0.0, gap)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, ca pool-ul HTTP din LLMLocal să fie exercitat
+
+            def log_message(self, *a):
+                pass
+
+            def _json(self, obj, code: int = 200):
+                b = json.dumps(obj).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(b)))
+                self.end_headers()
+                self.wfile.write(b)
+
+            def _chunk(self, obj):
+                d = json.dumps(obj).encode("utf-8") + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(d), d))
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    return self._json({"version": "0.0.0-replay"})
+                if self.path in ("/api/tags", "/api/ps"):
+                    return self._json({"models": [{"name": m, "model": m} for m in sorted(server._loaded)]})
+                self._json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                n = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(n) or b"{}")
+                except ValueError:
+                    return self._json({"error": "bad json"}, 400)
+                if self.path not in ("/api/generate", "/api/chat"):
+                    return self._json({"error": "not found"}, 404)
+                chat = self.path == "/api/chat"
+                model = str(body.get("model") or "")
+                if chat:
+                    users = [m.get("content", "") for m in body.get("messages") or [] if m.get("role") == "user"]
+                    question = users[-1] if users else ""
+                else:
+                    question = str(body.get("prompt") or "")
+                server.requests.append({"path": self.path, "model": model, "prompt": question[-200:],
+                                        "ts": time.time()})
+                load_s = server._load_delay_s(model)
+                t0 = time.perf_counter()
+
+                # warm-up (prompt gol) / stream=false: un singur obiect JSON
+                if not question.strip() or body.get("stream") is False:
+                    time.sleep(load_s)
+                    text = server.reply_for(question) if question.strip() else ""
+                    return self._json(self._final(model, chat, text, load_s, t0, len(split_tokens(text))))
+
+                first_s = server.model_first_token_ms.get(model, server.first_token_ms) / 1000.0
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                toks = split_tokens(server.reply_for(question))
+                try:
+                    time.sleep(load_s + first_s)
+                    for i, tok in enumerate(toks):
+                        if i:
+                            time.sleep(server._token_gap_s())
+                        obj = {"model": model, "done": False}
+                        if chat:
+                            obj["message"] = {"role": "assistant", "content": tok}
+                        else:
+                            obj["response"] = tok
+                        self._chunk(obj)
+                    fin = self._final(model, chat, "", load_s, t0, len(toks))
+                    fin["eval_duration"] = int(max(0.0, time.perf_counter() - t0 - load_s - first_s) * 1e9)
+                    self._chunk(fin)
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # clientul a anulat (barge-in / length governor / unknown)
+
+            @staticmethod
+            def _final(model: str, chat: bool, text: str, load_s: float, t0: float, n_tok: int) -> Dict:
+                fin = {"model": model, "done": True, "done_reason": "stop",
+                       "total_duration": int((time.perf_counter() - t0) * 1e9),
+                       "load_duration": int(load_s * 1e9),
+                       "prompt_eval_count": 32, "prompt_eval_duration": int(server.first_token_ms * 1e6),
+                       "eval_count": n_tok, "eval_duration": 0}
+                if chat:
+                    fin["message"] = {"role": "assistant", "content": text}
+                else:
+                    fin["response"] = text
+                return fin
+
+        return Handler
+
+
+if __name__ == "__main__":
+    # python -m src.replay.fake_ollama --port 11434 --first-token-ms 300 --tps 20
+    import argparse
+    ap = argparse.ArgumentParser(description="Server Ollama fals (tokeni la conservă, latențe configurabile)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11434)
+    ap.add_argument("--first-token-ms", type=float, default=250.0)
+    ap.add_argument("--tps", type=float, default=25.0, help="tokeni/s după primul token")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--cold-load-ms", type=float, default=0.0)
+    ap.add_argument("--reply", default=DEFAULT_REPLY)
+    ap.add_argument("--replies", help="JSON {subșir întrebare: răspuns}")
+    a = ap.parse_args()
+    replies = json.loads(open(a.replies, encoding="utf-8").read()) if a.replies else None
+    srv = FakeOllama(a.host, a.port, a.first_token_ms, a.tps, a.jitter_ms, a.cold_load_ms,
+                     replies=replies, default_reply=a.reply)
+    print(f"fake ollama on {srv.url} (first_token={a.first_token_ms:g} ms, {a.tps:g} tok/s)")
+    try:
+        srv._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,298 @@
+# src/replay/harness.py - replay end-to-end: WAV-uri -> bucla reală din app.py -> latențe per etapă
+from __future__ import annotations
+import _thread, itertools, json, os, re, shutil, sys, tempfile, threading, time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import soundfile as sf
+
+from src.core.config import load_all, ROOT
+from src.replay.fake_ollama import FakeOllama
+from src.replay.virtual_audio import Segment, Tape, load_wav, make_sounddevice
+from src.telemetry.metrics import _percentiles
+from src.telemetry.tracing import tracer
+
+# (etapă, margine): momentul raportat, în ms de la sfârșitul vorbirii (capture_end)
+REPORT_STAGES = (
+    ("vad_endpoint", "start"), ("asr", "end"), ("route", "end"), ("faq", "end"),
+    ("llm_first_token", "start"), ("first_chunk", "start"), ("first_synth", "start"),
+    ("first_play", "start"), ("barge_in", "start"), ("tts_end", "start"),
+)
+_RO_CHARS = set("ăâîșşțţĂÂÎȘŞȚŢ")
+
+
+def _guess_lang(text: str, default: str) -> str:
+    return "ro" if any(c in _RO_CHARS for c in text or "") else default
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)[:60] or "x"
+
+
+class ReplayASR:
+    """
+    ASR pentru replay: transcriptul segmentului de pe bandă (`<wav>.txt`) sau ASR-ul real.
+    Segmentele `forced` (wake) folosesc mereu transcriptul — replay-ul măsoară turele, nu wake-ul.
+    """
+
+    def __init__(self, tape: Tape, inner=None, asr_ms: float = 0.0):
+        self.tape = tape
+        self.inner = inner
+        self.asr_ms = float(asr_ms)
+
+    def _canned(self) -> Optional[Dict]:
+        seg = self.tape.current
+        if seg is None or (self.inner is not None and not seg.forced):
+            return None
+        if self.asr_ms:
+            time.sleep(self.asr_ms / 1000.0)
+        return {"text": seg.transcript or "", "lang": seg.lang}
+
+    def transcribe(self, wav_path, language_override: Optional[str] = None) -> Dict:
+        res = self._canned()
+        if res is not None:
+            return res
+        return self.inner.transcribe(wav_path, language_override=language_override)
+
+    def transcribe_ro_en(self, wav_path) -> Dict:
+        res = self._canned()
+        if res is not None:
+            return res
+        if hasattr(self.inner, "transcribe_ro_en"):
+            return self.inner.transcribe_ro_en(wav_path)
+        return self.inner.transcribe(wav_path, language_override="en")
+
+
+def _replay_tts_class(capture_dir: Path, synthetic: bool, chars_per_s: float = 14.0, rtf: float = 0.15):
+    """
+    Backend-ul Piper real (dublu-buffer, pacer, metrici), cu redarea înlocuită de copierea WAV-ului
+    în `capture_dir` + așteptarea duratei lui (stop/barge-in se comportă ca la difuzor).
+    `synthetic=True`: fără binar/voce Piper — un ton de durată len(text)/chars_per_s, „sintetizat”
+    în durată × rtf (timp de sinteză determinist pe CI).
+    """
+    from src.tts.engine import _PiperCmdTTS
+    seq = itertools.count(1)
+
+    class ReplayTTS(_PiperCmdTTS):
+        def __init__(self, cfg: Dict, logger):
+            try:
+                super().__init__(cfg, logger)
+            except RuntimeError:
+                if not synthetic:
+                    raise  # atributele sunt deja setate; lipsește doar executabilul Piper
+
+        def _synth_to_wav(self, text: str, lang: str) -> str:
+            if not synthetic:
+                return super()._synth_to_wav(text, lang)
+            dur = len(text) / chars_per_s + self.sentence_silence_ms / 1000.0
+            time.sleep(dur * rtf)
+            sr = 22050
+            t = np.arange(int(dur * sr), dtype=np.float32) / sr
+            fd, path = tempfile.mkstemp(prefix=f"piper_{lang}_", suffix=".wav")
+            os.close(fd)
+            sf.write(path, (0.05 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32), sr, subtype="PCM_16")
+            return path
+
+        def _play_wav(self, wav_path: str):
+            tr = tracer.current()
+            label = (tr.attrs.get("recording") or tr.kind) if tr else "tts"
+            try:
+                shutil.copyfile(wav_path, capture_dir / f"{next(seq):03d}_{_safe(str(label))}.wav")
+                dur = float(sf.info(wav_path).duration)
+            except Exception as e:
+                self.log.error(f"Replay: captura TTS a eșuat: {e}")
+                return
+            t_end = time.monotonic() + dur
+            while time.monotonic() < t_end and not self._stop.is_set():
+                time.sleep(0.02)
+
+    return ReplayTTS
+
+
+def _piper_ready(cfg_tts: Dict) -> bool:
+    p = cfg_tts.get("piper") or {}
+    exe = p.get("exe") or shutil.which("piper")
+    return bool(exe and os.path.exists(exe) and p.get("model_en") and os.path.exists(p["model_en"]))
+
+
+def build_segments(recordings: Sequence[Path], sample_rate: int, wake_phrase: str,
+                   lang: str = "en", wake_wav: Optional[Path] = None) -> List[Segment]:
+    """Wake (transcript forțat pe audio-ul `wake_wav` sau al primei înregistrări) + câte o replică per WAV."""
+    segs = []
+    for p in recordings:
+        p = Path(p)
+        side = p.with_suffix(".txt")
+        text = side.read_text(encoding="utf-8").strip() if side.exists() else None
+        segs.append(Segment(p.stem, load_wav(p, sample_rate), text, _guess_lang(text or "", lang)))
+    if not segs:
+        raise ValueError("nicio înregistrare de redat")
+    carrier = load_wav(Path(wake_wav), sample_rate) if wake_wav else segs[0].audio  # trebuie să treacă de VAD
+    return [Segment("wake", carrier, wake_phrase, "en", forced=True)] + segs
+
+
+def stage_offsets(rec: Dict) -> Dict[str, float]:
+    """ms de la capture_end până la fiecare etapă (prima apariție) + durata ASR."""
+    spans: Dict[str, Dict] = {}
+    for s in rec.get("spans") or []:
+        spans.setdefault(s["name"], s)
+    base = spans["capture_end"]["start_ms"] if "capture_end" in spans else 0.0
+    out = {}
+    for name, edge in REPORT_STAGES:
+        s = spans.get(name)
+        if s is not None:
+            at = s["start_ms"] + (s["dur_ms"] if edge == "end" else 0.0)
+            out[name] = round(at - base, 1)
+    if "asr" in spans:
+        out["asr_ms"] = spans["asr"]["dur_ms"]
+    return out
+
+
+def summarize(traces: List[Dict], names: Sequence[str]) -> Dict:
+    """Un rând per înregistrare (ultima tură etichetată cu ea) + p50/p95/max pe etape."""
+    by_name: Dict[str, Dict] = {}
+    for rec in traces:
+        if rec.get("kind") == "turn" and rec.get("recording"):
+            by_name[rec["recording"]] = rec
+    rows = []
+    for n in names:
+        rec = by_name.get(n)
+        if rec is None:
+            rows.append({"recording": n, "outcome": "no-turn", "stages": {}})
+            continue
+        rows.append({"recording": n, "trace_id": rec["trace_id"], "path": rec.get("path"),
+                     "lang": rec.get("lang"), "outcome": rec.get("outcome"),
+                     "total_ms": rec.get("total_ms"), "stages": stage_offsets(rec)})
+    keys = [k for k, _ in REPORT_STAGES] + ["asr_ms"]
+    agg = {}
+    for k in keys:
+        vals = [r["stages"][k] for r in rows if k in r["stages"]]
+        if vals:
+            agg[k] = _percentiles(vals)
+    return {"recordings": rows, "aggregate": agg}
+
+
+def read_traces(trace_dir: Path, since: float = 0.0) -> List[Dict]:
+    out = []
+    for path in sorted(Path(trace_dir).glob("traces-*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if rec.get("ts", 0) >= since:
+                    out.append(rec)
+    return out
+
+
+def format_table(report: Dict) -> str:
+    cols = (("asr", "asr"), ("llm_first_token", "llm_tok"), ("first_chunk", "chunk"),
+            ("first_synth", "synth"), ("first_play", "play"))
+    head = f"{'recording':<24} {'path':<8} " + " ".join(f"{h:>8}" for _, h in cols) + "  outcome"
+    lines = [head, "-" * len(head)]
+    for r in report["recordings"]:
+        st = r["stages"]
+        cells = " ".join(f"{st[k]:>8.0f}" if k in st else f"{'-':>8}" for k, _ in cols)
+        lines.append(f"{r['recording'][:24]:<24} {str(r.get('path') or '-'):<8} {cells}  {r['outcome']}")
+    for q in ("p50", "p95"):
+        cells = " ".join(f"{report['aggregate'][k][q]:>8.0f}" if k in report["aggregate"] else f"{'-':>8}"
+                         for k, _ in cols)
+        lines.append(f"{q:<24} {'':<8} {cells}")
+    lines.append("(ms de la sfârșitul vorbirii — capture_end)")
+    return "\n".join(lines)
+
+
+def run_replay(recordings: Sequence[Path], out_dir: Path, *, asr: str = "auto", tts: str = "auto",
+               lang: str = "en", wake_wav: Optional[Path] = None, llm_url: Optional[str] = None,
+               server_opts: Optional[Dict] = None, asr_ms: float = 0.0, tts_rtf: float = 0.15,
+               timeout_s: Optional[float] = None) -> Dict:
+    """
+    Rulează `src.app.main()` nemodificat, cu:
+      - microfon virtual (modul `sounddevice` înlocuit; fără PortAudio => merge headless pe CI)
+      - LLM pe `llm_url` sau pe FakeOllama pornit aici (`server_opts` -> FakeOllama)
+      - TTS capturat în `out_dir/tts/*.wav`; date/trace-uri/cache în `out_dir/data`
+    Întoarce raportul (scris și în `out_dir/report.json`).
+    """
+    out_dir = Path(out_dir).absolute()
+    capture_dir = out_dir / "tts"
+    capture_dir.mkdir(parents=True, exist_ok=True)
+    base_cfg = load_all()
+    sr = int(base_cfg["audio"]["sample_rate"])
+    segs = build_segments(recordings, sr, base_cfg["wake"]["wake_phrases"][0], lang, wake_wav)
+    names = [s.name for s in segs[1:]]
+
+    if asr == "auto":
+        asr = "transcript" if all(s.transcript is not None for s in segs[1:]) else "real"
+    if tts == "auto":
+        tts = "piper" if _piper_ready(base_cfg["tts"]) else "synthetic"
+
+    server = None
+    if not llm_url:
+        server = FakeOllama(**(server_opts or {})).start()
+        llm_url = server.url
+
+    tape = Tape(segs)
+    mic, barge_mic = make_sounddevice(tape, "record"), make_sounddevice(tape, "barge")
+    sys.modules["sounddevice"] = mic  # înainte de importul aplicației (poate lipsi PortAudio de tot)
+
+    # wake text (ASR) — variabila de mediu are prioritate față de wake.yaml în app.py
+    os.environ["WAKE_ENGINE"] = "asr"
+    os.environ.setdefault("METRICS_PORT", "0")  # port liber ales de OS: rulări paralele pe CI
+    os.environ.setdefault("LOG_DIR", str(out_dir / "logs"))
+
+    import src.app as app
+    import src.audio.barge, src.audio.devices, src.audio.input, src.tts.engine
+    saved = {
+        (app, "load_all"): app.load_all, (app, "make_asr"): app.make_asr,
+        (src.tts.engine, "_PiperCmdTTS"): src.tts.engine._PiperCmdTTS,
+        (src.audio.input, "sd"): src.audio.input.sd, (src.audio.devices, "sd"): src.audio.devices.sd,
+        (src.audio.barge, "sd"): src.audio.barge.sd, (src.tts.engine, "sd"): src.tts.engine.sd,
+    }
+
+    def _load_all():
+        cfg = load_all()
+        cfg["paths"]["data"] = str(out_dir / "data")
+        cfg["llm"].update(provider="ollama", host=llm_url, response_cache=False)
+        cfg["tts"]["backend"] = "piper"
+        cobra = cfg["audio"].get("cobra")
+        if isinstance(cobra, dict):
+            cobra["enabled"] = False  # Picovoice are nevoie de cheie + dispozitiv real
+        return cfg
+
+    orig_make_asr = app.make_asr
+
+    def _make_asr(cfg_asr, logger=None):
+        return ReplayASR(tape, None if asr == "transcript" else orig_make_asr(cfg_asr, logger), asr_ms)
+
+    app.load_all, app.make_asr = _load_all, _make_asr
+    src.tts.engine._PiperCmdTTS = _replay_tts_class(capture_dir, tts == "synthetic", rtf=tts_rtf)
+    src.audio.input.sd = src.audio.devices.sd = src.tts.engine.sd = mic
+    src.audio.barge.sd = barge_mic
+
+    if timeout_s is None:
+        timeout_s = 60.0 + sum(len(s.audio) / sr + 20.0 for s in segs)
+    watchdog = threading.Timer(timeout_s, _thread.interrupt_main)  # o tură blocată nu blochează CI-ul
+    watchdog.daemon = True
+    t_start = time.time()
+    watchdog.start()
+    try:
+        app.main()
+    finally:
+        watchdog.cancel()
+        for (mod, attr), val in saved.items():
+            setattr(mod, attr, val)
+        if server is not None:
+            server.stop()
+
+    tracer.flush()  # trace-urile sunt scrise de thread-ul de fundal
+    report = summarize(read_traces(out_dir / "data" / "traces", since=t_start), names)
+    report.update({
+        "asr": asr, "tts": tts, "llm_url": llm_url, "server": server_opts or {},
+        "timed_out": time.time() - t_start >= timeout_s,
+        "llm_requests": len(server.requests) if server else None,
+        "tts_files": sorted(p.name for p in capture_dir.glob("*.wav")),
+        "played": tape.played,
+    })
+    (out_dir / "report.json").write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report
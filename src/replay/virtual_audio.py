@@ -0,0 +1,169 @@
+# src/replay/virtual_audio.py - microfon virtual: WAV-uri înregistrate -> callback-uri sounddevice, în timp real
+from __future__ import annotations
+import threading, time, types
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from src.telemetry.tracing import tracer
+
+
+@dataclass
+class Segment:
+    """O replică a „utilizatorului”: audio mono float32 la rata aplicației (+ transcript forțat opțional)."""
+    name: str
+    audio: np.ndarray
+    transcript: Optional[str] = None
+    lang: str = "en"
+    forced: bool = False  # transcriptul se folosește chiar și cu ASR real (ex. segmentul de wake)
+
+
+def load_wav(path: Path, sample_rate: int) -> np.ndarray:
+    """Citește orice WAV (mono/stereo, orice rată) -> mono float32 la `sample_rate` (interpolare liniară)."""
+    data, sr = sf.read(str(path), dtype="float32", always_2d=True)
+    mono = data.mean(axis=1)
+    if sr != sample_rate and len(mono):
+        n = int(round(len(mono) * sample_rate / float(sr)))
+        mono = np.interp(np.linspace(0.0, len(mono) - 1, n), np.arange(len(mono)), mono).astype(np.float32)
+    return mono
+
+
+class Tape:
+    """
+    Banda de replay: fiecare stream de înregistrare deschis de aplicație (standby sau tură)
+    consumă următorul segment: `lead_s` liniște, replica, apoi liniște până se închide stream-ul
+    (endpointing-ul VAD al aplicației decide când s-a terminat). Banda goală => KeyboardInterrupt
+    la următoarea deschidere, adică ieșirea curată din bucla `main()`.
+    """
+
+    def __init__(self, segments: List[Segment], lead_s: float = 0.3, noise_dbfs: float = -70.0, seed: int = 0):
+        self.segments = list(segments)
+        self.lead_s = float(lead_s)
+        self.noise = 10.0 ** (noise_dbfs / 20.0)
+        self.played: List[dict] = []
+        self._i = 0
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(seed)
+        self.current: Optional[Segment] = None
+
+    def next_segment(self) -> Optional[Segment]:
+        with self._lock:
+            if self._i >= len(self.segments):
+                return None
+            seg = self.segments[self._i]
+            self._i += 1
+            self.current = seg
+            self.played.append({"name": seg.name, "ts": time.time()})
+            return seg
+
+    def floor(self, n: int) -> np.ndarray:
+        """Zgomot de fond foarte slab (un microfon real nu dă niciodată zero digital)."""
+        with self._lock:
+            return (self._rng.standard_normal(n) * self.noise).astype(np.float32)
+
+
+class VirtualInputStream:
+    """
+    Înlocuitor pentru sounddevice.InputStream: un thread livrează blocuri de `blocksize` cadre
+    la cadența reală a dispozitivului (ceas monoton, fără derivă), deci VAD-ul, endpointing-ul și
+    span-urile tracer-ului văd aceleași intervale ca pe un microfon adevărat.
+      role="record": redă următorul segment de pe bandă (și îl etichetează pe trace-ul turei curente)
+      role="barge":  doar zgomot de fond (utilizatorul ascultă răspunsul)
+    """
+
+    def __init__(self, tape: Tape, role: str, samplerate=16000, blocksize=None, channels=1,
+                 dtype="float32", callback=None, device=None, **_kw):
+        self.tape = tape
+        self.role = role
+        self.samplerate = int(samplerate)
+        self.blocksize = int(blocksize or self.samplerate // 50)
+        self.channels = int(channels or 1)
+        self.dtype = dtype
+        self.callback = callback
+        self.active = False
+        self._stop = threading.Event()
+        self._th: Optional[threading.Thread] = None
+        self._audio = np.zeros(0, dtype=np.float32)
+        if role == "record":
+            seg = tape.next_segment()
+            if seg is None:
+                raise KeyboardInterrupt("replay tape exhausted")
+            tracer.set(recording=seg.name)
+            lead = tape.floor(int(tape.lead_s * self.samplerate))
+            self._audio = np.concatenate([lead, seg.audio.astype(np.float32)])
+
+    def _block(self, pos: int) -> np.ndarray:
+        n = self.blocksize
+        out = self.tape.floor(n)
+        chunk = self._audio[pos:pos + n]
+        out[:len(chunk)] += chunk
+        out = np.clip(out, -1.0, 1.0)
+        if self.dtype == "int16":
+            out = (out * 32767.0).astype(np.int16)
+        return np.repeat(out[:, None], self.channels, axis=1)
+
+    def _run(self):
+        period = self.blocksize / float(self.samplerate)
+        t_next = time.monotonic() + period
+        pos = 0
+        while not self._stop.is_set():
+            time.sleep(max(0.0, t_next - time.monotonic()))
+            if self._stop.is_set():
+                break
+            if self.callback is not None:
+                self.callback(self._block(pos), self.blocksize, None, None)
+            pos += self.blocksize
+            t_next += period
+
+    def start(self):
+        if self._th is None:
+            self.active = True
+            self._th = threading.Thread(target=self._run, name=f"vmic-{self.role}", daemon=True)
+            self._th.start()
+
+    def stop(self):
+        self._stop.set()
+        self.active = False
+        if self._th is not None and self._th is not threading.current_thread():
+            self._th.join(timeout=1.0)
+
+    def close(self):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def make_sounddevice(tape: Tape, role: str = "record") -> types.ModuleType:
+    """
+    Modul compatibil cu suprafața sounddevice folosită de aplicație (InputStream, query_devices,
+    play/stop/wait/get_stream). Nu atinge PortAudio — rulează și pe un CI fără placă de sunet.
+    """
+    mod = types.ModuleType("sounddevice")
+    mod.__dict__["__replay__"] = True
+
+    class InputStream(VirtualInputStream):
+        def __init__(self, *a, **kw):
+            super().__init__(tape, role, *a, **kw)
+
+    def query_devices(device=None, kind=None):
+        dev = {"name": f"replay-{role}", "hostapi": 0, "max_input_channels": 1, "max_output_channels": 0,
+               "default_samplerate": 16000.0}
+        return dev if (device is not None or kind is not None) else [dev]
+
+    mod.InputStream = InputStream
+    mod.query_devices = query_devices
+    mod.play = lambda *a, **kw: None  # ieșirea reală nu e folosită: TTS-ul e capturat în fișiere
+    mod.stop = lambda *a, **kw: None
+    mod.wait = lambda *a, **kw: None
+    mod.get_stream = lambda: None
+    mod.PortAudioError = RuntimeError
+    return mod
@@ -1,77 +1,295 @@
-from prometheus_client import Counter, Histogram, make_wsgi_app
+from prometheus_client import Counter, Gauge, Histogram, make_wsgi_app
 from wsgiref.simple_server import make_server, WSGIServer
 from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
 from contextlib import contextmanager
-import threading, os, time, html
+from collections import deque
+from typing import Dict, List, Tuple
+import threading, os, time, html, json, math
+
+from src.telemetry.tracing import render_waterfall_html
+from src.telemetry import profiler
+
+# ---- ROLLING WINDOWS (percentile) ----
+# Histogramele Prometheus dau doar sum/count de la pornire; pentru /vitals ținem și valorile brute
+# din ultima oră (rezervor mărginit), ca să calculăm p50/p95/p99/max pe 5 min și 1 h.
+WINDOWS = (("5m", 300.0), ("1h", 3600.0))
+_RESERVOIR_MAX = 20000
+
+class _Reservoir:
+    """
+    Valori (t, v) din ultima oră, plafonate la `_RESERVOIR_MAX`. add() vine și din callback-ul
+    PortAudio (jitter), deci sub lock face doar un append O(1); cititorul (/vitals) schimbă bufferul
+    de intrare cu unul gol și face mutarea/tăierea/copierea sub lock-ul lui, fără să țină audio-ul.
+    Plafonul e pe număr: la debite mari (50 Hz => ~6.7 min) fereastra de 1 h acoperă mai puțin —
+    `values()` întoarce și intervalul acoperit real.
+    """
+    def __init__(self, cap: int = _RESERVOIR_MAX):
+        self._in = deque(maxlen=cap)
+        self._d = deque(maxlen=cap)
+        self._lock = threading.Lock()        # add() <-> schimbul de buffer
+        self._read_lock = threading.Lock()   # cititorii concurenți (/vitals, /vitals.json)
+        self._dropped_t = float("-inf")      # cel mai nou moment pierdut din cauza plafonului
+
+    def add(self, value: float):
+        item = (time.monotonic(), value)
+        with self._lock:
+            self._in.append(item)
+
+    def values(self, window_s: float, now: float) -> Tuple[List[float], float]:
+        """(valorile din fereastră, secundele acoperite efectiv — < window_s dacă plafonul a tăiat)."""
+        with self._lock:
+            inc, self._in = self._in, deque(maxlen=self._in.maxlen)
+        with self._read_lock:
+            d = self._d
+            if inc and len(inc) == inc.maxlen:
+                # buffer de intrare plin între două citiri: tot ce era înainte e mai vechi decât inc[0]
+                self._dropped_t = max(self._dropped_t, inc[0][0])
+                d.clear()
+            for _ in range(len(d) + len(inc) - d.maxlen):
+                self._dropped_t = max(self._dropped_t, d.popleft()[0])
+            d.extend(inc)
+            horizon = now - WINDOWS[-1][1]
+            while d and d[0][0] < horizon:
+                d.popleft()
+            cutoff = now - window_s
+            vals = [v for t, v in d if t >= cutoff]
+            covered = window_s if (self._dropped_t < cutoff or not d) else max(0.0, now - d[0][0])
+        return vals, covered
+
+_reservoirs: Dict[Tuple[str, Tuple[str, ...]], _Reservoir] = {}
+_reservoirs_lock = threading.Lock()
+
+def _reservoir(name: str, labelvalues: Tuple[str, ...]) -> _Reservoir:
+    key = (name, tuple(labelvalues or ()))
+    r = _reservoirs.get(key)
+    if r is None:
+        with _reservoirs_lock:
+            r = _reservoirs.setdefault(key, _Reservoir())
+    return r
+
+class WindowedHistogram(Histogram):
+    """Histogram normal + rezervor pe fereastră glisantă (copiii etichetați au rezervorul lor)."""
+    def observe(self, amount, exemplar=None):
+        super().observe(amount, exemplar)
+        _reservoir(self._name, self._labelvalues).add(float(amount))
+
+def _percentiles(vals: List[float]) -> Dict[str, float]:
+    if not vals:
+        return {"n": 0}
+    vs = sorted(vals)
+    n = len(vs)
+    pick = lambda q: vs[min(n - 1, max(0, math.ceil(q * n) - 1))]  # nearest-rank
+    return {"n": n, "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": vs[-1]}
+
+def window_stats(hist: Histogram, by_label: bool = False) -> Dict[str, Dict]:
+    """
+    Percentile pe fiecare fereastră; variantele etichetate sunt agregate (sau separate, by_label).
+    Dacă plafonul rezervorului a tăiat fereastra, statistica are `covered_s` (intervalul real).
+    """
+    now = time.monotonic()
+    name = hist._name
+    keys = [k for k in list(_reservoirs) if k[0] == name]
+    out = {}
+    for wname, wsec in WINDOWS:
+        if by_label:
+            out[wname] = {}
+            for k in keys:
+                vals, covered = _reservoirs[k].values(wsec, now)
+                out[wname][",".join(k[1]) or "_"] = _with_coverage(_percentiles(vals), covered, wsec)
+        else:
+            vals, covered = [], wsec
+            for k in keys:
+                v, c = _reservoirs[k].values(wsec, now)
+                vals.extend(v)
+                if v:
+                    covered = min(covered, c)
+            out[wname] = _with_coverage(_percentiles(vals), covered, wsec)
+    return out
+
+def _with_coverage(st: Dict, covered: float, window_s: float) -> Dict:
+    if st.get("n") and covered < window_s * 0.99:
+        st["covered_s"] = round(covered, 1)
+    return st
+
+# ---- LABELS (cardinalitate mărginită) ----
+# Orice valoare din afara listei devine "other" => numărul de serii rămâne fix.
+_LABEL_VALUES = {
+    "lang": ("ro", "en"),
+    "backend": ("piper", "pyttsx3", "faster-whisper", "openai-whisper"),
+    "provider": ("ollama", "openai", "inprocess", "rule"),
+    "mode": ("precise", "friendly"),
+    "engine": ("porcupine", "text"),
+    "detector": ("cobra", "vad"),
+}
+
+def metric_label(kind: str, value) -> str:
+    v = str(value or "").strip().lower()
+    if kind == "lang":
+        v = v[:2]
+    return v if v in _LABEL_VALUES.get(kind, ()) else "other"
 
 # ---- METRICS DEFINITIONS ----
-asr_latency = Histogram("asr_latency_seconds", "ASR transcription latency (seconds)")
-llm_latency = Histogram("llm_latency_seconds", "LLM request latency until completion (seconds)")
-llm_first_token_latency = Histogram("llm_first_token_latency_seconds", "Latency from LLM request to first token (seconds)")
-tts_latency = Histogram("tts_latency_seconds", "TTS blocking speak latency (seconds)")
-round_trip = Histogram("round_trip_seconds", "Latency from end of user recording to issuing TTS (seconds)")
+asr_latency = WindowedHistogram("asr_latency_seconds", "ASR transcription latency (seconds)", ["backend", "lang"])
+llm_latency = WindowedHistogram("llm_latency_seconds", "LLM request latency until completion (seconds)", ["provider", "mode"])
+llm_first_token_latency = WindowedHistogram("llm_first_token_latency_seconds", "Latency from LLM request to first token (seconds)", ["provider", "mode"])
+llm_tier_first_token = WindowedHistogram("llm_tier_first_token_latency_seconds", "First-token latency per model tier (fast/slow)", ["tier"])
+llm_first_token_by_load = WindowedHistogram("llm_first_token_latency_by_load_seconds", "LLM first-token latency split by model load state", ["load"])
+llm_prompt_eval_latency = WindowedHistogram("llm_prompt_eval_seconds", "Ollama prompt evaluation time per turn (seconds)")
+llm_prompt_tokens = WindowedHistogram("llm_prompt_eval_tokens", "Prompt tokens evaluated per turn (cache misses only)",
+                              buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096))
+shaper_first_emit = WindowedHistogram("shaper_first_emit_seconds", "Stream shaper: time from first LLM read to first text handed to TTS")
+shaper_first_emit_after_token = WindowedHistogram("shaper_first_emit_after_token_seconds", "Stream shaper: time from first LLM token to first text handed to TTS (prebuffer cost)")
+tts_first_audio = WindowedHistogram("tts_first_audio_seconds", "Time to first audio: LLM request start to first TTS playback (seconds)", ["backend", "lang"])
+tts_rtf = WindowedHistogram("tts_rtf", "TTS synthesis real-time factor per chunk (synthesis seconds / audio seconds)", ["backend", "lang"],
+                            buckets=(.05, .1, .2, .3, .5, .75, 1.0, 1.5, 2.0, 4.0))
+tts_chunk_chars = WindowedHistogram("tts_chunk_chars", "Characters per chunk handed to TTS synthesis", ["backend"],
+                                    buckets=(10, 20, 40, 60, 80, 120, 160, 240, 320))
+audio_callback_jitter = WindowedHistogram("audio_callback_jitter_seconds", "Audio callback inter-arrival deviation from the block period",
+                                          ["stream"], buckets=(.0005, .001, .0025, .005, .01, .02, .05, .1))
+barge_reaction = WindowedHistogram("barge_in_reaction_seconds", "Barge-in: speech detected -> TTS stopped and LLM cancelled (seconds)",
+                                   ["backend", "detector"], buckets=(.01, .025, .05, .1, .15, .25, .5, 1.0))
+tts_underruns_per_turn = WindowedHistogram("tts_underruns_per_turn", "Playback gaps per streamed turn (next chunk not ready)",
+                                   buckets=(0, 1, 2, 3, 5, 8, 13))
+stage_latency = WindowedHistogram("stage_latency_seconds", "Per-stage time of a streamed turn (llm_stream, llm_backpressure, tts_synth)", ["stage"])
+faq_lookup_latency = WindowedHistogram("faq_lookup_seconds", "FAQ index nearest-neighbour lookup time per utterance",
+                               buckets=(.00005, .0001, .00025, .0005, .001, .0025, .005, .01))
+tts_latency = WindowedHistogram("tts_latency_seconds", "TTS blocking speak latency (seconds)")
+round_trip = WindowedHistogram("round_trip_seconds", "Latency from end of user recording to issuing TTS (seconds)", ["lang"])
+routed_round_trip = WindowedHistogram("routed_round_trip_seconds", "Round-trip for turns answered by the intent router (no LLM)",
+                              buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0))
+route_match_latency = WindowedHistogram("route_match_seconds", "Intent router matching time per utterance",
+                                buckets=(.00001, .000025, .00005, .0001, .00025, .0005, .001, .005))
 
-wake_triggers = Counter("wake_triggers_total", "Wake phrases successfully detected")
+wake_triggers = Counter("wake_triggers_total", "Wake phrases successfully detected", ["engine"])
 sessions_started = Counter("sessions_started_total", "Conversation sessions started")
 sessions_ended = Counter("sessions_ended_total", "Conversation sessions ended")
-interactions = Counter("interactions_total", "Turns inside active sessions")
+interactions = Counter("interactions_total", "Turns inside active sessions", ["lang"])
 unknown_answer = Counter("unknown_answer_total", "LLM replied unknown/uncertain")
 errors_total = Counter("errors_total", "Unhandled errors")
 tts_speak_calls = Counter("tts_speak_calls_total", "Number of TTS speak calls")
+routed_turns = Counter("routed_turns_total", "Turns answered by the intent router without the LLM")
+routed_intents = Counter("routed_intents_total", "Intent router hits by intent", ["intent"])
+llm_tokens_saved = Counter("llm_tokens_saved_total", "LLM tokens not generated thanks to stream cancellation (estimate vs num_predict)")
+llm_cache_hits = Counter("llm_cache_hits_total", "LLM replies served from the response cache")
+llm_cache_misses = Counter("llm_cache_misses_total", "Cacheable LLM requests that missed the response cache")
+llm_tier_race_wins = Counter("llm_tier_race_wins_total", "Tiered race mode: which model produced the first usable text", ["tier"])
+llm_speculative = Counter("llm_speculative_total", "Speculative LLM generations by outcome", ["outcome"])
+llm_cold_loads = Counter("llm_cold_loads_total", "LLM turns that paid a model load (cold start)")
+shaper_flushes = Counter("shaper_flushes_total", "Stream shaper emits by reason (prebuffer, boundary, soft_max, idle, ...)", ["reason"])
+tts_underruns = Counter("tts_underruns_total", "Playback gaps: TTS finished a chunk before the next one was synthesized")
+token_queue_full = Counter("token_queue_full_total", "LLM reader blocked because the bounded token queue was full (backpressure)")
+governor_stops = Counter("governor_stops_total", "Replies cut by the spoken-length budget", ["reason"])
+governor_tokens_saved = Counter("governor_tokens_saved_total", "LLM tokens not generated because the spoken-length budget was reached (upper bound)")
+governor_seconds_saved = Counter("governor_seconds_saved_total", "Estimated speech seconds not generated thanks to the spoken-length budget")
+faq_answers = Counter("faq_answers_total", "Turns answered directly from the FAQ index (no LLM)")
+faq_context_turns = Counter("faq_context_turns_total", "LLM turns whose prompt was augmented with FAQ passages")
+echo_frames_vetoed = Counter("echo_frames_vetoed_total", "Mic frames dropped because they correlate with recent TTS output")
+audio_xruns = Counter("audio_xruns_total", "Input stream status flags from the audio callback (overflow = CPU starvation)", ["stream", "kind"])
+audio_frames_dropped = Counter("audio_frames_dropped_total", "Mic blocks dropped because the consumer queue was full", ["stream"])
+audio_queue_high_water = Gauge("audio_queue_high_water", "Deepest mic block queue seen since start (blocks)", ["stream"])
 
 # ---- HELPERS ----
-def _hist_sum_count(hist: Histogram):
-    """Returnează (sum, count) pentru un histogram fără etichete."""
-    s = c = 0.0
+def _hist_breakdown(hist: Histogram) -> Dict[str, Tuple[float, float]]:
+    """(sum, count) pe fiecare variantă etichetată ("" pentru un histogram fără etichete)."""
+    out: Dict[str, List[float]] = {}
     for metric in hist.collect():
         for sample in metric.samples:
             # sample are câmpuri: name, labels, value, timestamp, exemplar
-            if sample.labels:  # ignoră variantele etichetate
-                continue
             if sample.name.endswith("_sum"):
-                s = float(sample.value)
+                idx = 0
             elif sample.name.endswith("_count"):
-                c = float(sample.value)
-    return s, c
+                idx = 1
+            else:
+                continue  # _bucket / _created
+            key = ",".join(str(v) for v in sample.labels.values())
+            out.setdefault(key, [0.0, 0.0])[idx] = float(sample.value)
+    return {k: (v[0], v[1]) for k, v in out.items()}
+
+def _hist_sum_count(hist: Histogram):
+    """Returnează (sum, count) agregat peste toate variantele etichetate."""
+    parts = _hist_breakdown(hist).values()
+    return sum(p[0] for p in parts), sum(p[1] for p in parts)
 
 def _counter_val(cnt: Counter):
     val = 0.0
     for metric in cnt.collect():
         for sample in metric.samples:
-            if sample.labels:
-                continue
             if sample.name.endswith("_total"):
-                val = float(sample.value)
+                val += float(sample.value)  # sumă peste etichete
     return val
 
-def _fmt_ms(avg_s, count):
+def _fmt_v(v: float, unit: str) -> str:
+    if unit == "s":
+        return f"{v*1000:.0f}"
+    if unit == "x":
+        return f"{v:.2f}"
+    return f"{v:.0f}"
+
+_UNIT_SUFFIX = {"s": " ms", "x": "×", "c": " chars"}
+
+def _fmt_ms(avg_s, count, unit: str = "s"):
     if count <= 0:
         return "—"
-    return f"{avg_s*1000:.0f} ms (n={int(count)})"
+    return f"{_fmt_v(avg_s, unit)}{_UNIT_SUFFIX[unit]} (n={int(count)})"
+
+def _fmt_pct(st: Dict, unit: str = "s") -> str:
+    if not st.get("n"):
+        return "—"
+    cov = ""
+    if "covered_s" in st:  # plafonul rezervorului a tăiat fereastra
+        c = st["covered_s"]
+        cov = f" ⚠ doar ultimele {c:.0f} s" if c < 120 else f" ⚠ doar ultimele {c / 60:.1f} min"
+    return (f"{_fmt_v(st['p50'], unit)} / {_fmt_v(st['p95'], unit)} / {_fmt_v(st['p99'], unit)} · "
+            f"max {_fmt_v(st['max'], unit)}{_UNIT_SUFFIX[unit]} (n={st['n']}){cov}")
 
 def _render_vitals_html():
     hs = [
-        ("Round-trip", round_trip),
-        ("ASR latency", asr_latency),
-        ("LLM first token", llm_first_token_latency),
-        ("LLM total", llm_latency),
-        ("TTS latency", tts_latency),
+        ("Round-trip", round_trip, "s"),
+        ("Round-trip (routed)", routed_round_trip, "s"),
+        ("ASR latency", asr_latency, "s"),
+        ("LLM first token", llm_first_token_latency, "s"),
+        ("LLM total", llm_latency, "s"),
+        ("LLM prompt eval", llm_prompt_eval_latency, "s"),
+        ("TTS latency", tts_latency, "s"),
+        ("TTS time to first audio", tts_first_audio, "s"),
+        ("TTS real-time factor", tts_rtf, "x"),
+        ("TTS chunk size", tts_chunk_chars, "c"),
+        ("Barge-in reaction", barge_reaction, "s"),
+        ("Audio callback jitter", audio_callback_jitter, "s"),
     ]
     cs = [
         ("Wake triggers", wake_triggers),
         ("Sessions started", sessions_started),
         ("Sessions ended", sessions_ended),
         ("Turns (interactions)", interactions),
+        ("Turns routed (no LLM)", routed_turns),
         ("TTS speak calls", tts_speak_calls),
         ("\"Unknown\" replies", unknown_answer),
+        ("LLM cache hits", llm_cache_hits),
+        ("LLM cold loads", llm_cold_loads),
+        ("LLM tokens saved (cancel)", llm_tokens_saved),
+        ("Echo frames vetoed", echo_frames_vetoed),
+        ("Audio xruns (overflow/underflow)", audio_xruns),
+        ("Audio frames dropped", audio_frames_dropped),
         ("Errors", errors_total),
     ]
 
     rows_lat = []
-    for label, h in hs:
+    for label, h, unit in hs:
         s, c = _hist_sum_count(h)
         avg = (s / c) if c else 0.0
-        rows_lat.append((label, _fmt_ms(avg, c)))
+        ws = window_stats(h)
+        rows_lat.append((label, _fmt_ms(avg, c, unit)) + tuple(_fmt_pct(ws[w], unit) for w, _ in WINDOWS))
+        if h._labelnames:
+            # defalcare pe etichete (ex. ASR ro/en, Piper/pyttsx3), doar variantele cu date
+            wl = window_stats(h, by_label=True)
+            for key, (ls, lc) in sorted(_hist_breakdown(h).items()):
+                if lc <= 0:
+                    continue
+                sub = "  · " + ", ".join(f"{n}={v}" for n, v in zip(h._labelnames, key.split(",")))
+                rows_lat.append((sub, _fmt_ms(ls / lc, lc, unit))
+                                + tuple(_fmt_pct(wl[w].get(key, {}), unit) for w, _ in WINDOWS))
 
     rows_cnt = [(label, f"{int(_counter_val(cn))}") for label, cn in cs]
 
@@ -87,9 +305,21 @@ def _render_vitals_html():
       .card { padding:16px; border:1px solid #eee; border-radius:12px; box-shadow:0 1px 2px rgba(0,0,0,.04); }
       a { color:#3366cc; text-decoration:none; }
       a:hover { text-decoration:underline; }
+      .wf { margin: 8px 0 16px; }
+      .wf-head { margin-bottom: 4px; }
+      table.wf-t { margin: 0; min-width: 720px; }
+      table.wf-t td { padding: 2px 8px; border: 0; font-size: 12px; }
+      td.wf-name { width: 120px; color:#444; }
+      td.wf-bar { width: 480px; }
+      td.wf-bar div { height: 10px; border-radius: 2px; }
+      td.wf-ms { color:#666; white-space: nowrap; }
+      .muted { color:#999; }
     </style>
     """
-    lat_rows_html = "\n".join(f"<tr><td>{html.escape(k)}</td><td><b>{html.escape(v)}</b></td></tr>" for k,v in rows_lat)
+    lat_rows_html = "\n".join(
+        f"<tr><td>{html.escape(r[0])}</td><td><b>{html.escape(r[1])}</b></td>"
+        + "".join(f"<td>{html.escape(v)}</td>" for v in r[2:]) + "</tr>" for r in rows_lat)
+    win_th = "".join(f"<th>{w} p50 / p95 / p99</th>" for w, _ in WINDOWS)
     cnt_rows_html = "\n".join(f"<tr><td>{html.escape(k)}</td><td><b>{html.escape(v)}</b></td></tr>" for k,v in rows_cnt)
 
     html_doc = f"""<!doctype html>
@@ -99,10 +329,10 @@ def _render_vitals_html():
   <div class="small">Only the important stuff. Full Prometheus at <a href="/metrics">/metrics</a>.</div>
   <div class="grid">
     <div class="card">
-      <h3>Latency (avg)</h3>
-      <table><thead><tr><th>Metric</th><th>Value</th></tr></thead>
+      <h3>Latency</h3>
+      <table><thead><tr><th>Metric</th><th>Avg (since start)</th>{win_th}</tr></thead>
       <tbody>{lat_rows_html}</tbody></table>
-      <div class="small">Tip: Round-trip = end of user speech → TTS start.</div>
+      <div class="small">Tip: Round-trip = end of user speech → TTS start. Same data as JSON at <a href="/vitals.json">/vitals.json</a>.</div>
     </div>
     <div class="card">
       <h3>Counters</h3>
@@ -110,9 +340,27 @@ def _render_vitals_html():
       <tbody>{cnt_rows_html}</tbody></table>
     </div>
   </div>
+  <div class="card">
+    <h3>Turn waterfall (recent)</h3>
+    {render_waterfall_html()}
+    <div class="small">Monotonic spans per turn, also appended to data/traces/traces-YYYYMMDD.jsonl.</div>
+  </div>
 </body></html>"""
     return html_doc.encode("utf-8")
 
+def _render_vitals_json():
+    """Percentile pe ferestre pentru TOATE histogramele (secunde / unitatea metricii), pentru dashboard-uri."""
+    hists = {}
+    for obj in list(globals().values()):
+        if isinstance(obj, WindowedHistogram) and not obj._labelvalues:
+            st = window_stats(obj)
+            if obj._labelnames:
+                for w, per in window_stats(obj, by_label=True).items():
+                    st[w]["by_label"] = {",".join(obj._labelnames): per}
+            hists[obj._name] = st
+    doc = {"ts": time.time(), "windows": {w: sec for w, sec in WINDOWS}, "histograms": hists}
+    return json.dumps(doc, separators=(",", ":")).encode("utf-8")
+
 class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
     daemon_threads = True
 
@@ -123,24 +371,60 @@ def _router_app(environ, start_response):
     if path == "/" or path == "/vitals":
         start_response("200 OK", [("Content-Type", "text/html; charset=utf-8")])
         return [_render_vitals_html()]
+    if path == "/vitals.json":
+        start_response("200 OK", [("Content-Type", "application/json"), ("Cache-Control", "no-store")])
+        return [_render_vitals_json()]
+    # endpoint-urile /debug/ expun stivele thread-urilor: doar opt-in (METRICS_DEBUG=1)
+    if path.startswith("/debug/") and os.getenv("METRICS_DEBUG", "0") == "1":
+        return _debug_app(path, environ, start_response)
     start_response("404 Not Found", [("Content-Type", "text/plain; charset=utf-8")])
     return [b"Not Found"]
 
+def _debug_app(path, environ, start_response):
+    """
+    Activ doar cu METRICS_DEBUG=1 (implicit 404).
+    /debug/profile?seconds=N&hz=M[&idle=1] -> stive „collapsed” (flamegraph.pl / speedscope), blocant N s
+    /debug/threads                         -> toate thread-urile cu stiva curentă
+    """
+    qs = parse_qs(environ.get("QUERY_STRING") or "")
+    arg = lambda k, d: (qs.get(k) or [d])[0]
+    text = "text/plain; charset=utf-8"
+    try:
+        if path == "/debug/profile":
+            out = profiler.sample_stacks(float(arg("seconds", "5")),
+                                         int(arg("hz", os.getenv("PROFILE_HZ", "100"))),
+                                         include_idle=arg("idle", "0") == "1")
+            if out is None:
+                start_response("409 Conflict", [("Content-Type", text)])
+                return [b"A profile is already running\n"]
+            fname = time.strftime("profile-%Y%m%d-%H%M%S.folded")
+            start_response("200 OK", [("Content-Type", text), ("Cache-Control", "no-store"),
+                                      ("Content-Disposition", f'inline; filename="{fname}"')])
+            return [out.encode("utf-8")]
+        if path == "/debug/threads":
+            start_response("200 OK", [("Content-Type", text), ("Cache-Control", "no-store")])
+            return [profiler.threads_snapshot(int(arg("depth", "12"))).encode("utf-8")]
+    except ValueError as e:
+        start_response("400 Bad Request", [("Content-Type", text)])
+        return [f"Bad parameter: {e}\n".encode("utf-8")]
+    start_response("404 Not Found", [("Content-Type", text)])
+    return [b"Not Found"]
+
 def boot_metrics():
     addr = os.getenv("METRICS_ADDR", "127.0.0.1")
     port = int(os.getenv("METRICS_PORT", "9108"))
     httpd = make_server(addr, port, _router_app, server_class=ThreadingWSGIServer)
-    th = threading.Thread(target=httpd.serve_forever, daemon=True)
+    th = threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True)
     th.start()
 
     # Self-test opțional ca să nu vezi 0 la început
     if os.getenv("METRICS_SELFTEST", "0") == "1":
-        wake_triggers.inc()
+        wake_triggers.labels(engine="text").inc()
         sessions_started.inc()
-        interactions.inc()
+        interactions.labels(lang="en").inc()
         tts_speak_calls.inc()
-        with observe_hist(asr_latency): time.sleep(0.12)
-        with observe_hist(round_trip): time.sleep(0.22)
+        with observe_hist(asr_latency.labels(backend="faster-whisper", lang="en")): time.sleep(0.12)
+        with observe_hist(round_trip.labels(lang="en")): time.sleep(0.22)
         with observe_hist(tts_latency): time.sleep(0.05)
         sessions_ended.inc()
     return addr, port
@@ -0,0 +1,111 @@
+# src/telemetry/profiler.py - profiler prin eșantionare (sys._current_frames) + snapshot de thread-uri
+from __future__ import annotations
+import sys, threading, time, traceback
+from collections import Counter
+from typing import Dict, List, Optional
+
+MAX_SECONDS = 60.0
+MAX_HZ = 1000
+
+_busy = threading.Lock()  # un singur profil odată (fiecare eșantionare ține GIL-ul câteva µs)
+
+
+def _thread_names() -> Dict[int, str]:
+    return {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+
+
+def _collapse(frame, max_depth: int = 128) -> List[str]:
+    """Stiva de la rădăcină la frunză, ca `fișier:funcție:linie` (formatul „folded” pentru flamegraph)."""
+    out = []
+    while frame is not None and len(out) < max_depth:
+        co = frame.f_code
+        fname = co.co_filename.replace("\\", "/").rsplit("/", 1)[-1]
+        out.append(f"{fname}:{co.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    out.reverse()
+    return out
+
+
+def sample_stacks(seconds: float = 5.0, hz: int = 100, include_idle: bool = False) -> Optional[str]:
+    """
+    Eșantionează stivele tuturor thread-urilor Python timp de `seconds` la `hz` eșantioane/s.
+    Întoarce stive „collapsed” (`thread;frame;frame… N`), direct consumabile de flamegraph.pl
+    sau speedscope. Fără profil activ costul e zero: nu există hook-uri sau thread de fundal.
+    `include_idle=False` sare peste thread-urile care doar așteaptă (wait/select/queue.get în frunză).
+    Întoarce None dacă rulează deja alt profil.
+    """
+    seconds = max(0.1, min(float(seconds), MAX_SECONDS))
+    hz = max(1, min(int(hz), MAX_HZ))
+    if not _busy.acquire(blocking=False):
+        return None
+    try:
+        me = threading.get_ident()
+        counts: Counter = Counter()
+        period = 1.0 / hz
+        n = 0
+        t_end = time.monotonic() + seconds
+        next_t = time.monotonic()
+        while time.monotonic() < t_end:
+            names = _thread_names()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _collapse(frame)
+                if not include_idle and stack and _is_idle(stack[-1]):
+                    continue
+                counts[";".join([names.get(ident, f"thread-{ident}")] + stack)] += 1
+            n += 1
+            next_t += period
+            time.sleep(max(0.0, next_t - time.monotonic()))
+        lines = [f"{k} {v}" for k, v in counts.most_common()]
+        header = f"# samples={n} hz={hz} seconds={seconds:g} stacks={len(counts)}"
+        return "\n".join([header] + lines) + "\n"
+    finally:
+        _busy.release()
+
+
+_IDLE_LEAVES = ("threading.py:wait:", "threading.py:_wait_for_tstate_lock:", "queue.py:get:",
+                "selectors.py:select:", "socketserver.py:serve_forever:", "socket.py:readinto:",
+                "subprocess.py:_wait:", "subprocess.py:wait:", "ssl.py:read:")
+
+
+def _is_idle(leaf: str) -> bool:
+    return leaf.startswith(_IDLE_LEAVES)
+
+
+def threads_snapshot(depth: int = 12) -> str:
+    """Toate thread-urile (nume, daemon, ident) cu stiva curentă — ca un `py-spy dump`."""
+    frames = sys._current_frames()
+    parts = []
+    for t in sorted(threading.enumerate(), key=lambda t: t.name):
+        flags = "daemon" if t.daemon else "main" if t is threading.main_thread() else "fg"
+        parts.append(f"--- {t.name} (ident={t.ident}, {flags}, alive={t.is_alive()})")
+        frame = frames.get(t.ident)
+        if frame is not None:
+            parts.extend(l.rstrip("\n") for l in traceback.format_stack(frame)[-depth:])
+        parts.append("")
+    known = {t.ident for t in threading.enumerate()}
+    # thread-uri create din C (ex. callback-urile PortAudio din sounddevice) nu apar în threading.enumerate
+    for ident, frame in frames.items():
+        if ident in known:
+            continue
+        parts.append(f"--- <foreign thread> (ident={ident})")
+        parts.extend(l.rstrip("\n") for l in traceback.format_stack(frame)[-depth:])
+        parts.append("")
+    return "\n".join(parts)
+
+
+if __name__ == "__main__":
+    # demo: python -m src.telemetry.profiler  -> profilează 2 s un thread ocupat + unul idle
+    def busy():
+        t_end = time.monotonic() + 3
+        while time.monotonic() < t_end:
+            sum(i * i for i in range(2000))
+
+    threading.Thread(target=busy, name="demo-busy", daemon=True).start()
+    threading.Thread(target=lambda: time.sleep(3), name="demo-idle", daemon=True).start()
+    t0 = time.perf_counter()
+    out = sample_stacks(2.0, hz=200)
+    print(out[:800])
+    print(f"profil 2 s @200 Hz în {time.perf_counter() - t0:.2f}s")
+    print(threads_snapshot(depth=3))
@@ -0,0 +1,286 @@
+# src/telemetry/tracing.py - trace per tură: span-uri monotone pe toate etapele pipeline-ului
+from __future__ import annotations
+import atexit, html, json, queue, threading, time, uuid
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+# ordinea „canonică” a etapelor (pentru afișare); orice alt nume apare după ele
+STAGES = (
+    "wake", "ack",
+    "capture_end", "vad_endpoint", "asr", "route", "faq",
+    "llm_request", "llm_first_token", "first_chunk", "first_synth", "first_play",
+    "barge_in", "barge_stop", "tts_end",
+)
+
+
+class TurnTrace:
+    """
+    O tură = un trace_id + span-uri [start, end] pe ceasul monoton (time.monotonic).
+    Evenimentele punctuale (primul token, primul sample redat…) sunt span-uri de durată zero.
+    Marcajele pot veni din orice thread (reader LLM, producer/consumer TTS).
+    """
+
+    def __init__(self, kind: str = "turn", **attrs):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.t0 = time.monotonic()
+        self.t_wall = time.time()
+        self.attrs: Dict[str, Any] = dict(attrs)
+        self.spans: List[Dict[str, Any]] = []
+        self._open: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name: str, t: Optional[float] = None, once: bool = False, **attrs):
+        t = time.monotonic() if t is None else float(t)
+        with self._lock:
+            if once and any(s["name"] == name for s in self.spans):
+                return
+            self.spans.append({"name": name, "start": t, "end": t, **attrs})
+
+    def begin(self, name: str, **attrs):
+        with self._lock:
+            s = {"name": name, "start": time.monotonic(), "end": None, **attrs}
+            self._open[name] = s
+            self.spans.append(s)
+
+    def end(self, name: str, **attrs):
+        with self._lock:
+            s = self._open.pop(name, None)
+            if s is not None:
+                s["end"] = time.monotonic()
+                s.update(attrs)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        self.begin(name, **attrs)
+        try:
+            yield self
+        finally:
+            self.end(name)
+
+    def has(self, name: str) -> bool:
+        with self._lock:
+            return any(s["name"] == name for s in self.spans)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [dict(s) for s in self.spans]
+        now = time.monotonic()
+        for s in spans:
+            if s["end"] is None:
+                s["end"] = now
+        base = min([self.t0] + [s["start"] for s in spans])  # capture_end poate fi retroactiv
+        rank = {n: i for i, n in enumerate(STAGES)}
+        spans.sort(key=lambda s: (s["start"], rank.get(s["name"], len(STAGES))))
+        out = []
+        for s in spans:
+            d = {k: v for k, v in s.items() if k not in ("start", "end")}
+            d["start_ms"] = round((s["start"] - base) * 1000.0, 1)
+            d["dur_ms"] = round((s["end"] - s["start"]) * 1000.0, 1)
+            out.append(d)
+        total = max((d["start_ms"] + d["dur_ms"] for d in out), default=0.0)
+        return {"trace_id": self.trace_id, "kind": self.kind,
+                "ts": round(self.t_wall - (self.t0 - base), 3),
+                "total_ms": round(total, 1), **self.attrs, "spans": out}
+
+
+class _NullTrace:
+    """Înlocuitor fără efect când nu există tură curentă (tracing oprit / în afara unei ture)."""
+    kind = ""
+    attrs: Dict[str, Any] = {}
+
+    def mark(self, *a, **kw):
+        pass
+
+    def begin(self, *a, **kw):
+        pass
+
+    def end(self, *a, **kw):
+        pass
+
+    @contextmanager
+    def span(self, *a, **kw):
+        yield self
+
+    def has(self, name: str) -> bool:
+        return False
+
+
+_NULL = _NullTrace()
+
+
+class _Tracer:
+    """
+    Trace-ul turei curente (o singură conversație odată) + export JSONL + ultimele N pentru /vitals.
+    Thread-urile care trăiesc mai mult decât tura (reader LLM, producer/consumer TTS, speculația)
+    își iau trace-ul cu `capture()` când pornesc și marchează ACEL obiect — un marcaj întârziat
+    nu ajunge pe tura următoare. JSONL-ul e scris de un thread de fundal (`trace-writer`).
+    """
+
+    def __init__(self):
+        self._cur: Optional[TurnTrace] = None
+        self._lock = threading.Lock()
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=20)
+        self.out_dir: Optional[Path] = None
+        self.enabled = True
+        self._wq: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def configure(self, out_dir: Optional[Path] = None, enabled: bool = True, keep: int = 20):
+        self.enabled = bool(enabled)
+        self.out_dir = Path(out_dir) if out_dir else None
+        self._recent = deque(self._recent, maxlen=max(1, int(keep)))
+
+    def start(self, kind: str = "turn", **attrs) -> Optional[TurnTrace]:
+        """Începe o tură nouă; o tură anterioară nefinalizată (utterance ignorat) e abandonată."""
+        if not self.enabled:
+            return None
+        tr = TurnTrace(kind, **attrs)
+        with self._lock:
+            self._cur = tr
+        return tr
+
+    def current(self) -> Optional[TurnTrace]:
+        return self._cur
+
+    def capture(self):
+        """Trace-ul turei curente, de păstrat de thread-urile pornite acum (sau un no-op)."""
+        return self._cur or _NULL
+
+    def mark(self, name: str, t: Optional[float] = None, once: bool = False, **attrs):
+        tr = self._cur
+        if tr is not None:
+            tr.mark(name, t=t, once=once, **attrs)
+
+    def begin(self, name: str, **attrs):
+        tr = self._cur
+        if tr is not None:
+            tr.begin(name, **attrs)
+
+    def end(self, name: str, **attrs):
+        tr = self._cur
+        if tr is not None:
+            tr.end(name, **attrs)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        tr = self._cur
+        if tr is None:
+            yield None
+            return
+        with tr.span(name, **attrs):
+            yield tr
+
+    def set(self, **attrs):
+        tr = self._cur
+        if tr is not None:
+            tr.attrs.update(attrs)
+
+    def finish(self, outcome: str = "ok", **attrs) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            tr, self._cur = self._cur, None
+        if tr is None:
+            return None
+        tr.attrs.update(attrs, outcome=outcome)
+        rec = tr.to_dict()
+        self._recent.append(rec)
+        if self.out_dir is not None:
+            self._ensure_writer()
+            self._wq.put((self.out_dir, rec))
+        return rec
+
+    def flush(self, timeout: float = 2.0):
+        """Așteaptă scrierea trace-urilor din coadă (ieșire / replay înainte de citirea JSONL)."""
+        t_end = time.monotonic() + timeout
+        while self._wq.unfinished_tasks and time.monotonic() < t_end:
+            time.sleep(0.01)
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _write_loop(self):
+        while True:
+            out_dir, rec = self._wq.get()
+            try:
+                out_dir.mkdir(parents=True, exist_ok=True)
+                path = out_dir / time.strftime("traces-%Y%m%d.jsonl", time.localtime(rec["ts"]))
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            except Exception:
+                pass
+            finally:
+                self._wq.task_done()
+
+    def recent(self) -> List[Dict[str, Any]]:
+        return list(self._recent)
+
+
+tracer = _Tracer()
+
+
+_COLORS = {
+    "wake": "#8b5cf6", "ack": "#a78bfa",
+    "capture_end": "#64748b", "vad_endpoint": "#94a3b8", "asr": "#0ea5e9", "route": "#14b8a6",
+    "faq": "#2dd4bf", "llm_request": "#f59e0b", "llm_first_token": "#f97316", "first_chunk": "#eab308",
+    "first_synth": "#22c55e", "first_play": "#16a34a", "barge_in": "#ef4444", "barge_stop": "#dc2626",
+    "tts_end": "#475569",
+}
+
+
+def render_waterfall_html(limit: int = 8) -> str:
+    """Waterfall per tură (cele mai recente sus) pentru /vitals."""
+    recs = tracer.recent()[-limit:][::-1]
+    if not recs:
+        return "<p class='muted'>Nicio tură înregistrată încă.</p>"
+    parts = []
+    for r in recs:
+        total = max(float(r.get("total_ms") or 0.0), 1.0)
+        rows = []
+        for s in r["spans"]:
+            left = 100.0 * s["start_ms"] / total
+            width = max(100.0 * s["dur_ms"] / total, 0.4)
+            color = _COLORS.get(s["name"], "#6b7280")
+            label = f"{s['start_ms']:.0f}ms" + (f" +{s['dur_ms']:.0f}ms" if s["dur_ms"] >= 1 else "")
+            rows.append(
+                f"<tr><td class='wf-name'>{html.escape(s['name'])}</td><td class='wf-bar'>"
+                f"<div style='margin-left:{left:.2f}%;width:{width:.2f}%;background:{color}' "
+                f"title='{label}'></div></td><td class='wf-ms'>{label}</td></tr>")
+        head = (f"<b>{html.escape(str(r.get('kind')))}</b> <code>{r['trace_id']}</code> · "
+                f"{html.escape(str(r.get('lang', '')))} {html.escape(str(r.get('path', '')))} · "
+                f"{html.escape(str(r.get('outcome', '')))} · total {total:.0f} ms · "
+                f"{time.strftime('%H:%M:%S', time.localtime(r['ts']))}")
+        parts.append(f"<div class='wf'><div class='wf-head'>{head}</div>"
+                     f"<table class='wf-t'>{''.join(rows)}</table></div>")
+    return "".join(parts)
+
+
+if __name__ == "__main__":
+    # demo: python -m src.telemetry.tracing  (scrie în data/traces și afișează trace-ul)
+    root = Path(__file__).resolve().parents[2]
+    tracer.configure(root / "data" / "traces")
+    t_speech_end = time.monotonic()
+    time.sleep(0.05)
+    tracer.start("turn", lang="en")
+    tracer.mark("capture_end", t=t_speech_end)
+    tracer.mark("vad_endpoint")
+    with tracer.span("asr"):
+        time.sleep(0.08)
+    with tracer.span("route"):
+        time.sleep(0.001)
+    tracer.begin("llm_request")
+    time.sleep(0.12)
+    tracer.mark("llm_first_token", once=True)
+    tracer.mark("llm_first_token", once=True)  # ignorat
+    tracer.mark("first_chunk", once=True)
+    time.sleep(0.06)
+    tracer.mark("first_synth", once=True)
+    tracer.mark("first_play", once=True)
+    tracer.end("llm_request")
+    print(json.dumps(tracer.finish(path="llm"), indent=2))
+    tracer.flush()
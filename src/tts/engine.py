@@ -1,14 +1,77 @@
 # src/tts/engine.py
 from __future__ import annotations
-from typing import Dict, Optional, Iterable, Callable
-import threading, re, os, shutil, subprocess, tempfile, time, queue
+from typing import Dict, Optional, Iterable, Callable, List, Tuple
+import threading, re, os, shutil, subprocess, tempfile, time, queue, hashlib
 import soundfile as sf
 import sounddevice as sd
 
-from src.telemetry.metrics import tts_speak_calls
+from src.telemetry.metrics import tts_speak_calls, stage_latency, tts_rtf, tts_chunk_chars, metric_label
+from src.telemetry.tracing import tracer
+from src.audio.echo_veto import get_echo_veto
 
 _SENT_SPLIT = re.compile(r'([.!?…:;]+)\s+')
 
+# -------------------- REDARE WAV (comună backend-urilor) --------------------
+class _WavPlayer:
+    """
+    Redă un WAV (paplay → aplay → sounddevice) și anunță veto-ul anti-eco (far-end)
+    imediat după ce player-ul a pornit — punct comun pentru Piper și pyttsx3, ca referința
+    să fie aliniată la redare (+ `echo_veto_play_offset_ms` pentru pornirea player-ului).
+    """
+
+    def __init__(self, logger):
+        self.log = logger
+        self._proc: Optional[subprocess.Popen] = None
+
+    def _push_echo_reference(self, wav_path: str):
+        veto = get_echo_veto()
+        if veto is None:
+            return
+        try:
+            data, sr = sf.read(wav_path, dtype="int16", always_2d=False)
+            veto.push_reference(data, sr)
+        except Exception as e:
+            self.log.debug(f"Echo veto reference error: {e}")
+
+    def _wait_proc(self, stop: threading.Event):
+        while self._proc.poll() is None:
+            if stop.is_set():
+                self._proc.terminate()
+                break
+            time.sleep(0.02)
+
+    def play(self, wav_path: str, stop: threading.Event):
+        # 1) paplay (PulseAudio/PipeWire)  2) aplay (ALSA)
+        for player, args in (("paplay", []), ("aplay", ["-q"])):
+            exe = shutil.which(player)
+            if exe:
+                self._proc = subprocess.Popen([exe, *args, wav_path])
+                self._push_echo_reference(wav_path)
+                self._wait_proc(stop)
+                return
+
+        # 3) fallback Python (sounddevice)
+        try:
+            data, sr = sf.read(wav_path, dtype="float32")
+            sd.play(data, sr)
+            self._push_echo_reference(wav_path)
+            while sd.get_stream() and sd.get_stream().active:
+                if stop.is_set():
+                    sd.stop()
+                    break
+                time.sleep(0.02)
+            sd.wait()
+        except Exception as e:
+            self.log.error(f"Audio playback error: {e}")
+
+    def stop(self):
+        try:
+            if self._proc and self._proc.poll() is None:
+                self._proc.terminate()
+        except Exception:
+            pass
+
+
 # -------------------- PYTTSX3 BACKEND --------------------
 class _Pyttsx3TTS:
     def __init__(self, cfg: Dict, logger):
@@ -27,6 +90,29 @@ class _Pyttsx3TTS:
         self._stop = threading.Event()
         self._speaking = threading.Event()
         self._speak_th: Optional[threading.Thread] = None
+        self._player = _WavPlayer(logger)
+
+    def _speak(self, text: str):
+        """
+        Cu veto-ul anti-eco activ, propoziția e randată în WAV și redată prin `_WavPlayer`
+        (altfel pyttsx3 vorbește direct și veto-ul n-ar avea referință); fallback: say() direct.
+        """
+        if get_echo_veto() is not None:
+            fd, path = tempfile.mkstemp(prefix="pyttsx3_", suffix=".wav")
+            os.close(fd)
+            try:
+                self.eng.save_to_file(text, path)
+                self.eng.runAndWait()
+                if os.path.getsize(path) > 44:
+                    self._player.play(path, self._stop)
+                    return
+            except Exception as e:
+                self.log.debug(f"pyttsx3 save_to_file indisponibil ({e}) — redare directă")
+            finally:
+                try: os.remove(path)
+                except Exception: pass
+        self.eng.say(text)
+        self.eng.runAndWait()
 
     def _pick_voice(self, lang: str) -> Optional[str]:
         target = (self.voice_ro_hint if lang.startswith("ro") else self.voice_en_hint or "").lower()
@@ -47,8 +133,8 @@ class _Pyttsx3TTS:
         tts_speak_calls.inc()
         self._speaking.set()
         try:
-            self.eng.say(text)
-            self.eng.runAndWait()
+            tracer.mark("first_play", once=True)
+            self._speak(text)
         finally:
             self._speaking.clear()
 
@@ -59,7 +145,10 @@ class _Pyttsx3TTS:
         on_first_speak: Optional[Callable[[], None]] = None,
         min_chunk_chars: int = 80,
         on_done: Optional[Callable[[], None]] = None,
+        pacer=None,
     ):
+        tr = tracer.capture()  # thread-ul poate supraviețui turei: marchează doar tura lui
+
         def worker():
             first_spoken = False
             buf = ""
@@ -95,16 +184,19 @@ class _Pyttsx3TTS:
                             first_spoken = True
                             try: on_first_speak()
                             except Exception: pass
-                        self.eng.say(sentence)
-                        self.eng.runAndWait()
+                        if pacer is not None:
+                            pacer.on_play_start()
+                        tr.mark("first_play", once=True)
+                        tts_chunk_chars.labels(backend="pyttsx3").observe(len(sentence))
+                        self._speak(sentence)
 
                 if not self._stop.is_set() and buf.strip():
                     if on_first_speak and not first_spoken:
                         first_spoken = True
                         try: on_first_speak()
                         except Exception: pass
-                    self.eng.say(buf.strip())
-                    self.eng.runAndWait()
+                    tr.mark("first_play", once=True)
+                    self._speak(buf.strip())
             except Exception as e:
                 self.log.error(f"TTS stream error (pyttsx3): {e}")
             finally:
@@ -115,7 +207,7 @@ class _Pyttsx3TTS:
 
         self.stop()
         self._stop.clear()
-        self._speak_th = threading.Thread(target=worker, daemon=True)
+        self._speak_th = threading.Thread(target=worker, name="tts-pyttsx3", daemon=True)
         self._speak_th.start()
         return self._speaking
 
@@ -124,6 +216,7 @@ class _Pyttsx3TTS:
             self._stop.set()
             try: self.eng.stop()
             except Exception: pass
+            self._player.stop()
         self._speaking.clear()
 
 # -------------------- PIPER (CLI) BACKEND — DOUBLE BUFFER --------------------
@@ -162,8 +255,11 @@ class _PiperCmdTTS:
         self._producer_th: Optional[threading.Thread] = None
         self._consumer_th: Optional[threading.Thread] = None
         self._coord_th: Optional[threading.Thread] = None
-        self._play_proc: Optional[subprocess.Popen] = None
+        self._player = _WavPlayer(logger)
         self._staged_paths: set[str] = set()
+        # fraze pre-randate (ex. răspunsul fix „nu știu”): text -> wav persistent, randat cu vocea
+        # limbii frazei — cheia e doar textul, ca fraza RO să fie găsită și într-o tură detectată EN
+        self._phrase_wavs: Dict[str, str] = {}
 
         if not self.exe or not os.path.exists(self.exe):
             raise RuntimeError("Piper executable not found. Set tts.piper.exe or install piper-tts.")
@@ -198,48 +294,88 @@ class _PiperCmdTTS:
             raise
 
     def _play_wav(self, wav_path: str):
-        # 1) paplay (PulseAudio/PipeWire)
-        player = shutil.which("paplay")
-        if player:
-            self._play_proc = subprocess.Popen([player, wav_path])
-            while self._play_proc.poll() is None:
-                if self._stop.is_set():
-                    self._play_proc.terminate()
-                    break
-                time.sleep(0.02)
-            return
+        self._player.play(wav_path, self._stop)
 
-        # 2) aplay (ALSA)
-        player = shutil.which("aplay")
-        if player:
-            self._play_proc = subprocess.Popen([player, "-q", wav_path])
-            while self._play_proc.poll() is None:
-                if self._stop.is_set():
-                    self._play_proc.terminate()
-                    break
-                time.sleep(0.02)
-            return
+    # ---------- FIX: producer robust + sentinel garantat ----------
+    def prerender(self, phrases: List[Tuple[str, str]], cache_dir: str):
+        """Sintetizează o dată (și păstrează pe disc) fraze fixe, ca să fie redate fără Piper."""
+        os.makedirs(cache_dir, exist_ok=True)
+        for text, lang in phrases:
+            text = text.strip()
+            model, _ = self._pick_model(lang)
+            key = hashlib.sha1(f"{lang}|{model}|{text}".encode("utf-8")).hexdigest()[:16]
+            path = os.path.join(cache_dir, f"{key}.wav")
+            try:
+                if not os.path.exists(path):
+                    shutil.move(self._synth_to_wav(text, lang), path)
+                self._phrase_wavs[text] = path
+            except Exception as e:
+                self.log.warning(f"TTS prerender eșuat pentru '{text[:30]}…': {e}")
+        self.log.info(f"🗃️ TTS: {len(self._phrase_wavs)} fraze pre-randate în {cache_dir}")
 
-        # 3) fallback Python (sounddevice)
+    def _observe_synth(self, text: str, lang: str, wav: str, synth_s: float) -> float:
+        """Metrici per bucată: RTF (sinteză / durata audio) și mărimea în caractere. Întoarce durata audio."""
+        tts_chunk_chars.labels(backend="piper").observe(len(text))
         try:
-            data, sr = sf.read(wav_path, dtype="float32")
-            sd.play(data, sr)
-            while sd.get_stream() and sd.get_stream().active:
-                if self._stop.is_set():
-                    sd.stop()
-                    break
-                time.sleep(0.02)
-            sd.wait()
+            audio_s = float(sf.info(wav).duration)
         except Exception as e:
-            self.log.error(f"Audio playback error: {e}")
+            self.log.debug(f"TTS synth stats error: {e}")
+            return 0.0
+        if audio_s > 0:
+            tts_rtf.labels(backend="piper", lang=metric_label("lang", lang)).observe(synth_s / audio_s)
+        return audio_s
+
+    def _cached_phrase(self, text: str) -> Optional[str]:
+        path = self._phrase_wavs.get(text.strip())
+        return path if path and os.path.exists(path) else None
+
+    def _synth_staged(self, text: str, lang: str, pacer=None, trace=None):
+        """Sinteză + punere în coada A/B; raportează RTF-ul către pacer."""
+        tr = trace if trace is not None else tracer.capture()
+        cached = self._cached_phrase(text)
+        if cached:
+            # audio gata făcut: nu intră în _staged_paths => consumer-ul nu-l șterge
+            self.log.info("🗃️ TTS din cache [%dc]: %s", len(text), text)
+            tr.mark("first_synth", once=True, cached=True)
+            while not self._stop.is_set():
+                try:
+                    self._q.put(cached, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            return
+        self.log.info("🧠 LLM→TTS chunk [%dc]: %s", len(text), text)
+        t0 = time.perf_counter()
+        wav = self._synth_to_wav(text, lang)
+        synth_s = time.perf_counter() - t0
+        stage_latency.labels(stage="tts_synth").observe(synth_s)
+        tr.mark("first_synth", once=True)
+        audio_s = self._observe_synth(text, lang, wav, synth_s)
+        if pacer is not None and audio_s:
+            pacer.on_synth(len(text), synth_s, audio_s)
+        self._staged_paths.add(wav)
+        while not self._stop.is_set():
+            try:
+                self._q.put(wav, timeout=0.1)
+                break
+            except queue.Full:
+                continue
 
-    # ---------- FIX: producer robust + sentinel garantat ----------
-    def _producer(self, token_iter: Iterable[str], lang: str, min_chunk_chars: int):
+    def _producer(self, token_iter: Iterable[str], lang: str, min_chunk_chars: int, pacer=None, trace=None):
         try:
             buf = ""
             for tok in token_iter:
                 if self._stop.is_set():
                     break
+                if pacer is not None:
+                    # bucățile vin deja dimensionate de shaper (mari = mai puține porniri Piper)
+                    if tok.strip():
+                        self._synth_staged(tok.strip(), lang, pacer, trace=trace)
+                    continue
+                if not buf.strip() and self._cached_phrase(tok):
+                    # frază pre-randată livrată dintr-o bucată (UnknownDetector): fără split pe propoziții
+                    self._synth_staged(tok.strip(), lang, trace=trace)
+                    continue
                 buf += tok
 
                 parts = _SENT_SPLIT.split(buf)
@@ -261,27 +397,11 @@ class _PiperCmdTTS:
                 for s in out:
                     if self._stop.is_set():
                         break
-                    self.log.info(f"🧠 LLM→TTS chunk [{len(s)}c]: {s}")
-                    wav = self._synth_to_wav(s, lang)
-                    self._staged_paths.add(wav)
-                    while not self._stop.is_set():
-                        try:
-                            self._q.put(wav, timeout=0.1)
-                            break
-                        except queue.Full:
-                            continue
+                    self._synth_staged(s, lang, trace=trace)
 
             tail = buf.strip()
             if (not self._stop.is_set()) and tail:
-                self.log.info(f"🧠 LLM→TTS chunk [{len(tail)}c]: {tail}")
-                wav = self._synth_to_wav(tail, lang)
-                self._staged_paths.add(wav)
-                while not self._stop.is_set():
-                    try:
-                        self._q.put(wav, timeout=0.1)
-                        break
-                    except queue.Full:
-                        continue
+                self._synth_staged(tail, lang, trace=trace)
         except Exception as e:
             self.log.error(f"Piper producer error: {e}")
         finally:
@@ -293,26 +413,37 @@ class _PiperCmdTTS:
                 except queue.Full:
                     continue
 
-    def _consumer(self, on_first_speak: Optional[Callable[[], None]]):
+    def _consumer(self, on_first_speak: Optional[Callable[[], None]], pacer=None, trace=None):
+        tr = trace if trace is not None else tracer.capture()
         first = True
         n = 0
+        starved = False  # o singură numărare per gol de redare
         try:
             while not self._stop.is_set():
                 try:
                     item = self._q.get(timeout=0.1)
                 except queue.Empty:
+                    # am terminat o bucată și următoarea nu e gata => underrun
+                    if n and not starved and pacer is not None:
+                        starved = True
+                        pacer.on_underrun()
                     continue
                 if item is None:
                     break
+                starved = False
                 wav = item
                 n += 1
+                if first:
+                    tr.mark("first_play", once=True)
+                    if pacer is not None:
+                        pacer.on_play_start()
                 if on_first_speak and first:
                     first = False
                     try:
                         on_first_speak()
                     except Exception:
                         pass
-                self.log.info(f"🔊 TTS play start (chunk {n})")
+                self.log.info("🔊 TTS play start (chunk %d)", n)
                 try:
                     self._play_wav(wav)
                 finally:
@@ -351,10 +482,14 @@ class _PiperCmdTTS:
 
             for s in sentences:
                 if self._stop.is_set(): break
-                self.log.info(f"🧠 LLM→TTS chunk [{len(s)}c]: {s}")
+                self.log.info("🧠 LLM→TTS chunk [%dc]: %s", len(s), s)
+                t0 = time.perf_counter()
                 wav = self._synth_to_wav(s, lang)
+                self._observe_synth(s, lang, wav, time.perf_counter() - t0)
+                tracer.mark("first_synth", once=True)
                 try:
                     self.log.info("🔊 TTS play start (blocking)")
+                    tracer.mark("first_play", once=True)
                     self._play_wav(wav)
                 finally:
                     try: os.remove(wav)
@@ -374,7 +509,10 @@ class _PiperCmdTTS:
         on_first_speak: Optional[Callable[[], None]] = None,
         min_chunk_chars: int = 80,
         on_done: Optional[Callable[[], None]] = None,
+        pacer=None,
     ):
+        tr = tracer.capture()  # producer/consumer marchează tura care i-a pornit, nu pe cea curentă
+
         def coordinator():
             try:
                 self._speaking.set()
@@ -383,13 +521,13 @@ class _PiperCmdTTS:
                 # Pornește producer + consumer
                 self._producer_th = threading.Thread(
                     target=self._producer,
-                    args=(token_iter, lang, int(min_chunk_chars)),
-                    daemon=True,
+                    args=(token_iter, lang, int(min_chunk_chars), pacer, tr),
+                    name="tts-producer", daemon=True,
                 )
                 self._consumer_th = threading.Thread(
                     target=self._consumer,
-                    args=(on_first_speak,),
-                    daemon=True,
+                    args=(on_first_speak, pacer, tr),
+                    name="tts-consumer", daemon=True,
                 )
                 self._producer_th.start()
                 self._consumer_th.start()
@@ -416,18 +554,14 @@ class _PiperCmdTTS:
         self._stop.clear()
         self._q = queue.Queue(maxsize=2)
 
-        self._coord_th = threading.Thread(target=coordinator, daemon=True)
+        self._coord_th = threading.Thread(target=coordinator, name="tts-coordinator", daemon=True)
         self._coord_th.start()
         return self._speaking
 
     def stop(self):
         with self._lock:
             self._stop.set()
-            try:
-                if self._play_proc and self._play_proc.poll() is None:
-                    self._play_proc.terminate()
-            except Exception:
-                pass
+            self._player.stop()
         # șterge WAV-urile neconsumate
         for p in list(self._staged_paths):
             try:
@@ -451,12 +585,14 @@ class TTSLocal:
         try:
             if backend == "piper":
                 self.impl = _PiperCmdTTS(cfg, logger)
+                self.backend = "piper"
                 self.log.info("TTS backend: Piper (double-buffer)")
             else:
                 raise RuntimeError("force pyttsx3")
         except Exception as e:
             self.log.warning(f"Piper indisponibil ({e}). Revin pe pyttsx3.")
             self.impl = _Pyttsx3TTS(cfg, logger)
+            self.backend = "pyttsx3"
             self.log.info("TTS backend: pyttsx3")
 
     def is_speaking(self) -> bool:
@@ -472,8 +608,16 @@ class TTSLocal:
         on_first_speak: Optional[Callable[[], None]] = None,
         min_chunk_chars: int = 80,
         on_done: Optional[Callable[[], None]] = None,
+        pacer=None,
     ):
-        return self.impl.say_async_stream(token_iter, lang, on_first_speak, min_chunk_chars, on_done)
+        return self.impl.say_async_stream(token_iter, lang, on_first_speak, min_chunk_chars, on_done, pacer=pacer)
+
+    def prerender(self, phrases, cache_dir) -> bool:
+        """Pre-randează fraze fixe (doar backend-urile care suportă cache de audio)."""
+        if not hasattr(self.impl, "prerender"):
+            return False
+        self.impl.prerender(phrases, str(cache_dir))
+        return True
 
     def stop(self):
         return self.impl.stop()
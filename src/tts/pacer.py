@@ -0,0 +1,138 @@
+# src/tts/pacer.py - dimensionare adaptivă a bucăților LLM→TTS
+from __future__ import annotations
+import threading, time
+from typing import Dict, Optional
+
+from src.telemetry.metrics import tts_first_audio, tts_underruns, tts_underruns_per_turn, metric_label
+
+
+def _ewma(old: Optional[float], new: float, alpha: float = 0.3) -> float:
+    return new if old is None else (1.0 - alpha) * old + alpha * new
+
+
+class AdaptivePacer:
+    """
+    Leagă viteza LLM-ului de viteza TTS-ului:
+      - debitul LLM (caractere/s) — din shaper, la fiecare token
+      - RTF-ul TTS (timp sinteză / durata audio) și secunde de vorbire per caracter — din producer
+      - cât audio e deja „în față” (sintetizat, încă neredat)
+    Prima bucată e scurtă (prima frază/virgulă) => primul sunet vine devreme; bucățile
+    următoare cresc geometric cât timp redarea rămâne înaintea generării+sintezei.
+    Estimările RTF / debit persistă între ture (EWMA); contoarele de tură se resetează în `start_turn()`.
+    """
+
+    def __init__(
+        self,
+        first_chunk_chars: int = 24,    # prima bucată: prima propoziție/virgulă după atâtea caractere
+        min_chunk_chars: int = 60,
+        max_chunk_chars: int = 240,
+        growth: float = 1.6,
+        backend: str = "piper",
+        logger=None,
+    ):
+        self.first_chunk_chars = int(first_chunk_chars)
+        self.min_chunk_chars = int(min_chunk_chars)
+        self.max_chunk_chars = int(max_chunk_chars)
+        self.growth = float(growth)
+        self.backend = metric_label("backend", backend)
+        self.log = logger
+        self._lock = threading.Lock()
+
+        # estimări persistente
+        self.chars_per_s: Optional[float] = None      # debit LLM
+        self.rtf: Optional[float] = None              # sinteză / audio
+        self.speech_s_per_char: Optional[float] = None
+
+        self.start_turn()
+
+    @classmethod
+    def from_cfg(cls, cfg_tts: Dict, logger=None, backend: Optional[str] = None) -> Optional["AdaptivePacer"]:
+        if not bool(cfg_tts.get("adaptive_chunks", True)):
+            return None
+        return cls(
+            first_chunk_chars=int(cfg_tts.get("first_chunk_chars", 24)),
+            min_chunk_chars=int(cfg_tts.get("min_chunk_chars", 60)),
+            max_chunk_chars=int(cfg_tts.get("max_chunk_chars", 240)),
+            growth=float(cfg_tts.get("chunk_growth", 1.6)),
+            backend=backend or cfg_tts.get("backend") or "pyttsx3",
+            logger=logger,
+        )
+
+    # ——— tură ———
+    def start_turn(self, lang: str = "en"):
+        with self._lock:
+            self.lang = metric_label("lang", lang)
+            self._t0 = time.monotonic()
+            self._t_first_tok: Optional[float] = None
+            self._turn_chars = 0
+            self._play_until = 0.0       # monotonic: când se termină audio-ul deja programat
+            self._first_audio: Optional[float] = None
+            self.underruns = 0
+
+    def end_turn(self):
+        with self._lock:
+            if self._turn_chars and self._t_first_tok is not None:
+                dt = time.monotonic() - self._t_first_tok
+                if dt > 0.2:
+                    self.chars_per_s = _ewma(self.chars_per_s, self._turn_chars / dt)
+            ttfa, under = self._first_audio, self.underruns
+        if ttfa is None:
+            return
+        tts_underruns_per_turn.observe(under)
+        if self.log:
+            self.log.info(f"📈 Tură TTS: TTFA={ttfa * 1000:.0f} ms | underruns={under} | "
+                          f"LLM≈{(self.chars_per_s or 0):.0f} c/s | RTF≈{(self.rtf or 0):.2f}")
+
+    # ——— semnale din shaper (LLM) ———
+    def on_tokens(self, n_chars: int):
+        now = time.monotonic()
+        with self._lock:
+            if self._t_first_tok is None:
+                self._t_first_tok = now
+            self._turn_chars += int(n_chars)
+
+    def _current_rate(self) -> Optional[float]:
+        if self._t_first_tok is not None and self._turn_chars >= 20:
+            dt = time.monotonic() - self._t_first_tok
+            if dt > 0.1:
+                return self._turn_chars / dt
+        return self.chars_per_s
+
+    def next_chunk_chars(self, idx: int) -> int:
+        """Ținta (caractere) pentru bucata `idx` (0 = prima)."""
+        if idx <= 0:
+            return self.first_chunk_chars
+        target = self.first_chunk_chars * (self.growth ** idx)
+        with self._lock:
+            rate = self._current_rate()
+            ahead = max(0.0, self._play_until - time.monotonic())
+            spc, rtf = self.speech_s_per_char, self.rtf
+        if rate and spc and rtf is not None:
+            # cât ne permitem: generare (c / rate) + sinteză (c * spc * rtf) <= audio deja în față
+            cost_per_char = 1.0 / rate + spc * rtf
+            target = min(target, ahead / cost_per_char)
+        return int(max(self.min_chunk_chars, min(self.max_chunk_chars, target)))
+
+    # ——— semnale din TTS ———
+    def on_synth(self, n_chars: int, synth_s: float, audio_s: float):
+        if audio_s <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.rtf = _ewma(self.rtf, synth_s / audio_s)
+            if n_chars > 0:
+                self.speech_s_per_char = _ewma(self.speech_s_per_char, audio_s / n_chars)
+            self._play_until = max(now, self._play_until) + audio_s
+
+    def on_play_start(self):
+        with self._lock:
+            if self._first_audio is not None:
+                return
+            self._first_audio = time.monotonic() - self._t0
+            ttfa = self._first_audio
+        tts_first_audio.labels(backend=self.backend, lang=self.lang).observe(ttfa)
+
+    def on_underrun(self):
+        with self._lock:
+            self.underruns += 1
+        tts_underruns.inc()
@@ -1,57 +1,63 @@
 from __future__ import annotations
-from pathlib import Path
-from datetime import datetime
+import time
+import uuid
 from typing import Iterable, Generator, Optional
 
+from src.utils.debug_store import DebugStore
+
 class DebugSpeech:
     """
-    Colectează ce intră/iese în pipeline:
-    - asr.txt          -> ce a auzit ASR
-    - llm_stream.txt   -> token cu token (pe măsură ce vin)
-    - spoken_text.txt  -> tot textul trimis spre TTS (concat)
-    - session.log      -> timpi, praguri, evenimente
+    Colectează ce intră/iese în pipeline pentru o tură, în DebugStore (SQLite, scris în fundal):
+    - turns.asr        -> ce a auzit ASR
+    - tokens           -> token cu token (cu timpul de la începutul turei)
+    - turns.spoken     -> tot textul trimis spre TTS (concat)
+    - events           -> timpi, praguri, evenimente
+    Toate metodele doar pun în coada store-ului — nimic nu blochează pe disc în calea tokenilor.
+    Cu `store=None` (DEBUG_STORE=off) rămân doar logurile debug.
     """
-    def __init__(self, base_dir: Path, lang: str, logger):
-        self.base_dir = Path(base_dir)
-        self.base_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, store: Optional[DebugStore], lang: str, logger,
+                 session_id: Optional[str] = None, trace_id: Optional[str] = None):
+        self.store = store
         self.lang = lang
         self.logger = logger
+        self.turn_id = uuid.uuid4().hex[:12]
         self._buf = []
         self._ttft_ms: Optional[float] = None
         self._started_tts = False
         self._closed = False
+        self._t0 = time.time()
+        self._m0 = time.monotonic()
 
-        self._asr_f = (self.base_dir / "00_asr.txt").open("w", encoding="utf-8")
-        self._llm_f = (self.base_dir / "10_llm_stream.txt").open("w", encoding="utf-8")
-        self._spoken_f = (self.base_dir / "20_spoken_text.txt").open("w", encoding="utf-8")
-        self._sess_f = (self.base_dir / "session.log").open("a", encoding="utf-8")
-
-        self._log(f"# Session {datetime.now().isoformat(timespec='seconds')} lang={lang}")
+        if self.store is not None:
+            self.store.put("turn", self.turn_id, session_id, self._t0, lang, trace_id)
+        self._log(f"# Turn {self.turn_id} lang={lang}")
 
     def _log(self, msg: str):
         if self._closed:
             return
-        self._sess_f.write(msg.rstrip() + "\n")
-        self._sess_f.flush()
+        if self.store is not None:
+            self.store.put("event", self.turn_id, time.time(), msg.rstrip())
         self.logger.debug(msg)
 
     def write_asr(self, text: str):
         if self._closed:
             return
-        self._asr_f.write((text or "").rstrip() + "\n")
-        self._asr_f.flush()
+        if self.store is not None:
+            self.store.put("asr", (text or "").rstrip(), self.turn_id)
         self._log(f"[ASR] {text}")
 
     def on_first_token(self, ttft_seconds: float):
         self._ttft_ms = ttft_seconds * 1000.0
+        if self.store is not None:
+            self.store.put("ttft", self._ttft_ms, self.turn_id)
         self._log(f"[LLM] TTFT={self._ttft_ms:.1f} ms")
 
     def on_token(self, tok: str):
         if not tok or self._closed:
             return
         self._buf.append(tok)
-        self._llm_f.write(tok)
-        self._llm_f.flush()
+        if self.store is not None:
+            self.store.put("tok", self.turn_id, len(self._buf), (time.monotonic() - self._m0) * 1000.0, tok)
 
     def on_tts_start(self):
         if self._closed:
@@ -69,7 +75,6 @@ class DebugSpeech:
         Împachetează generatorul de tokeni: loghează și relay-uiește mai departe.
         """
         first = True
-        import time
         t0 = time.perf_counter()
         for tok in gen:
             if first:
@@ -85,13 +90,7 @@ class DebugSpeech:
         if self._closed:
             return
         text = "".join(self._buf)
-        self._spoken_f.write(text)
-        self._spoken_f.flush()
         self._log(f"[SPOKEN] {len(text)} chars")
-        # close files
-        for f in (self._asr_f, self._llm_f, self._spoken_f, self._sess_f):
-            try:
-                f.close()
-            except Exception:
-                pass
+        if self.store is not None:
+            self.store.put("turn_end", time.time(), text, len(self._buf), self.turn_id)
         self._closed = True
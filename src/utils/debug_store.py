@@ -0,0 +1,267 @@
+# src/utils/debug_store.py - jurnal de debug per sesiune într-un singur SQLite (WAL), scris în batch-uri
+from __future__ import annotations
+import os, queue, sqlite3, threading, time, uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY, started REAL NOT NULL, ended REAL, wake TEXT
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id TEXT PRIMARY KEY, session_id TEXT, started REAL NOT NULL, ended REAL,
+    lang TEXT, trace_id TEXT, asr TEXT, spoken TEXT, ttft_ms REAL, n_tokens INTEGER
+);
+CREATE TABLE IF NOT EXISTS tokens (
+    turn_id TEXT NOT NULL, seq INTEGER NOT NULL, t_ms REAL NOT NULL, tok TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    turn_id TEXT, t REAL NOT NULL, msg TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_started ON turns(started);
+CREATE INDEX IF NOT EXISTS tokens_turn ON tokens(turn_id, seq);
+CREATE INDEX IF NOT EXISTS events_turn ON events(turn_id, t);
+"""
+
+_SQL = {
+    "session": "INSERT OR REPLACE INTO sessions(id, started, wake) VALUES (?, ?, ?)",
+    "session_end": "UPDATE sessions SET ended = ? WHERE id = ?",
+    "turn": "INSERT OR REPLACE INTO turns(id, session_id, started, lang, trace_id) VALUES (?, ?, ?, ?, ?)",
+    "asr": "UPDATE turns SET asr = ? WHERE id = ?",
+    "ttft": "UPDATE turns SET ttft_ms = ? WHERE id = ?",
+    "turn_end": "UPDATE turns SET ended = ?, spoken = ?, n_tokens = ? WHERE id = ?",
+    "tok": "INSERT INTO tokens(turn_id, seq, t_ms, tok) VALUES (?, ?, ?, ?)",
+    "event": "INSERT INTO events(turn_id, t, msg) VALUES (?, ?, ?)",
+}
+
+_STOP = object()
+
+
+class DebugStore:
+    """
+    Sink de debug pentru toate sesiunile: un fișier SQLite în mod WAL (data/debug/debug.sqlite3).
+      - apelantul (inclusiv calea de tokeni) doar pune tupluri într-o coadă — niciun I/O
+      - un thread de fundal le scrie în batch-uri (max `batch_max` rânduri / `flush_ms`, o tranzacție)
+      - retenție: ture mai vechi de `retention_days`, peste `max_turns` sau fișier peste `max_mb`
+        sunt șterse (la pornire și apoi la fiecare `prune_every_s`)
+    Coada e mărginită: dacă discul nu ține pasul, rândurile noi se pierd (numărate în `dropped`).
+    """
+
+    def __init__(self, db_path: Path, logger=None, batch_max: int = 512, flush_ms: int = 500,
+                 retention_days: float = 7.0, max_turns: int = 5000, max_mb: float = 200.0,
+                 prune_every_s: float = 600.0, queue_max: int = 50000):
+        self.path = Path(db_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.log = logger
+        self.batch_max = max(1, int(batch_max))
+        self.flush_s = max(10, int(flush_ms)) / 1000.0
+        self.retention_days = float(retention_days)
+        self.max_turns = int(max_turns)
+        self.max_mb = float(max_mb)
+        self.prune_every_s = float(prune_every_s)
+        self.dropped = 0
+        self._q: "queue.Queue" = queue.Queue(maxsize=max(1000, int(queue_max)))
+        self._th = threading.Thread(target=self._run, name="debug-store", daemon=True)
+        self._th.start()
+
+    @classmethod
+    def from_env(cls, data_dir: Path, logger=None) -> Optional["DebugStore"]:
+        """DEBUG_STORE=sqlite (implicit) | off; DEBUG_RETENTION_DAYS, DEBUG_MAX_TURNS, DEBUG_MAX_MB."""
+        if os.getenv("DEBUG_STORE", "sqlite").strip().lower() in ("off", "0", "none", ""):
+            return None
+        return cls(Path(data_dir) / "debug" / "debug.sqlite3", logger,
+                   retention_days=float(os.getenv("DEBUG_RETENTION_DAYS", "7")),
+                   max_turns=int(os.getenv("DEBUG_MAX_TURNS", "5000")),
+                   max_mb=float(os.getenv("DEBUG_MAX_MB", "200")))
+
+    # ——— API apelant (doar enqueue) ———
+    def put(self, op: str, *params) -> None:
+        try:
+            self._q.put_nowait((op, params))
+        except queue.Full:
+            self.dropped += 1
+
+    def begin_session(self, wake: str = "") -> str:
+        sid = uuid.uuid4().hex[:12]
+        self.put("session", sid, time.time(), wake)
+        return sid
+
+    def end_session(self, session_id: str) -> None:
+        self.put("session_end", time.time(), session_id)
+
+    def close(self, timeout: float = 2.0) -> None:
+        self._q.put(_STOP)
+        self._th.join(timeout)
+
+    # ——— writer ———
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")  # efect doar la crearea fișierului
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("PRAGMA synchronous = NORMAL")      # WAL + NORMAL: fără fsync per tranzacție
+        db.executescript(_SCHEMA)
+        return db
+
+    def _run(self):
+        try:
+            db = self._connect()
+        except Exception as e:
+            if self.log: self.log.error(f"Debug store indisponibil ({self.path}): {e}")
+            return
+        self._prune(db)
+        next_prune = time.monotonic() + self.prune_every_s
+        stop = False
+        while not stop:
+            batch: List[Tuple[str, Tuple]] = []
+            try:
+                item = self._q.get(timeout=self.flush_s)
+                deadline = time.monotonic() + self.flush_s
+                while True:
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_max:
+                        break
+                    item = self._q.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                pass
+            if batch:
+                self._write(db, batch)
+            if time.monotonic() >= next_prune:
+                self._prune(db)
+                next_prune = time.monotonic() + self.prune_every_s
+        db.close()
+
+    def _write(self, db: sqlite3.Connection, batch: List[Tuple[str, Tuple]]):
+        # ordinea contează (turn înainte de update-urile lui) => grupăm doar rulările consecutive
+        try:
+            db.execute("BEGIN")
+            run_op, run = None, []
+            for op, params in batch:
+                if op != run_op and run:
+                    db.executemany(_SQL[run_op], run)
+                    run = []
+                run_op = op
+                run.append(params)
+            if run:
+                db.executemany(_SQL[run_op], run)
+            db.execute("COMMIT")
+        except Exception as e:
+            try:
+                db.execute("ROLLBACK")
+            except Exception:
+                pass
+            if self.log: self.log.warning(f"Debug store: batch de {len(batch)} rânduri pierdut: {e}")
+
+    def _prune(self, db: sqlite3.Connection):
+        try:
+            cutoff = time.time() - self.retention_days * 86400.0
+            db.execute("BEGIN")
+            db.execute("DELETE FROM turns WHERE started < ?", (cutoff,))
+            db.execute("DELETE FROM turns WHERE id IN (SELECT id FROM turns ORDER BY started DESC LIMIT -1 OFFSET ?)",
+                       (self.max_turns,))
+            if self._size_mb() > self.max_mb:
+                n = db.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+                db.execute("DELETE FROM turns WHERE id IN (SELECT id FROM turns ORDER BY started LIMIT ?)",
+                           (max(1, n // 5),))
+            db.execute("DELETE FROM tokens WHERE turn_id NOT IN (SELECT id FROM turns)")
+            db.execute("DELETE FROM events WHERE turn_id IS NOT NULL AND turn_id NOT IN (SELECT id FROM turns)")
+            db.execute("DELETE FROM sessions WHERE started < ? AND id NOT IN (SELECT session_id FROM turns "
+                       "WHERE session_id IS NOT NULL)", (cutoff,))
+            db.execute("COMMIT")
+            db.execute("PRAGMA incremental_vacuum")
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            try:
+                db.execute("ROLLBACK")
+            except Exception:
+                pass
+            if self.log: self.log.warning(f"Debug store: retenție eșuată: {e}")
+
+    def _size_mb(self) -> float:
+        total = 0
+        for suffix in ("", "-wal"):
+            p = Path(str(self.path) + suffix)
+            if p.exists():
+                total += p.stat().st_size
+        return total / 1e6
+
+
+# ——— CLI de interogare ———
+def _fmt_ts(t: Optional[float]) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)) if t else "—"
+
+
+def _cli(argv: List[str]) -> int:
+    import argparse
+    root = Path(__file__).resolve().parents[2]
+    ap = argparse.ArgumentParser(prog="python -m src.utils.debug_store",
+                                 description="Interogare jurnal debug (data/debug/debug.sqlite3)")
+    ap.add_argument("--db", default=str(root / "data" / "debug" / "debug.sqlite3"))
+    sub = ap.add_subparsers(dest="cmd")
+    p = sub.add_parser("turns", help="ultimele ture")
+    p.add_argument("-n", type=int, default=20)
+    p.add_argument("--session")
+    p.add_argument("--grep", help="filtru pe textul ASR / rostit")
+    p = sub.add_parser("show", help="o tură: ASR, răspuns, evenimente")
+    p.add_argument("turn_id")
+    p = sub.add_parser("tokens", help="tokenii unei ture cu timpii lor")
+    p.add_argument("turn_id")
+    sub.add_parser("sessions", help="sesiunile recente")
+    sub.add_parser("stats", help="dimensiune, număr de ture/tokeni, TTFT mediu")
+    args = ap.parse_args(argv)
+
+    if not Path(args.db).exists():
+        print(f"nu există {args.db}")
+        return 1
+    db = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    cmd = args.cmd or "turns"
+    if cmd == "turns":
+        n = getattr(args, "n", 20)
+        q, params = "SELECT id, session_id, started, lang, ttft_ms, n_tokens, asr, spoken FROM turns", []
+        conds = []
+        if getattr(args, "session", None):
+            conds.append("session_id = ?"); params.append(args.session)
+        if getattr(args, "grep", None):
+            conds.append("(asr LIKE ? OR spoken LIKE ?)"); params += [f"%{args.grep}%"] * 2
+        if conds:
+            q += " WHERE " + " AND ".join(conds)
+        for r in db.execute(q + " ORDER BY started DESC LIMIT ?", params + [n]):
+            ttft = f"{r[4]:.0f}ms" if r[4] is not None else "—"
+            print(f"{r[0]}  {_fmt_ts(r[2])}  [{r[3]}] ttft={ttft} tok={r[5] or 0}  "
+                  f"{(r[6] or '')[:50]!r} -> {(r[7] or '')[:60]!r}")
+    elif cmd == "show":
+        r = db.execute("SELECT id, session_id, started, ended, lang, trace_id, asr, spoken, ttft_ms, n_tokens "
+                       "FROM turns WHERE id LIKE ?", (args.turn_id + "%",)).fetchone()
+        if not r:
+            print("tură inexistentă"); return 1
+        print(f"turn {r[0]}  session {r[1]}  trace {r[5]}  lang={r[4]}")
+        ttft = f"{r[8]:.0f} ms" if r[8] is not None else "—"
+        print(f"  {_fmt_ts(r[2])} -> {_fmt_ts(r[3])}  ttft={ttft}  tokens={r[9]}")
+        print(f"  ASR:    {r[6]}")
+        print(f"  SPOKEN: {r[7]}")
+        for t, msg in db.execute("SELECT t, msg FROM events WHERE turn_id = ? ORDER BY t", (r[0],)):
+            print(f"  {(t - r[2]) * 1000:8.0f} ms  {msg}")
+    elif cmd == "tokens":
+        for seq, t_ms, tok in db.execute("SELECT seq, t_ms, tok FROM tokens WHERE turn_id LIKE ? ORDER BY seq",
+                                         (args.turn_id + "%",)):
+            print(f"{seq:5d} {t_ms:8.1f} ms  {tok!r}")
+    elif cmd == "sessions":
+        for r in db.execute("SELECT s.id, s.started, s.ended, s.wake, COUNT(t.id) FROM sessions s "
+                            "LEFT JOIN turns t ON t.session_id = s.id GROUP BY s.id ORDER BY s.started DESC LIMIT 30"):
+            print(f"{r[0]}  {_fmt_ts(r[1])} -> {_fmt_ts(r[2])}  wake={r[3] or '—'}  turns={r[4]}")
+    elif cmd == "stats":
+        n_t, avg_ttft, first, last = db.execute(
+            "SELECT COUNT(*), AVG(ttft_ms), MIN(started), MAX(started) FROM turns").fetchone()
+        n_tok = db.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+        size = sum(Path(args.db + s).stat().st_size for s in ("", "-wal") if Path(args.db + s).exists())
+        print(f"{args.db}: {size / 1e6:.1f} MB, {n_t} ture, {n_tok} tokeni, "
+              f"TTFT mediu {avg_ttft or 0:.0f} ms, {_fmt_ts(first)} .. {_fmt_ts(last)}")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(_cli(sys.argv[1:]))
@@ -0,0 +1,56 @@
+# tests/test_inprocess.py - provider-ul llama.cpp în proces pe un GGUF mic
+# Fixture: LLAMA_TEST_GGUF=/cale/model.gguf sau tests/fixtures/tiny.gguf
+# (ex. un model de câțiva MB: stories260K.gguf / tinyllama-15M q8). Fără llama_cpp sau fixture => skip.
+import logging, os, threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("llama_cpp")
+
+from src.llm.inprocess import LlamaInProcess
+
+GGUF = Path(os.environ.get("LLAMA_TEST_GGUF") or Path(__file__).parent / "fixtures" / "tiny.gguf")
+pytestmark = pytest.mark.skipif(not GGUF.exists(), reason=f"fixture GGUF lipsă: {GGUF}")
+
+MESSAGES = [{"role": "system", "content": "You are a storyteller."},
+            {"role": "user", "content": "Tell me a story."}]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return LlamaInProcess({"gguf_path": str(GGUF), "n_ctx": 256, "n_threads": 2},
+                          logging.getLogger("test-inprocess"))
+
+
+def test_stream_yields_tokens_and_eval_count(model):
+    stats = {}
+    toks = list(model.stream(MESSAGES, max_tokens=8, stats=stats))
+    assert toks and all(isinstance(t, str) and t for t in toks)
+    assert stats["eval_count"] == len(toks)
+    assert len(toks) <= 8
+
+
+def test_should_stop_cancels_generation(model):
+    calls = [0]
+
+    def stop():  # verificat de worker înainte de fiecare bucată: a 3-a verificare oprește decodarea
+        calls[0] += 1
+        return calls[0] > 2
+
+    stats = {}
+    seen = list(model.stream(MESSAGES, max_tokens=64, should_stop=stop, stats=stats))
+    assert len(seen) <= 2
+    assert stats["eval_count"] == len(seen)
+
+
+def test_abandoned_generator_does_not_block_next_turn(model):
+    gen = model.stream(MESSAGES, max_tokens=16)
+    next(gen)  # consumator abandonat: nici close(), nici epuizare
+    out = []
+    th = threading.Thread(target=lambda: out.extend(model.stream(MESSAGES, max_tokens=4)), daemon=True)
+    th.start()
+    th.join(timeout=60)
+    assert not th.is_alive(), "a doua generare a rămas blocată pe lock"
+    assert out
+    gen.close()